@@ -0,0 +1,62 @@
+"""Time reading a dataset from its columnar sidecar against parsing the CSV file.
+
+Profiles the file, writes its sidecar, then reads all columns and a few columns both ways, checking that
+read_dataset returns the same DataFrame as pd.read_csv. Without --csv, the synthetic file of
+bench_metadata_template is used:
+
+    python -m benchmarks.bench_dataset_sidecar --rows 1000000
+    python -m benchmarks.bench_dataset_sidecar --csv ~/data/survey.csv --columns age income
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import pandas as pd
+from data_processing.dataset_profile import compute_profile
+from data_processing.dataset_sidecar import write_sidecar, read_dataset, sidecar_path
+from benchmarks.bench_metadata_template import synthetic_csv
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--csv', help="CSV file to read; a synthetic file by default")
+    parser.add_argument('--rows', type=int, default=1_000_000, help="rows of the synthetic file")
+    parser.add_argument('--columns', nargs='+', help="columns of the partial read, the first two by default")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as folder:
+        # Work on a copy, so no sidecar is left next to the original file
+        csv_file_path = os.path.join(folder, 'dataset.csv')
+        if args.csv is None:
+            synthetic_csv(csv_file_path, args.rows)
+        else:
+            shutil.copy(args.csv, csv_file_path)
+        print(f"file: {args.csv or 'synthetic'} ({os.path.getsize(csv_file_path) / 2**20:.1f} MB)")
+
+        profile, profile_time = timed(lambda: compute_profile(csv_file_path))
+        written, write_time = timed(lambda: write_sidecar(csv_file_path))
+        print(f"profile:            {profile_time:8.2f} s")
+        if written is None:
+            print("no sidecar: the column types of pd.read_csv depend on how pandas splits this file")
+            return 0
+        print(f"write sidecar:      {write_time:8.2f} s  ({os.path.getsize(sidecar_path(csv_file_path)) / 2**20:.1f} MB)")
+
+        columns = args.columns or [column['name'] for column in profile['columns'][:2]]
+        for label, selected in (("all columns", None), (", ".join(columns), columns)):
+            expected, csv_time = timed(lambda: pd.read_csv(csv_file_path, usecols=selected))
+            result, sidecar_time = timed(lambda: read_dataset(csv_file_path, columns=selected))
+            same = "same frame" if result.equals(expected) and list(result.dtypes) == list(expected.dtypes) else "FRAMES DIFFER"
+            print(f"{label}: pd.read_csv {csv_time:.3f} s, sidecar {sidecar_time:.3f} s ({csv_time / sidecar_time:.1f}x), {same}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""Time the streaming metadata template generator against loading the whole CSV file.
+
+Reports the wall time and peak traced memory of data_processing.metadata_template and of pd.read_csv on the same
+file, and checks that the template does not depend on the chunk size. With --r, also builds the template with
+inferno's metadatatemplate and lists the fields where both differ. Without --csv, a synthetic file is generated:
+
+    python -m benchmarks.bench_metadata_template --rows 1000000
+    python -m benchmarks.bench_metadata_template --csv ~/data/survey.csv --r
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+import numpy as np
+import pandas as pd
+from data_processing.metadata_template import build_metadata_template, compare_metadata
+
+
+def synthetic_csv(path, rows, seed=0):
+    """Write a CSV file mixing continuous, ordinal, binary, nominal and identifier columns, with missing values."""
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        'age': rng.integers(18, 90, rows),
+        'likert': rng.integers(1, 6, rows),
+        'height': np.round(rng.normal(170, 10, rows), 1),
+        'income': np.round(rng.lognormal(10, 1, rows), 2),
+        'score': rng.normal(0, 1, rows),
+        'smoker': rng.choice(['yes', 'no'], rows),
+        'region': rng.choice(['north', 'south', 'east', 'west', 'centre'], rows),
+        'flag': rng.integers(0, 2, rows),
+        'id': [f"id{index}" for index in range(rows)],
+    })
+    frame.loc[rng.random(rows) < 0.05, 'income'] = np.nan
+    frame.loc[rng.random(rows) < 0.02, 'region'] = np.nan
+    frame.to_csv(path, index=False)
+
+
+def measure(function):
+    """Run a function and return its result, its wall time and its peak traced memory in MB.
+
+    Tracing slows allocations down a lot, so the time and the memory are measured in two separate runs.
+    """
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--csv', help="CSV file to build the template of; a synthetic file by default")
+    parser.add_argument('--rows', type=int, default=1_000_000, help="rows of the synthetic file")
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    parser.add_argument('--r', action='store_true', help="compare with inferno's metadatatemplate")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as folder:
+        csv_file_path = args.csv
+        if csv_file_path is None:
+            csv_file_path = os.path.join(folder, 'synthetic.csv')
+            synthetic_csv(csv_file_path, args.rows)
+        print(f"file: {csv_file_path} ({os.path.getsize(csv_file_path) / 2**20:.1f} MB)")
+
+        template, stream_time, stream_peak = measure(lambda: build_metadata_template(csv_file_path, chunksize=args.chunksize))
+        _, read_time, read_peak = measure(lambda: pd.read_csv(csv_file_path))
+        print(f"streaming template: {stream_time:8.2f} s  {stream_peak:8.1f} MB peak")
+        print(f"pd.read_csv:        {read_time:8.2f} s  {read_peak:8.1f} MB peak")
+
+        other = build_metadata_template(csv_file_path, chunksize=max(1, args.chunksize // 7 + 1))
+        print("chunk size invariant" if other.equals(template) else "template depends on the chunk size")
+
+        if args.r:
+            from r_integration import inferno_functions
+            reference_path = os.path.join(folder, 'reference.csv')
+            start = time.perf_counter()
+            inferno_functions.build_metadata(csv_file_path, reference_path, streaming=False)
+            print(f"metadatatemplate:   {time.perf_counter() - start:8.2f} s")
+            differences = compare_metadata(template, pd.read_csv(reference_path, dtype=str, keep_default_na=False))
+            if differences.empty:
+                print("same template as metadatatemplate")
+            else:
+                print(f"{len(differences)} field(s) differ from metadatatemplate:")
+                print(differences.to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
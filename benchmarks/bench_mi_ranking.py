@@ -0,0 +1,60 @@
+"""Compare the successive-halving MI ranking with a uniform sweep over the same candidates.
+
+Runs SuccessiveHalvingRanking and then MIRanking on a learnt folder and reports the Monte Carlo samples spent, the
+wall time and whether both agree on the top k. Results already in the result cache are not recomputed, so run it
+on a fresh cache for wall times; the sample counts do not depend on the cache. Without R, use the stub backend:
+
+    python -m benchmarks.bench_mi_ranking --learnt ~/path/to/learnt/folder --target income --top-k 5
+    INFERNO_BACKEND=stub INFERNO_STUB_LATENCY_MS=200 python -m benchmarks.bench_mi_ranking --learnt /tmp/folder --target y
+"""
+import sys
+import time
+import argparse
+from PySide6.QtCore import QCoreApplication, QEventLoop
+from r_integration.mi_ranking import MIRanking, SuccessiveHalvingRanking
+
+
+def run(ranking):
+    """Run a ranking to completion and return the elapsed seconds."""
+    loop = QEventLoop()
+    ranking.finished.connect(loop.quit)
+    ranking.failed.connect(lambda message: (print(f"Error ranking: {message}", file=sys.stderr), loop.quit()))
+    start = time.perf_counter()
+    ranking.start()
+    if ranking.state == "running":
+        loop.exec()
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--learnt', required=True, help="learnt folder to rank the variables of")
+    parser.add_argument('--target', required=True, help="variable to rank the others against")
+    parser.add_argument('--candidates', nargs='*', help="candidate variables, all the others by default")
+    parser.add_argument('--top-k', type=int, default=5)
+    parser.add_argument('--initial-nsamples', type=int, default=400)
+    parser.add_argument('--nsamples', type=int, default=3600, help="samples of the uniform sweep and of the last round")
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args(argv)
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+
+    adaptive = SuccessiveHalvingRanking(args.learnt, args.target, args.candidates, top_k=args.top_k,
+                                        initial_nsamples=args.initial_nsamples, nsamples=args.nsamples, workers=args.workers)
+    adaptive_time = run(adaptive)
+    uniform = MIRanking(args.learnt, args.target, args.candidates, nsamples=args.nsamples, workers=args.workers)
+    uniform_time = run(uniform)
+
+    top_adaptive = [row['variable'] for row in adaptive.ranking()[:args.top_k]]
+    top_uniform = [row['variable'] for row in uniform.ranking()[:args.top_k]]
+    print(f"candidates:        {len(uniform.candidates)}")
+    print(f"uniform sweep:     {uniform.samples_spent:>10} samples  {uniform_time:8.2f} s")
+    print(f"successive halving:{adaptive.samples_spent:>10} samples  {adaptive_time:8.2f} s  ({adaptive.round + 1} rounds)")
+    print(adaptive.summary())
+    print(f"top {args.top_k} uniform:  {', '.join(top_uniform)}")
+    print(f"top {args.top_k} adaptive: {', '.join(top_adaptive)}")
+    print("same top set" if set(top_adaptive) == set(top_uniform) else "top sets differ")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""Benchmark and check of the NumPy Pr engine in r_integration/native_pr.py.
+
+Without arguments, builds a synthetic mixture the size of a default learn run, checks the engine against a
+per-sample reference computation and times plotting-sized queries for several chunk sizes, in memory and from
+the memory-mapped samples file. With --learnt, exports the samples of a real learnt folder through R, validates
+them against inferno's Pr and times both.
+
+    python -m benchmarks.bench_native_pr --components 64 --samples 3600 --points 200
+    python -m benchmarks.bench_native_pr --learnt ~/path/to/learnt/folder
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+from r_integration.native_pr import MixtureSamples, evaluate_pr, export_samples, probe_queries, save_samples, load_samples, source_stamp
+
+
+def synthetic_samples(n_components, n_samples, seed=0):
+    """A mixture over one continuous, one positive continuous and one nominal variable."""
+    rng = np.random.default_rng(seed)
+    variables = {
+        'height': {'name': 'height', 'type': 'R', 'transform': 'identity', 'domainmin': -np.inf, 'domainmax': np.inf,
+                   'tlocation': 170.0, 'tscale': 10.0, 'halfstep': 0.0, 'leftbound': -np.inf, 'rightbound': np.inf, 'options': []},
+        'income': {'name': 'income', 'type': 'R', 'transform': 'log', 'domainmin': 0.0, 'domainmax': np.inf,
+                   'tlocation': 10.0, 'tscale': 1.0, 'halfstep': 0.0, 'leftbound': 0.0, 'rightbound': np.inf, 'options': []},
+        'sex': {'name': 'sex', 'type': 'N', 'transform': 'identity', 'domainmin': np.nan, 'domainmax': np.nan,
+                'tlocation': 0.0, 'tscale': 1.0, 'halfstep': 0.0, 'leftbound': np.nan, 'rightbound': np.nan, 'options': ['female', 'male']}
+    }
+    arrays = {}
+    for name in ('height', 'income'):
+        arrays[f"mean.{name}"] = rng.normal(size=(n_components, n_samples))
+        arrays[f"sd.{name}"] = rng.uniform(0.3, 1.5, size=(n_components, n_samples))
+    arrays['prob.sex'] = rng.dirichlet([1, 1], size=(n_components, n_samples)).transpose(0, 2, 1)
+    weights = rng.dirichlet(np.ones(n_components), size=n_samples).T
+    return MixtureSamples(weights, variables, arrays, validation_error=0.0)
+
+
+def reference_pr(samples, Y, X):
+    """Pr(Y | X) per sample, one sample and one pair of rows at a time."""
+    per_sample = np.empty((len(Y), len(X), samples.n_samples))
+    for s in range(samples.n_samples):
+        one = MixtureSamples(samples.weights[:, [s]], samples.variables,
+                             {name: array[..., [s]] for name, array in samples.arrays.items()})
+        for j in range(len(X)):
+            x_weights = one.weights[:, 0] * np.exp(one.log_likelihood(X.iloc[[j]])[0, :, 0])
+            for i in range(len(Y)):
+                y_prob = np.exp(one.log_likelihood(Y.iloc[[i]])[0, :, 0])
+                per_sample[i, j, s] = (x_weights * y_prob).sum() / x_weights.sum()
+    return per_sample
+
+
+def measure(name, function, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append((time.perf_counter() - start) * 1000)
+    print(f"{name:<48}{np.mean(durations):>12.3f}{np.percentile(durations, 95):>12.3f}")
+
+
+def run_synthetic(args):
+    samples = synthetic_samples(args.components, args.samples)
+
+    Y = pd.DataFrame({'height': [160.0, 175.0, 190.0]})
+    X = pd.DataFrame({'sex': ['female', 'male'], 'income': [20000.0, np.nan]})
+    reference = reference_pr(samples.select(50), Y, X)
+    result = evaluate_pr(samples, Y, X, quantiles=[0.055, 0.945], nsamples=50)
+    error = max(np.abs(result.values - reference.mean(axis=2)).max(),
+                np.abs(result.quantiles - np.moveaxis(np.quantile(reference, [0.055, 0.945], axis=2), 0, -1)).max())
+    print(f"Largest difference from the per-sample reference: {error:.3g}")
+
+    Y = pd.DataFrame({'height': np.linspace(140, 210, args.points)})
+    X = pd.DataFrame({'sex': ['female', 'male']})
+    print(f"{'step':<48}{'mean (ms)':>12}{'p95 (ms)':>12}")
+    for nsamples in (100, args.samples):
+        for chunk_elements in (2 ** 18, 2 ** 22, 2 ** 26):
+            measure(f"Pr {args.points}x2, {nsamples} samples, chunk 2^{int(np.log2(chunk_elements))}",
+                    lambda: evaluate_pr(samples, Y, X, nsamples=nsamples, chunk_elements=chunk_elements), args.repeat)
+
+    # The same samples through the memory-mapped samples file
+    learnt_dir = tempfile.mkdtemp()
+    with open(os.path.join(learnt_dir, 'learnt.rds'), 'wb'):
+        pass
+    samples.source = source_stamp(learnt_dir)
+    save_samples(samples, learnt_dir)
+    measure("open mapped samples file", lambda: load_samples(learnt_dir), args.repeat)
+    mapped = load_samples(learnt_dir)
+    for nsamples in (100, args.samples):
+        measure(f"Pr {args.points}x2, {nsamples} samples, mapped file",
+                lambda: evaluate_pr(mapped, Y, X, nsamples=nsamples), args.repeat)
+    return 0 if error < 1e-9 else 1
+
+
+def run_learnt(args):
+    import r_integration.inferno_functions as inferno_functions
+    samples = export_samples(inferno_functions, args.learnt)
+    print(f"Exported {samples.n_components} components x {samples.n_samples} samples; "
+          f"largest difference from inferno's Pr: {samples.validation_error:.3g}")
+    print(f"{'step':<48}{'mean (ms)':>12}{'p95 (ms)':>12}")
+    for Y, X in probe_queries(samples):
+        label = f"{Y.columns[0]} | {len(X.columns) if X is not None else 0} variables"
+        measure(f"R Pr {label}", lambda: inferno_functions.run_Pr(Y, args.learnt, X), args.repeat)
+        measure(f"NumPy Pr {label}", lambda: evaluate_pr(samples, Y, X, nsamples=100), args.repeat)
+    return 0 if samples.validated else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--learnt', help="learnt folder to export, validate and time against R")
+    parser.add_argument('--components', type=int, default=64)
+    parser.add_argument('--samples', type=int, default=3600)
+    parser.add_argument('--points', type=int, default=200, help="number of Y values of the timed query")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+    return run_learnt(args) if args.learnt else run_synthetic(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""Benchmarks of the Python side of a probability query, run against the stub backend so R is not needed.
+
+Measures the input parsing in prob_functions.py, the executor round trip, the result cache (miss, memory
+hit, disk hit), the result conversions and the plotting functions in plotting.py, and prints one line per
+step with the mean and 95th percentile time.
+
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_prob_pipeline --points 200 --repeat 20
+"""
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+from PySide6.QtWidgets import QApplication, QWidget, QVBoxLayout, QLabel
+from pages.plotting.prob_functions import parse_and_validate_input_values, build_single_category_X
+from pages.plotting.config import reset_configuration, update_configuration
+from pages.plotting.plotting import plot_pr_probabilities, plot_tailpr_probabilities_multi, clear_plot
+from r_integration.backend import StubBackend, CachingBackend
+from r_integration.result_cache import ResultCache
+from r_integration.r_executor import RExecutor
+from r_integration.results import ProbResult
+
+
+class ComboBoxValue:
+    """Just enough of a combobox for the plotting functions."""
+
+    def __init__(self, text):
+        self.text = text
+
+    def currentText(self):
+        return self.text
+
+
+class BenchmarkPage:
+    """The attributes of PlottingPage that prob_functions.py and plotting.py read, without the widgets."""
+
+    def __init__(self, points):
+        self.widget = QWidget()
+        self.plot_layout = QVBoxLayout(self.widget)
+        self.plot_layout.addWidget(QLabel("Plot"))
+        self.plot_canvas = None
+        self.selected_func = "Pr"
+        self.selected_y_values = ['age']
+        self.selected_x_values = ['sex', 'height']
+        self.plot_variable_combobox = ComboBoxValue('age')
+        self.categorical_variable_combobox = ComboBoxValue('sex')
+        self.metadata_dict = {
+            'age': {'type': 'continuous', 'domainmin': 0.0, 'domainmax': 120.0},
+            'sex': {'type': 'nominal', 'options': ['female', 'male']},
+            'height': {'type': 'continuous', 'domainmin': 100.0, 'domainmax': 220.0}
+        }
+        self.variable_values = {
+            'age': {'start': '0', 'end': str(points - 1)},
+            'sex': ['female', 'male'],
+            'height': {'start': '170', 'end': ''}
+        }
+        self.Y = None
+        self.X = None
+        self.probabilities = None
+
+
+def measure(name, function, repeat):
+    """Call function repeat times and print the mean and 95th percentile duration in milliseconds."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append((time.perf_counter() - start) * 1000)
+    durations = np.array(durations)
+    print(f"{name:<40}{durations.mean():>12.3f}{np.percentile(durations, 95):>12.3f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--points', type=int, default=200, help="number of values of the plotted variable")
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    page = BenchmarkPage(args.points)
+    learnt_dir = tempfile.mkdtemp()
+    cache_dir = tempfile.mkdtemp()
+    stub = StubBackend()
+
+    print(f"{'step':<40}{'mean (ms)':>12}{'p95 (ms)':>12}")
+
+    # Input parsing, as run_pr_function does it
+    y_values = {'age': page.variable_values['age']}
+    x_values = {'sex': ['male'], 'height': page.variable_values['height']}
+    measure("parse Y values", lambda: parse_and_validate_input_values(page, y_values), args.repeat)
+    measure("parse X values", lambda: parse_and_validate_input_values(page, x_values), args.repeat)
+    page.Y = parse_and_validate_input_values(page, y_values)
+    page.X = parse_and_validate_input_values(page, {'sex': ['female', 'male'], 'height': page.variable_values['height']})
+    X_frames = [build_single_category_X(page.X.iloc[:1], category, 'sex') for category in ['female', 'male']]
+
+    # Backend call through the executor thread and back
+    executor = RExecutor(backend_factory=lambda: stub)
+    measure("executor round trip (stub Pr)",
+            lambda: executor.submit('run_Pr', page.Y, learnt_dir, page.X).future.result(), args.repeat)
+    executor.shutdown(wait=True)
+
+    # Result cache: every call a miss, then memory and disk hits
+    caching = CachingBackend(stub, ResultCache(cache_dir))
+    counter = iter(range(10 ** 9))
+    measure("cache miss (stub Pr + store)",
+            lambda: caching.run_Pr(page.Y, learnt_dir, page.X, nsamples=next(counter)), args.repeat)
+    caching.run_Pr(page.Y, learnt_dir, page.X)
+    measure("cache memory hit", lambda: caching.run_Pr(page.Y, learnt_dir, page.X), args.repeat)
+    measure("cache disk hit",
+            lambda: CachingBackend(stub, ResultCache(cache_dir)).run_Pr(page.Y, learnt_dir, page.X), args.repeat)
+
+    # Result conversions
+    result = stub.run_Pr(page.Y, learnt_dir, page.X)
+    measure("ProbResult to_arrays/from_arrays", lambda: ProbResult.from_arrays(result.to_arrays()), args.repeat)
+    batch_result = stub.run_tailPr(page.Y, learnt_dir, True, True, pd.concat(X_frames, ignore_index=True))
+    measure("ProbResult split_x", lambda: batch_result.split_x([len(X) for X in X_frames]), args.repeat)
+
+    # Plotting, including the configuration update done before every plot
+    def configure():
+        reset_configuration(page)
+        update_configuration(page)
+
+    measure("configuration reset and update", configure, args.repeat)
+    configure()
+    page.probabilities = result
+    measure("first plot (imports matplotlib/scipy)", lambda: plot_pr_probabilities(page), 1)
+    measure("plot_pr_probabilities", lambda: plot_pr_probabilities(page), args.repeat)
+    page.selected_func = "tailPr"
+    page.variable_values['age'] = {'inequality': '<=', 'value': '50'}
+    page.X = X_frames[0]
+    page.probabilities = batch_result.split_x([len(X) for X in X_frames])
+    measure("plot_tailpr_probabilities_multi", lambda: plot_tailpr_probabilities_multi(page, ['female', 'male']), args.repeat)
+    clear_plot(page)
+    app.processEvents()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""Load test of the inference server's micro-batching against a stub backend, without R.
+
+Starts the server on a free port with a backend that returns deterministic probabilities after a fixed
+latency, sends concurrent Pr and tailPr requests from many clients and checks that every caller got exactly
+its own rows back. Prints the server metrics; exits with status 1 on any mismatch.
+
+    python -m benchmarks.server_harness --clients 32 --requests 8 --latency-ms 200
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from r_integration.backend import StubBackend, stub_probabilities
+from r_integration.server import InferenceServer, MicroBatcher
+
+
+def post(url, body):
+    request = urllib.request.Request(url, data=json.dumps(body).encode(), headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=60) as response:
+        return json.loads(response.read())
+
+
+def make_query(rng, client):
+    """A query like the Plotting page sends: a grid over one variable, conditioned on a few X rows."""
+    low = int(rng.integers(0, 50))
+    query = {
+        'learnt': 'stub',
+        'Y': {'age': list(range(low, low + int(rng.integers(5, 30))))},
+        'X': {'height': rng.integers(150, 200, size=int(rng.integers(1, 4))).tolist()},
+        'quantiles': [0.055, 0.945],
+        'nsamples': 100
+    }
+    if client % 2:
+        query['lower_tail'] = False
+    return query
+
+
+def check(query, response, path):
+    Y = pd.DataFrame(query['Y'])
+    X = pd.DataFrame(query['X'])
+    if path == '/tailpr':
+        expected = StubBackend().run_tailPr(Y, 'stub', True, query.get('lower_tail', True), X, query['quantiles'])
+    else:
+        expected = stub_probabilities(Y, X, query['quantiles'])
+    return np.allclose(np.array(response['values']), expected.values) and np.allclose(np.array(response['quantiles']), expected.quantiles)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=8, help="requests per client")
+    parser.add_argument('--latency-ms', type=float, default=200, help="latency of one backend call")
+    parser.add_argument('--window-ms', type=float, default=20)
+    args = parser.parse_args(argv)
+
+    learnt_root = tempfile.mkdtemp()
+    os.makedirs(os.path.join(learnt_root, 'stub'))
+    backend = StubBackend(args.latency_ms / 1000)
+    server = InferenceServer(('127.0.0.1', 0), MicroBatcher(lambda: backend, args.window_ms / 1000), learnt_root)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    def client(index):
+        rng = np.random.default_rng(index)
+        mismatches = 0
+        for _ in range(args.requests):
+            path = '/tailpr' if index % 2 else '/pr'
+            query = make_query(rng, index)
+            if not check(query, post(base_url + path, query), path):
+                mismatches += 1
+        return mismatches
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(args.clients) as pool:
+        mismatches = sum(pool.map(client, range(args.clients)))
+    elapsed = time.monotonic() - start
+
+    with urllib.request.urlopen(base_url + '/metrics') as response:
+        metrics = json.loads(response.read())
+    server.shutdown()
+    server.batcher.shutdown()
+
+    total = args.clients * args.requests
+    print(json.dumps(metrics, indent=4))
+    print(f"{total} requests in {elapsed:.2f}s with {backend.calls} backend calls "
+          f"(one call per request would take at least {total * args.latency_ms / 1000:.2f}s)")
+    print(f"Mismatched responses: {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
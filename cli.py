@@ -0,0 +1,216 @@
+"""Headless command-line interface to the Inferno App computations.
+
+Runs metadata building, learn, Pr, tailPr and mutualinfo without loading PySide6, through the backend
+selected by INFERNO_BACKEND (see r_integration.backend), for example:
+
+    python cli.py metadata data.csv -o metadata.csv
+    python cli.py learn --data data.csv --metadata metadata.csv --output learnt/data
+    python cli.py pr --learnt learnt/data --query query.json -o probabilities.npz
+    python cli.py tailpr --learnt learnt/data --Y Y.csv --X X.csv --upper-tail -o tail.csv
+    python cli.py mutualinfo --learnt learnt/data --y1 age --y2 sex -o mi.json
+"""
+import os
+import sys
+import json
+import argparse
+import numpy as np
+import pandas as pd
+from r_integration.resources import configure_thread_env
+from r_integration.backend import load_backend
+
+
+def load_frame(value):
+    """Build a DataFrame from a CSV path, a JSON path or an inline JSON object/list of records."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        if value.lower().endswith('.csv'):
+            return pd.read_csv(value)
+        with open(value, 'r') as f:
+            value = json.load(f)
+    return pd.DataFrame(value)
+
+
+def load_query(args):
+    """Read the Y and X frames and the optional settings of a Pr or tailPr query."""
+    query = {}
+    if args.query:
+        with open(args.query, 'r') as f:
+            query = json.load(f)
+    Y = load_frame(args.Y if args.Y is not None else query.get('Y'))
+    X = load_frame(args.X if args.X is not None else query.get('X'))
+    if Y is None or Y.empty:
+        raise ValueError("The query has no Y values. Pass --Y or a query file with a 'Y' entry.")
+    quantiles = args.quantiles if args.quantiles is not None else query.get('quantiles', [0.055, 0.945])
+    nsamples = args.nsamples if args.nsamples is not None else query.get('nsamples', 100)
+    return Y, X, quantiles, nsamples
+
+
+def result_table(result, Y, X):
+    """Flatten a ProbResult to one row per (Y row, X row) pair with the probability and its quantiles."""
+    n_x = result.n_x
+    rows = pd.DataFrame(np.repeat(Y.to_numpy(dtype=object), n_x, axis=0), columns=Y.columns)
+    if X is not None and not X.empty:
+        x_rows = pd.DataFrame(np.tile(X.to_numpy(dtype=object), (result.n_y, 1)), columns=X.columns)
+        rows = pd.concat([rows, x_rows], axis=1)
+    rows = rows.infer_objects()
+    rows['probability'] = result.values.reshape(-1)
+    quantiles = result.quantiles.reshape(-1, len(result.quantile_levels))
+    for index, level in enumerate(result.quantile_levels):
+        rows[f"q{level:g}"] = quantiles[:, index]
+    return rows
+
+
+def write_result(result, Y, X, output):
+    """Write a ProbResult as CSV or NPZ, chosen by the file extension."""
+    extension = os.path.splitext(output)[1].lower()
+    if extension == '.npz':
+        np.savez(output, **result.to_arrays())
+    elif extension == '.csv':
+        result_table(result, Y, X).to_csv(output, index=False)
+    else:
+        raise ValueError(f"Unsupported output format '{extension}'. Use .csv or .npz.")
+
+
+def write_mutualinfo(result, output):
+    """Write a mutualinfo result as JSON or NPZ."""
+    extension = os.path.splitext(output)[1].lower()
+    if extension == '.npz':
+        flat = {}
+        def flatten(prefix, value):
+            if isinstance(value, dict):
+                for name, item in value.items():
+                    flatten(f"{prefix}{name}.", item)
+            else:
+                flat[prefix.rstrip('.')] = np.asarray(value)
+        flatten('', result)
+        np.savez(output, **flat)
+    elif extension == '.json':
+        with open(output, 'w') as f:
+            json.dump(result, f, indent=4, default=lambda value: np.asarray(value).tolist())
+    else:
+        raise ValueError(f"Unsupported output format '{extension}'. Use .json or .npz.")
+
+
+def run_metadata(args):
+    backend = load_backend()
+    backend.build_metadata(args.data, args.output, includevrt=args.include, excludevrt=args.exclude,
+                           streaming=args.streaming)
+    if args.streaming or getattr(backend, 'streams_metadata', False):
+        print("Metadata built by the streaming generator, not inferno's metadatatemplate: check the variable types")
+    print(f"Metadata written to {args.output}")
+
+
+def run_learn(args):
+    backend = load_backend()
+    backend.run_learn(
+        metadatafile=args.metadata,
+        datafile=args.data,
+        outputdir=args.output,
+        nsamples=args.nsamples,
+        nchains=args.nchains,
+        maxhours=args.maxhours,
+        seed=args.seed,
+        parallel=args.parallel
+    )
+    print(f"Learnt folder written to {args.output}")
+
+
+def run_pr(args):
+    backend = load_backend()
+    Y, X, quantiles, nsamples = load_query(args)
+    result = backend.run_Pr(Y, args.learnt, X, quantiles=quantiles, nsamples=nsamples)
+    if result is None:
+        raise RuntimeError("Pr returned no result.")
+    write_result(result, Y, X, args.output)
+    print(f"Probabilities written to {args.output}")
+
+
+def run_tailpr(args):
+    backend = load_backend()
+    Y, X, quantiles, nsamples = load_query(args)
+    result = backend.run_tailPr(Y, args.learnt, args.eq, not args.upper_tail, X, quantiles=quantiles, nsamples=nsamples)
+    if result is None:
+        raise RuntimeError("tailPr returned no result.")
+    write_result(result, Y, X, args.output)
+    print(f"Tail probabilities written to {args.output}")
+
+
+def run_mutualinfo(args):
+    backend = load_backend()
+    result = backend.run_mutualinfo(args.y1, args.learnt, additional_predictor=args.y2, predictand=load_frame(args.X),
+                                     nsamples=args.nsamples, unit=args.unit)
+    write_mutualinfo(result, args.output)
+    print(f"Mutual information written to {args.output}")
+
+
+def add_query_arguments(parser):
+    parser.add_argument('--learnt', required=True, help="learnt folder produced by learn")
+    parser.add_argument('--query', help="JSON file with 'Y', 'X', 'quantiles' and 'nsamples' entries")
+    parser.add_argument('--Y', help="CSV or JSON file with the Y values (overrides the query file)")
+    parser.add_argument('--X', help="CSV or JSON file with the X values (overrides the query file)")
+    parser.add_argument('--quantiles', type=float, nargs='+', help="quantile levels of the uncertainty (default 0.055 0.945)")
+    parser.add_argument('--nsamples', type=int, help="number of Monte Carlo samples (default 100)")
+    parser.add_argument('-o', '--output', required=True, help="output file: .csv or .npz")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='cli.py', description="Run Inferno App computations without the GUI.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    metadata = subparsers.add_parser('metadata', help="build a metadata template for a CSV file")
+    metadata.add_argument('data', help="CSV data file")
+    metadata.add_argument('-o', '--output', required=True, help="metadata CSV file to write")
+    metadata.add_argument('--include', nargs='+', help="variables to include")
+    metadata.add_argument('--exclude', nargs='+', help="variables to exclude")
+    metadata.add_argument('--streaming', action='store_true',
+                          help="read the file in chunks instead of loading it into R; the types approximate metadatatemplate's")
+    metadata.set_defaults(func=run_metadata)
+
+    learn = subparsers.add_parser('learn', help="run the Monte Carlo computation")
+    learn.add_argument('--data', required=True, help="CSV data file")
+    learn.add_argument('--metadata', required=True, help="metadata CSV file")
+    learn.add_argument('--output', required=True, help="learnt folder to write")
+    learn.add_argument('--nsamples', type=int, default=3600)
+    learn.add_argument('--nchains', type=int, default=60)
+    learn.add_argument('--maxhours', type=float, default=float('inf'))
+    learn.add_argument('--seed', type=int, default=None)
+    learn.add_argument('--parallel', default="True", help="number of workers, or True to use all usable cores")
+    learn.set_defaults(func=run_learn)
+
+    pr = subparsers.add_parser('pr', help="compute Pr(Y | X)")
+    add_query_arguments(pr)
+    pr.set_defaults(func=run_pr)
+
+    tailpr = subparsers.add_parser('tailpr', help="compute tail probabilities Pr(Y <= y | X)")
+    add_query_arguments(tailpr)
+    tailpr.add_argument('--upper-tail', action='store_true', help="compute Pr(Y >= y | X) instead")
+    tailpr.add_argument('--strict', dest='eq', action='store_false', help="exclude equality, Pr(Y < y | X)")
+    tailpr.set_defaults(func=run_tailpr)
+
+    mutualinfo = subparsers.add_parser('mutualinfo', help="compute the mutual information between variables")
+    mutualinfo.add_argument('--learnt', required=True, help="learnt folder produced by learn")
+    mutualinfo.add_argument('--y1', nargs='+', required=True, help="first group of variables")
+    mutualinfo.add_argument('--y2', nargs='+', help="second group of variables")
+    mutualinfo.add_argument('--X', help="CSV or JSON file with conditioning values")
+    mutualinfo.add_argument('--nsamples', type=int, default=3600)
+    mutualinfo.add_argument('--unit', default="Sh", help="unit of the result: Sh, Hart or nat")
+    mutualinfo.add_argument('-o', '--output', required=True, help="output file: .json or .npz")
+    mutualinfo.set_defaults(func=run_mutualinfo)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    configure_thread_env()
+    try:
+        args.func(args)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
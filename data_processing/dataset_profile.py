@@ -0,0 +1,317 @@
+"""Profiles of uploaded CSV files, computed in one chunked pass and stored by content hash.
+
+A profile holds the number of rows and, per column, its dtype, missing count, range, number of distinct values,
+most frequent values and a histogram of numeric values. Profiles are JSON files under APP_DIR/cache/profiles named
+by the SHA-256 of the file content, so renaming or uploading the same file again reuses the profile and it is only
+computed again when the content changes. The hash of each file is stored with its size and modification time in
+index.json next to the profiles, so files are only hashed again when they change. They also hold what a metadata template needs, so the template of a
+profiled file is built without reading the file again.
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+from appdirs import user_data_dir
+from data_processing.metadata_template import (ColumnStats, DEFAULT_CHUNK_ROWS, scan_columns, select_columns,
+                                               metadata_frame, build_metadata_template)
+
+
+APP_DIR = user_data_dir("Inferno App", "inferno")
+PROFILE_FOLDER = os.path.join(APP_DIR, 'cache', 'profiles')
+
+PROFILE_FORMAT_VERSION = 1  # bump when the layout of stored profiles changes
+HISTOGRAM_BINS = 20
+STREAMING_BINS = 16 * HISTOGRAM_BINS  # finer bins kept while streaming, merged into HISTOGRAM_BINS at the end
+TOP_VALUES = 20
+HASH_BLOCK_BYTES = 1024 ** 2
+INDEX_FILE_NAME = 'index.json'
+
+
+class StreamingHistogram:
+    """Histogram with a fixed even number of equal bins over a range that doubles whenever values fall outside it."""
+
+    def __init__(self, bins=STREAMING_BINS):
+        self.bins = bins
+        self.start = None
+        self.width = None
+        self.counts = np.zeros(bins, dtype=np.int64)
+
+    def add(self, numbers, weights):
+        if numbers.size == 0:
+            return
+        low, high = float(numbers.min()), float(numbers.max())
+        if self.start is None:
+            self.start = low
+            self.width = (high - low) / self.bins or 1.0
+        while low < self.start:
+            self._double(left=True)
+        while high > self.start + self.width * self.bins:
+            self._double(left=False)
+        index = np.minimum(((numbers - self.start) // self.width).astype(np.int64), self.bins - 1)
+        self.counts += np.bincount(index, weights=weights, minlength=self.bins).astype(np.int64)
+
+    def _double(self, left):
+        """Merge pairs of bins, extending the range to the left or to the right."""
+        merged = self.counts.reshape(-1, 2).sum(axis=1)
+        self.counts = np.zeros(self.bins, dtype=np.int64)
+        if left:
+            self.counts[self.bins // 2:] = merged
+            self.start -= self.width * self.bins
+        else:
+            self.counts[:self.bins // 2] = merged
+        self.width *= 2
+
+    def to_dict(self, bins=HISTOGRAM_BINS):
+        """Return the edges and counts of at most `bins` bins, merged from the bins between the first and last filled ones."""
+        filled = np.flatnonzero(self.counts)
+        if not filled.size:
+            return None
+        first, last = filled[0], filled[-1] + 1
+        group = -(-(last - first) // bins)
+        counts = np.add.reduceat(self.counts[first:last], np.arange(0, last - first, group))
+        edges = self.start + self.width * np.append(np.arange(first, last, group), last)
+        return {'edges': edges.tolist(), 'counts': counts.tolist()}
+
+
+class ColumnProfile(ColumnStats):
+    """Column statistics that also keep a histogram of the numeric values."""
+
+    def __init__(self, name):
+        super().__init__(name, histogram=StreamingHistogram())
+
+    def dtype(self):
+        if self.count == 0:
+            return 'empty'
+        if self.numeric:
+            return 'integer' if self.integer else 'float'
+        return 'string'
+
+    def top_values(self):
+        """Most frequent values with their counts, or None once there are too many to count."""
+        if self.overflow:
+            return None
+        ranked = sorted(self.values.items(), key=lambda item: (-item[1], item[0]))
+        return [[value, count] for value, count in ranked[:TOP_VALUES]]
+
+    def histogram_dict(self):
+        """Histogram of the numeric values: exact while the distinct values are known, streamed beyond."""
+        if not self.numeric or self.count == 0:
+            return None
+        if self.overflow:
+            return self.histogram.to_dict()
+        numbers = pd.to_numeric(pd.Series(list(self.values), dtype=object)).to_numpy(dtype=np.float64)
+        weights = np.fromiter(self.values.values(), dtype=np.int64, count=len(self.values))
+        finite = np.isfinite(numbers)
+        if not finite.any():
+            return None
+        numbers, weights = numbers[finite], weights[finite]
+        bins = min(HISTOGRAM_BINS, len(np.unique(numbers)))
+        counts, edges = np.histogram(numbers, bins=bins, range=(numbers.min(), numbers.max()), weights=weights)
+        return {'edges': edges.tolist(), 'counts': counts.astype(np.int64).tolist()}
+
+    def to_dict(self):
+        profile = self.summary()
+        profile.update(dtype=self.dtype(), options=self.options(), top_values=self.top_values(),
+                       histogram=self.histogram_dict())
+        return profile
+
+
+def file_hash(path):
+    """SHA-256 of the content of a file."""
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b''):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def compute_profile(csv_file_path, chunksize=DEFAULT_CHUNK_ROWS):
+    """Profile every column of a CSV file in one chunked pass."""
+    start = time.perf_counter()
+    columns = scan_columns(csv_file_path, chunksize=chunksize, stats_class=ColumnProfile)
+    return {
+        'version': PROFILE_FORMAT_VERSION,
+        'file_name': os.path.basename(csv_file_path),
+        'size': os.path.getsize(csv_file_path),
+        'rows': columns[0].count + columns[0].missing if columns else 0,
+        'columns': [column.to_dict() for column in columns],
+        'seconds': time.perf_counter() - start
+    }
+
+
+def column_names(profile):
+    return [column['name'] for column in profile['columns']]
+
+
+def metadata_from_profile(profile, output_file_name=None, includevrt=None, excludevrt=None):
+    """Build the metadata template of a profiled file, as build_metadata_template would from the file itself."""
+    columns = {column['name']: column for column in profile['columns']}
+    names = select_columns(list(columns), includevrt, excludevrt)
+    return metadata_frame([(columns[name], columns[name]['options']) for name in names], output_file_name)
+
+
+def format_profile(profile):
+    """One-line description of a profile for the pages."""
+    columns = profile['columns']
+    numeric = sum(column['dtype'] in ('integer', 'float') for column in columns)
+    with_missing = sum(column['missing'] > 0 for column in columns)
+    text = f"{profile['rows']:,} rows, {len(columns)} columns ({numeric} numeric, {len(columns) - numeric} other)"
+    if with_missing:
+        text += f", {with_missing} with missing values"
+    return text
+
+
+class ProfileCache:
+    """Stored dataset profiles, with the content hash of each file remembered by size and modification time."""
+
+    def __init__(self, folder=PROFILE_FOLDER):
+        self.folder = folder
+        self._profiles = {}  # content hash -> profile
+        self._lock = threading.Lock()
+        os.makedirs(self.folder, exist_ok=True)
+        self._hashes = self._load_index()  # absolute path -> (size, modification time, content hash)
+
+    def content_hash(self, csv_file_path, compute=True):
+        """SHA-256 of a file, only read again when its size or modification time changes.
+
+        Without compute, None is returned instead of reading a file whose hash is not known.
+        """
+        path = os.path.abspath(csv_file_path)
+        stat = os.stat(path)
+        with self._lock:
+            entry = self._hashes.get(path)
+        if entry is not None and entry[:2] == (stat.st_size, stat.st_mtime_ns):
+            return entry[2]
+        if not compute:
+            return None
+        digest = file_hash(path)
+        with self._lock:
+            self._hashes[path] = (stat.st_size, stat.st_mtime_ns, digest)
+        self._save_index()
+        return digest
+
+    def get(self, csv_file_path, compute_hash=True):
+        """Return the stored profile of the current content of a file, or None if it has not been profiled.
+
+        Without compute_hash, None is also returned when the file would have to be hashed first.
+        """
+        try:
+            key = self.content_hash(csv_file_path, compute=compute_hash)
+        except OSError:
+            return None
+        if key is None:
+            return None
+        with self._lock:
+            profile = self._profiles.get(key)
+        if profile is not None:
+            return profile
+        try:
+            with open(self._path(key)) as f:
+                profile = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if profile.get('version') != PROFILE_FORMAT_VERSION:
+            return None
+        with self._lock:
+            self._profiles[key] = profile
+        return profile
+
+    def profile(self, csv_file_path, chunksize=DEFAULT_CHUNK_ROWS):
+        """Return the profile of a file, computing and storing it if its content has not been profiled."""
+        profile = self.get(csv_file_path)
+        if profile is not None:
+            return profile
+        key = self.content_hash(csv_file_path)
+        profile = compute_profile(csv_file_path, chunksize)
+        profile['hash'] = key
+        with self._lock:
+            self._profiles[key] = profile
+
+        path = self._path(key)
+        try:
+            self._write_json(path, profile)
+        except OSError as e:
+            print(f"Error writing dataset profile: {e}")
+        return profile
+
+    def forget(self, csv_file_path):
+        """Drop the remembered hash of a file that was renamed or deleted."""
+        with self._lock:
+            self._hashes.pop(os.path.abspath(csv_file_path), None)
+        self._save_index()
+
+    def prune(self, csv_file_paths):
+        """Delete the stored profiles that do not match the content of any of the given files."""
+        keep = set()
+        for path in csv_file_paths:
+            try:
+                keep.add(self.content_hash(path))
+            except OSError:
+                pass
+        with self._lock:
+            self._hashes = {path: entry for path, entry in self._hashes.items() if entry[2] in keep}
+            self._profiles = {key: profile for key, profile in self._profiles.items() if key in keep}
+        self._save_index()
+        for name in os.listdir(self.folder):
+            if name.endswith('.json') and name != INDEX_FILE_NAME and name[:-len('.json')] not in keep:
+                try:
+                    os.remove(os.path.join(self.folder, name))
+                except OSError:
+                    pass
+
+    def _path(self, key):
+        return os.path.join(self.folder, f"{key}.json")
+
+    def _load_index(self):
+        try:
+            with open(os.path.join(self.folder, INDEX_FILE_NAME)) as f:
+                index = json.load(f)
+            if index.get('version') != PROFILE_FORMAT_VERSION:
+                return {}
+            return {path: tuple(entry) for path, entry in index['files'].items()}
+        except (OSError, ValueError, KeyError, AttributeError):
+            return {}
+
+    def _save_index(self):
+        """Store the known hashes, so files are not hashed again after the app restarts."""
+        with self._lock:
+            index = {'version': PROFILE_FORMAT_VERSION, 'files': {path: list(entry) for path, entry in self._hashes.items()}}
+            try:
+                self._write_json(os.path.join(self.folder, INDEX_FILE_NAME), index)
+            except OSError as e:
+                print(f"Error writing dataset profile index: {e}")
+
+    def _write_json(self, path, data):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"  # unique across processes sharing the folder
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+
+dataset_profiles = ProfileCache()
+
+
+def cached_metadata_template(csv_file_path, output_file_name=None, includevrt=None, excludevrt=None):
+    """Build the metadata template of a file from its stored profile, or by reading the file if it has none."""
+    profile = dataset_profiles.get(csv_file_path)
+    if profile is None:
+        return build_metadata_template(csv_file_path, output_file_name, includevrt=includevrt, excludevrt=excludevrt)
+    return metadata_from_profile(profile, output_file_name, includevrt, excludevrt)
+
+
+def main(argv):
+    """Print the profile of CSV files as JSON: dataset_profile.py data.csv ..."""
+    if not argv:
+        print(main.__doc__, file=sys.stderr)
+        return 2
+    for path in argv:
+        print(json.dumps(dataset_profiles.profile(path), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,180 @@
+"""Typed columnar copies of uploaded CSV files, written next to them so the text is parsed only once.
+
+The sidecar of data.csv is data.csv.cols, in the columnar format of r_integration.sample_store: each column can be
+mapped and read on its own. Numeric columns are stored as int64 or float64 arrays, boolean columns as int8 codes and
+text columns as int32 codes into an array of their distinct values. The types are the ones pd.read_csv gives the
+file, and files where those depend on how pandas splits it get no sidecar, so read_dataset returns the same
+DataFrame as pd.read_csv, from the sidecar when it is current and from the CSV file otherwise. Callers do not need
+to know whether a sidecar exists. Learn still reads the CSV file itself.
+"""
+import os
+import numpy as np
+import pandas as pd
+from r_integration.sample_store import write_columns, open_columns
+from data_processing.metadata_template import DEFAULT_CHUNK_ROWS
+
+
+SIDECAR_SUFFIX = '.cols'
+SIDECAR_FORMAT_VERSION = 2  # bump when the layout of sidecars changes
+TRUE_VALUES = ('True', 'TRUE', 'true')  # read as booleans by pd.read_csv
+FALSE_VALUES = ('False', 'FALSE', 'false')
+
+
+def sidecar_path(csv_file_path):
+    return csv_file_path + SIDECAR_SUFFIX
+
+
+def source_stamp(csv_file_path):
+    """Modification time and size of a CSV file, to tell whether its sidecar is still current."""
+    stat = os.stat(csv_file_path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def chunk_kind(values):
+    """Kind of a column in one chunk as parsed by pd.read_csv, or None when the chunk holds only missing values."""
+    if values.isna().all():
+        return None
+    if values.dtype.kind == 'b':
+        return 'boolean'
+    if values.dtype.kind in 'if':
+        return 'number'
+    if values.dtype.kind in 'uMm':
+        return 'other'
+    # With missing values, pandas returns booleans as objects
+    if all(isinstance(value, (bool, np.bool_)) for value in values.dropna().unique()):
+        return 'boolean'
+    return 'text'
+
+
+def ambiguous_levels(levels):
+    """True when some text values would be parsed as numbers or booleans in a part of the file holding only them.
+
+    pd.read_csv parses a large file in blocks of its own and infers each block's type, so the type of such a column
+    depends on where pandas splits the file and the sidecar cannot reproduce it.
+    """
+    return bool(pd.to_numeric(pd.Series(levels, dtype=object), errors='coerce').notna().any() or
+                set(levels) & set(TRUE_VALUES + FALSE_VALUES))
+
+
+def write_sidecar(csv_file_path, chunksize=DEFAULT_CHUNK_ROWS):
+    """Write the sidecar of a CSV file and return its path, or None when pd.read_csv cannot be reproduced from it.
+
+    Column types are the ones pd.read_csv gives each chunk: int64 only if every chunk parsed as integers, text only
+    if no value of the column parses as a number or a boolean. A column whose chunks parse to different kinds comes
+    back from pd.read_csv as a mix of objects, so such files get no sidecar and are read from the CSV file.
+    """
+    stamp = source_stamp(csv_file_path)
+    names = pd.read_csv(csv_file_path, nrows=0).columns.tolist()
+    parts = {name: [] for name in names}  # (kind, array), or (None, length) for chunks without values
+    levels = {name: {} for name in names}
+    rows = 0
+    for chunk in pd.read_csv(csv_file_path, chunksize=chunksize):
+        rows += len(chunk)
+        for name in names:
+            values = chunk[name]
+            kind = chunk_kind(values)
+            if kind is None:
+                parts[name].append((None, len(values)))
+            elif kind == 'text':
+                codes, uniques = pd.factorize(values)
+                table = levels[name]
+                mapping = np.array([table.setdefault(value, len(table)) for value in uniques], dtype=np.int32)
+                parts[name].append((kind, np.where(codes >= 0, mapping[np.maximum(codes, 0)] if mapping.size else -1, -1).astype(np.int32)))
+            elif kind == 'boolean':
+                missing = values.isna().to_numpy()
+                parts[name].append((kind, np.where(missing, -1, values.eq(True).to_numpy()).astype(np.int8)))
+            else:
+                parts[name].append((kind, values.to_numpy()))
+
+    if rows == 0:
+        return None  # pd.read_csv gives the columns of an empty file no type to store
+
+    columns, kinds = {}, []
+    for name in names:
+        found = {kind for kind, _ in parts[name] if kind is not None}
+        kind = found.pop() if len(found) == 1 else 'number' if not found else None
+        if kind in (None, 'other') or (kind == 'text' and ambiguous_levels(list(levels[name]))):
+            return None
+
+        if kind == 'text':
+            missing = np.int32(-1)
+            columns[f"levels:{name}"] = np.array(list(levels[name]), dtype=str)
+        elif kind == 'boolean':
+            missing = np.int8(-1)
+        else:
+            integer = all(part_kind == 'number' and part.dtype.kind == 'i' for part_kind, part in parts[name])
+            missing = np.int64(0) if integer else np.float64(np.nan)
+        arrays = [np.full(part, missing) if part_kind is None else part for part_kind, part in parts[name]]
+        values = np.concatenate(arrays).astype(missing.dtype) if arrays else np.empty(0, dtype=missing.dtype)
+        columns[f"{'codes' if kind == 'text' else 'values'}:{name}"] = values
+        kinds.append([name, kind])
+
+    metadata = {'version': SIDECAR_FORMAT_VERSION, 'source': stamp, 'rows': rows, 'columns': kinds}
+    write_columns(sidecar_path(csv_file_path), columns, metadata)
+    return sidecar_path(csv_file_path)
+
+
+def open_sidecar(csv_file_path):
+    """Map the sidecar of a CSV file, or return None when there is none or the file has changed since."""
+    try:
+        metadata, columns = open_columns(sidecar_path(csv_file_path))
+        if metadata['version'] != SIDECAR_FORMAT_VERSION or metadata['source'] != source_stamp(csv_file_path):
+            return None
+    except (OSError, ValueError, KeyError):
+        return None
+    return metadata, columns
+
+
+def remove_sidecar(csv_file_path):
+    """Delete the sidecar of a CSV file; one that cannot be deleted is left, as it no longer matches any file."""
+    try:
+        os.remove(sidecar_path(csv_file_path))
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"Error removing dataset sidecar: {e}")
+
+
+def rename_sidecar(old_path, new_path):
+    """Move a sidecar along with its CSV file; os.rename keeps the modification time, so it stays current."""
+    if os.path.exists(sidecar_path(old_path)):
+        os.replace(sidecar_path(old_path), sidecar_path(new_path))
+
+
+def dataset_columns(csv_file_path):
+    """Column names of a CSV file, in file order."""
+    sidecar = open_sidecar(csv_file_path)
+    if sidecar is None:
+        return pd.read_csv(csv_file_path, nrows=0).columns.tolist()
+    return [name for name, _ in sidecar[0]['columns']]
+
+
+def read_dataset(csv_file_path, columns=None, nrows=None):
+    """Read the given columns, or all, of the first nrows rows, or all, of a CSV file, as pd.read_csv would.
+
+    Columns are returned in file order. Only the mapped pages of the requested columns are read from the sidecar.
+    """
+    sidecar = open_sidecar(csv_file_path)
+    if sidecar is None:
+        return pd.read_csv(csv_file_path, usecols=columns, nrows=nrows)
+    metadata, arrays = sidecar
+    if columns is not None:
+        unknown = set(columns) - {name for name, _ in metadata['columns']}
+        if unknown:
+            raise ValueError(f"Columns not in {os.path.basename(csv_file_path)}: {', '.join(sorted(unknown))}")
+
+    rows = slice(0, nrows)
+    data = {}
+    for name, kind in metadata['columns']:
+        if columns is not None and name not in columns:
+            continue
+        if kind == 'number':
+            data[name] = np.array(arrays[f"values:{name}"][rows])
+        elif kind == 'boolean':
+            codes = arrays[f"values:{name}"][rows]
+            missing = codes < 0
+            data[name] = codes.astype(bool) if not missing.any() else np.where(missing, np.nan, codes.astype(bool).astype(object))
+        else:
+            codes = arrays[f"codes:{name}"][rows]
+            data[name] = pd.Categorical.from_codes(codes, categories=arrays[f"levels:{name}"]).astype(object)
+    return pd.DataFrame(data, columns=[name for name in data])
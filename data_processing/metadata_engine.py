@@ -0,0 +1,200 @@
+import sys
+import numpy as np
+import pandas as pd
+
+
+TYPES = ["nominal", "ordinal", "continuous"]
+CONTINUOUS_COLUMNS = ["datastep", "domainmin", "domainmax", "minincluded", "maxincluded"]
+BOOLEAN_VALUES = ['', 'true', 'false', 'True', 'False', 'TRUE', 'FALSE']  # Acceptable values for 'minincluded' and 'maxincluded'
+CONTINUOUS_DEFAULTS = {"domainmin": float("-Inf"), "domainmax": float("+Inf"), "datastep": 1.0, "minincluded": "False", "maxincluded": "False"}
+REPORT_COLUMNS = ["row", "name", "rule", "message"]
+
+RULE_MESSAGES = {
+    'type': "Variables must have type 'nominal', 'ordinal' or 'continuous'.",
+    'nominal': "'Nominal' type requires at least 2 'V' columns with values.",
+    'continuous': "Variables with type 'Continuous' requires values in all fields except the 'V' columns.",
+    'included': "'minincluded' and 'maxincluded' must be empty, 'False' or 'TRUE'.",
+    'ordinal': "Variables with type 'Ordinal' requires values in either the 'V' columns or the other fields, but not both.",
+    'values': "The data has values that are not listed in the 'V' columns."
+}
+
+
+def v_columns(column_names):
+    return [name for name in column_names if str(name).startswith("V")]
+
+
+def normalize_metadata(metadata_df):
+    """Fill the empty domain fields of continuous variables, and of ordinal variables without 'V' values, with defaults."""
+    v_names = v_columns(metadata_df.columns)
+    v_values = metadata_df[v_names]
+    empty_v = (v_values.isna() | (v_values == "")).all(axis=1)
+    rows = (metadata_df["type"] == "continuous") | ((metadata_df["type"] == "ordinal") & empty_v)
+    for column, value in CONTINUOUS_DEFAULTS.items():
+        if column not in metadata_df.columns:
+            metadata_df[column] = pd.Series(index=metadata_df.index, dtype=object)
+        empty = rows & metadata_df[column].isna()
+        if empty.any():
+            metadata_df[column] = metadata_df[column].astype(object)
+            metadata_df.loc[empty, column] = value
+    return metadata_df
+
+
+def as_columns(metadata_df):
+    """Return the cells of a metadata DataFrame as strings, one list per column, empty for missing values."""
+    return {name: ['' if pd.isna(value) else str(value) for value in metadata_df[name].tolist()] for name in metadata_df.columns}
+
+
+def _take(columns, name, rows, n_rows):
+    """Stripped values of a column at the given rows, as an array of strings; empty if there is no such column."""
+    values = columns.get(name)
+    if values is None:
+        return np.full(n_rows if rows is None else len(rows), '', dtype=object)
+    if rows is not None:
+        values = [values[row] for row in rows]
+    return np.char.strip(np.asarray(values, dtype=str))
+
+
+def validate_metadata(columns, rows=None):
+    """Check rows of a metadata table against the rules of their type and return every violation found.
+
+    `columns` maps each column name to its cell values as strings, as returned by as_columns; a DataFrame is
+    converted first. Only the given row numbers are checked if rows is given. The report is a DataFrame with one
+    row per violation: the row number, the variable name, the rule broken and its message.
+    """
+    if isinstance(columns, pd.DataFrame):
+        columns = as_columns(columns)
+    names = list(columns)
+    n_rows = len(columns[names[0]]) if names else 0
+    row_numbers = np.arange(n_rows) if rows is None else np.asarray(rows, dtype=np.int64)
+
+    types = _take(columns, "type", rows, n_rows)
+    v_filled = np.stack([_take(columns, name, rows, n_rows) != '' for name in v_columns(names)], axis=1) \
+        if v_columns(names) else np.zeros((len(row_numbers), 0), dtype=bool)
+    continuous_filled = np.stack([_take(columns, name, rows, n_rows) != '' for name in CONTINUOUS_COLUMNS if name in columns], axis=1) \
+        if any(name in columns for name in CONTINUOUS_COLUMNS) else np.zeros((len(row_numbers), 0), dtype=bool)
+    has_v = v_filled.any(axis=1)
+    has_continuous = continuous_filled.any(axis=1)
+
+    nominal = types == "nominal"
+    continuous = types == "continuous"
+    ordinal = types == "ordinal"
+    included_valid = np.isin(_take(columns, "minincluded", rows, n_rows), BOOLEAN_VALUES) & \
+        np.isin(_take(columns, "maxincluded", rows, n_rows), BOOLEAN_VALUES)
+    broken = {
+        'type': ~(nominal | continuous | ordinal),
+        'nominal': nominal & (v_filled.sum(axis=1) < 2),
+        'continuous': continuous & (~continuous_filled.all(axis=1) | has_v),
+        'included': continuous & ~included_valid,
+        'ordinal': ordinal & (has_v == has_continuous)
+    }
+
+    found_rows, found_rules = [], []
+    for rule, mask in broken.items():
+        positions = np.flatnonzero(mask)
+        found_rows.append(row_numbers[positions])
+        found_rules.append(np.full(len(positions), rule, dtype=object))
+    found_rows = np.concatenate(found_rows)
+    found_rules = np.concatenate(found_rules)
+    order = np.argsort(found_rows, kind='stable')
+    found_rows, found_rules = found_rows[order], found_rules[order]
+
+    variable_names = columns.get("name")
+    return pd.DataFrame({
+        'row': found_rows,
+        'name': [variable_names[row] if variable_names is not None else '' for row in found_rows],
+        'rule': found_rules,
+        'message': [RULE_MESSAGES[rule] for rule in found_rules]
+    }, columns=REPORT_COLUMNS)
+
+
+def _as_number(text):
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def check_data_values(metadata_df, data_df):
+    """Check that the data values of every variable with 'V' values are among them, in the layout of validate_metadata.
+
+    data_df only needs the columns of those variables. Values are compared as stripped text, case-insensitively for
+    booleans, and as numbers when both are numbers, so a value read as 1.0 matches a listed '1'.
+    """
+    columns = as_columns(metadata_df)
+    v_names = v_columns(metadata_df.columns)
+    records = []
+    for row, name in enumerate(columns.get("name", [])):
+        listed = {columns[v_name][row].strip() for v_name in v_names} - {''}
+        if not listed or name not in data_df.columns:
+            continue
+        listed_lower = {value.lower() for value in listed}
+        listed_numbers = np.array([number for number in map(_as_number, listed) if number is not None])
+        unlisted = []
+        for value in pd.unique(data_df[name].dropna()):
+            text = str(value).strip()
+            if text in listed or text.lower() in listed_lower:
+                continue
+            number = _as_number(text)
+            if number is not None and np.isclose(number, listed_numbers).any():
+                continue
+            unlisted.append(text)
+        if unlisted:
+            shown = ", ".join(sorted(unlisted)[:5]) + (", ..." if len(unlisted) > 5 else "")
+            records.append((row, name, 'values', f"{RULE_MESSAGES['values']} Not listed: {shown}"))
+    return pd.DataFrame(records, columns=REPORT_COLUMNS)
+
+
+def format_report(report, limit=None):
+    """Describe the violations of a report, one line each, with 1-based row numbers."""
+    lines = [f"Row {row + 1}: {message}" for row, message in zip(report['row'], report['message'])]
+    if limit is not None and len(lines) > limit:
+        lines = lines[:limit] + [f"... and {len(lines) - limit} more."]
+    return "\n".join(lines)
+
+
+class MetadataValidator:
+    """Keeps the validation report of a metadata table up to date, re-checking only the rows that were edited."""
+
+    def __init__(self, columns):
+        self.violations = {}  # row -> list of (name, rule, message)
+        self.validate(columns)
+
+    def validate(self, columns, rows=None):
+        """Check the given rows, or all rows, and replace their violations."""
+        report = validate_metadata(columns, rows)
+        if rows is None:
+            self.violations = {}
+        else:
+            for row in rows:
+                self.violations.pop(row, None)
+        for row, name, rule, message in zip(report['row'], report['name'], report['rule'], report['message']):
+            self.violations.setdefault(int(row), []).append((name, rule, message))
+        return report
+
+    def row_messages(self, row):
+        return [message for _, _, message in self.violations.get(row, [])]
+
+    def is_valid(self):
+        return not self.violations
+
+    def report(self):
+        """Return every current violation, ordered by row, in the layout of validate_metadata."""
+        records = [(row, *violation) for row in sorted(self.violations) for violation in self.violations[row]]
+        return pd.DataFrame(records, columns=REPORT_COLUMNS)
+
+
+def main(argv):
+    """Validate metadata files from the command line, printing every violation."""
+    status = 0
+    for path in argv:
+        metadata_df = normalize_metadata(pd.read_csv(path))
+        report = validate_metadata(metadata_df)
+        print(f"{path}: {len(report)} violation(s)")
+        if len(report):
+            print(format_report(report))
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
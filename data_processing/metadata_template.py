@@ -0,0 +1,325 @@
+"""Metadata template generator that streams a CSV file in chunks.
+
+Produces the same columns as inferno's metadatatemplate (name, type, datastep, domainmin, domainmax, minincluded,
+maxincluded, V1, V2, ...) while keeping only running statistics per column, so memory does not grow with the
+number of rows. The type of each variable is decided from its non-missing values:
+
+- values that are not all numbers, or numbers taking at most two values, give a nominal variable listing its values;
+- integers taking at most ORDINAL_MAX_LEVELS values give an ordinal variable bounded by the observed minimum and
+  maximum, with their minimum step as datastep;
+- other numbers give a continuous variable. datastep is the rounding unit of the values as written in the file
+  (1 for integers, 0.01 for two decimals), or 0 beyond MAX_ROUNDED_DECIMALS decimals. Non-negative variables get
+  domainmin 0, included if 0 occurs.
+
+These rules approximate metadatatemplate's, so inferno stays the default and this generator is only used when asked
+for (cli.py metadata --streaming). benchmarks/bench_metadata_template.py --r lists where both differ on a file.
+"""
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_CHUNK_ROWS = 100_000
+MAX_DISTINCT = 1000  # distinct values kept exactly per column; beyond, only their number is estimated
+SKETCH_SIZE = 256
+ORDINAL_MAX_LEVELS = 10
+MAX_ROUNDED_DECIMALS = 4
+TEMPLATE_COLUMNS = ["name", "type", "datastep", "domainmin", "domainmax", "minincluded", "maxincluded"]
+
+
+class DistinctSketch:
+    """K-minimum-values sketch estimating the number of distinct values of a stream."""
+
+    def __init__(self, size=SKETCH_SIZE):
+        self.size = size
+        self.hashes = np.empty(0, dtype=np.uint64)
+
+    def update(self, values):
+        values = np.asarray(values)
+        hashes = pd.util.hash_array(values.astype(object) if values.dtype.kind == 'U' else values)
+        if len(hashes) > self.size:
+            hashes = np.partition(hashes, self.size - 1)[:self.size]
+        self.hashes = np.union1d(self.hashes, hashes)[:self.size]
+
+    def estimate(self):
+        if len(self.hashes) < self.size:
+            return len(self.hashes)
+        return int(round((self.size - 1) / (float(self.hashes[-1]) / 2.0**64)))
+
+
+class ColumnStats:
+    """Running statistics of one CSV column, updated one chunk at a time.
+
+    An optional histogram, with an add(numbers, weights) method, is given the numeric values once there are more
+    than MAX_DISTINCT of them; until then they are all in `values`.
+    """
+
+    def __init__(self, name, histogram=None):
+        self.name = name
+        self.histogram = histogram
+        self.count = 0
+        self.missing = 0
+        self.numeric = True
+        self.integer = True
+        self.minimum = np.inf
+        self.maximum = -np.inf
+        self.min_step = np.inf  # smallest gap between distinct numbers, while there are at most MAX_DISTINCT
+        self.decimals = 0
+        self.values = {}  # count of each distinct value as written, while there are at most MAX_DISTINCT
+        self.numbers = np.empty(0)  # distinct numeric values, while there are at most MAX_DISTINCT
+        self.overflow = False
+        self.sketch = DistinctSketch()  # only updated once there are more than MAX_DISTINCT values
+        self.sketched_numbers = False  # whether the sketch holds values hashed as numbers rather than as text
+
+    def update(self, column):
+        """Add a chunk of raw string values, with missing values as NaN."""
+        counts = column.value_counts(sort=False)
+        distinct = np.asarray(counts.index, dtype=str)
+        weights = counts.to_numpy(dtype=np.int64)
+        stripped = np.char.strip(distinct)
+        if (stripped != distinct).any():
+            regrouped = pd.Series(weights).groupby(stripped, sort=False).sum()
+            distinct, weights = np.asarray(regrouped.index, dtype=str), regrouped.to_numpy(dtype=np.int64)
+        filled = distinct != ''
+        distinct, weights = distinct[filled], weights[filled]
+        present = int(weights.sum())
+        self.missing += len(column) - present
+        if present == 0:
+            return
+        self.count += present
+        merged = False  # whether this chunk is counted in `values`
+        if not self.overflow:
+            if len(distinct) <= MAX_DISTINCT:
+                for value, count in zip(distinct.tolist(), weights.tolist()):
+                    self.values[value] = self.values.get(value, 0) + count
+                merged = True
+            if len(distinct) > MAX_DISTINCT or len(self.values) > MAX_DISTINCT:
+                self.overflow = True
+                if self.numeric:
+                    self.sketch.update(self.numbers)
+                    self.sketched_numbers = True
+                    self._histogram_from_values()
+                else:
+                    self._sketch_text(np.asarray(list(self.values), dtype=str))
+                self.values = {}
+        if self.numeric:
+            self._update_numeric(distinct, weights, stream=self.overflow and not merged)
+        if self.overflow and not self.numeric:
+            self._sketch_text(distinct)
+
+    def _sketch_text(self, distinct):
+        """Add values of a non-numeric column to the sketch."""
+        if not self.sketched_numbers:
+            self.sketch.update(distinct)
+            return
+        # The column was numeric when it overflowed, so numbers are hashed as numbers to count each value once
+        numbers = pd.to_numeric(pd.Series(distinct, dtype=object), errors='coerce').to_numpy(dtype=np.float64)
+        is_number = ~np.isnan(numbers)
+        self.sketch.update(numbers[is_number])
+        self.sketch.update(distinct[~is_number])
+
+    def _histogram_from_values(self):
+        """Give the histogram the numbers counted in `values` when the column overflows."""
+        if self.histogram is None or not self.values:
+            return
+        numbers = pd.to_numeric(pd.Series(list(self.values), dtype=object), errors='coerce').to_numpy(dtype=np.float64)
+        weights = np.fromiter(self.values.values(), dtype=np.int64, count=len(self.values))
+        finite = np.isfinite(numbers)
+        self.histogram.add(numbers[finite], weights[finite])
+
+    def _update_numeric(self, distinct, weights, stream=False):
+        numbers = pd.to_numeric(pd.Series(distinct, dtype=object), errors='coerce').to_numpy(dtype=np.float64)
+        if np.isnan(numbers).any():
+            self.numeric = False
+            self.numbers = np.empty(0)
+            return
+        is_finite = np.isfinite(numbers)
+        finite = numbers[is_finite]
+        if stream and self.histogram is not None:
+            self.histogram.add(finite, weights[is_finite])
+        if self.overflow:
+            self.sketch.update(numbers)  # hashing numbers is much cheaper than hashing their text
+        if finite.size:
+            self.minimum = min(self.minimum, finite.min())
+            self.maximum = max(self.maximum, finite.max())
+            self.integer = self.integer and bool(np.all(finite == np.round(finite)))
+        if self.decimals <= MAX_ROUNDED_DECIMALS:
+            self.decimals = max(self.decimals, count_decimals(distinct))
+
+        # The minimum step is only used by ordinal variables, which have few values
+        if not self.overflow:
+            self.numbers = np.union1d(self.numbers, finite)
+            if self.numbers.size > 1:
+                self.min_step = float(np.diff(self.numbers).min())
+        else:
+            self.numbers = np.empty(0)
+            self.min_step = np.inf
+
+    def n_distinct(self):
+        """Exact number of distinct values, or an estimate once there are more than MAX_DISTINCT."""
+        return self.sketch.estimate() if self.overflow else len(self.values)
+
+    def options(self):
+        """Sorted distinct values, numerically for numbers."""
+        if self.numeric and not self.overflow:
+            return [format_number(value) for value in self.numbers]
+        return sorted(self.values)
+
+    def summary(self):
+        return {'name': self.name, 'count': self.count, 'missing': self.missing, 'numeric': self.numeric,
+                'integer': self.numeric and self.integer, 'min': float(self.minimum) if self.numeric else None,
+                'max': float(self.maximum) if self.numeric else None,
+                'min_step': self.min_step if self.numeric and np.isfinite(self.min_step) else None,
+                'decimals': self.decimals if self.numeric else None, 'distinct': self.n_distinct(),
+                'distinct_exact': not self.overflow}
+
+    def template_row(self):
+        """Return the metadata fields of the column and its list of values."""
+        return template_row(self.summary(), self.options())
+
+
+def template_row(summary, options):
+    """Return the metadata fields and list of values of a column from its summary and sorted distinct values."""
+    row = {"name": summary['name'], "type": "nominal", "datastep": "", "domainmin": "", "domainmax": "",
+           "minincluded": "", "maxincluded": ""}
+    if not summary['numeric'] or summary['count'] == 0 or summary['distinct'] <= 2:
+        return row, options
+
+    if summary['integer'] and summary['distinct'] <= ORDINAL_MAX_LEVELS:
+        row.update(type="ordinal", datastep=format_number(summary['min_step']), domainmin=format_number(summary['min']),
+                   domainmax=format_number(summary['max']), minincluded="TRUE", maxincluded="TRUE")
+        return row, []
+
+    if summary['integer']:
+        datastep = 1
+    elif summary['decimals'] <= MAX_ROUNDED_DECIMALS:
+        datastep = 10.0 ** -summary['decimals']
+    else:
+        datastep = 0
+    non_negative = summary['min'] >= 0
+    row.update(type="continuous", datastep=format_number(datastep),
+               domainmin=format_number(0 if non_negative else -np.inf), domainmax=format_number(np.inf),
+               minincluded="TRUE" if non_negative and summary['min'] == 0 else "FALSE", maxincluded="FALSE")
+    return row, []
+
+
+def count_decimals(values):
+    """Largest number of significant decimals of numbers written as text.
+
+    The rounding of numbers in exponent notation is unknown, so they count as more than MAX_ROUNDED_DECIMALS.
+    """
+    exponent = np.char.find(np.char.replace(np.char.lower(values), 'inf', ''), 'e') >= 0
+    if exponent.any():
+        return MAX_ROUNDED_DECIMALS + 1
+    dot = np.char.find(values, '.')
+    with_dot = dot >= 0
+    if not with_dot.any():
+        return 0
+    stripped = np.char.rstrip(values[with_dot], '0')
+    return int((np.char.str_len(stripped) - dot[with_dot] - 1).max())
+
+
+def format_number(value):
+    """Write a number as R does in a metadata file: integers without decimals, infinities as Inf."""
+    value = float(value)
+    if np.isinf(value):
+        return "Inf" if value > 0 else "-Inf"
+    if value == round(value) and abs(value) < 1e15:
+        return str(int(value))
+    return f"{value:.15g}"
+
+
+def select_columns(columns, includevrt=None, excludevrt=None):
+    """Keep the columns named in includevrt, if given, and not named in excludevrt."""
+    if includevrt is not None:
+        columns = [name for name in columns if name in includevrt]
+    if excludevrt is not None:
+        columns = [name for name in columns if name not in excludevrt]
+    return columns
+
+
+def scan_columns(csv_file_path, includevrt=None, excludevrt=None, chunksize=DEFAULT_CHUNK_ROWS, stats_class=ColumnStats):
+    """Read a CSV file in chunks and return the statistics of its columns, in file order."""
+    columns = select_columns(pd.read_csv(csv_file_path, nrows=0).columns.tolist(), includevrt, excludevrt)
+    stats = {name: stats_class(name) for name in columns}
+    for chunk in pd.read_csv(csv_file_path, usecols=columns, dtype=str, chunksize=chunksize):
+        for name in columns:
+            stats[name].update(chunk[name])
+    return [stats[name] for name in columns]
+
+
+def build_metadata_template(csv_file_path, output_file_name=None, includevrt=None, excludevrt=None, chunksize=DEFAULT_CHUNK_ROWS):
+    """Build the metadata template of a CSV file, write it if a file name is given, and return it."""
+    columns = scan_columns(csv_file_path, includevrt, excludevrt, chunksize)
+    return metadata_frame([(stats.summary(), stats.options()) for stats in columns], output_file_name)
+
+
+def metadata_frame(columns, output_file_name=None):
+    """Build a metadata template from (summary, options) pairs, write it if a file name is given, and return it."""
+    rows, options = [], []
+    for summary, column_options in columns:
+        row, values = template_row(summary, column_options)
+        if not summary['distinct_exact'] and row["type"] == "nominal":
+            print(f"Warning: '{summary['name']}' has about {summary['distinct']} distinct values, too many to list; "
+                  f"its values must be filled in or the variable excluded.", file=sys.stderr)
+        rows.append(row)
+        options.append(values)
+
+    n_options = max((len(values) for values in options), default=0)
+    metadata_df = pd.DataFrame(rows, columns=TEMPLATE_COLUMNS)
+    for index in range(n_options):
+        metadata_df[f"V{index + 1}"] = [values[index] if index < len(values) else "" for values in options]
+    if output_file_name is not None:
+        metadata_df.to_csv(output_file_name, index=False)
+    return metadata_df
+
+
+def compare_metadata(metadata_df, reference_df):
+    """List the fields where a metadata table differs from a reference one, e.g. written by metadatatemplate.
+
+    Numbers are compared as numbers and booleans case-insensitively; the order of the V values does not matter.
+    """
+    def text(value):
+        return '' if pd.isna(value) else str(value).strip()
+
+    def same(left, right):
+        left, right = text(left), text(right)
+        if left.lower() == right.lower():
+            return True
+        try:
+            return np.isclose(float(left), float(right), rtol=1e-9, atol=0)
+        except ValueError:
+            return False
+
+    reference = reference_df.set_index("name")
+    differences = []
+    for _, row in metadata_df.iterrows():
+        if row["name"] not in reference.index:
+            differences.append((row["name"], "name", "present", "missing"))
+            continue
+        expected = reference.loc[row["name"]]
+        for field in TEMPLATE_COLUMNS[1:]:
+            if not same(row.get(field), expected.get(field)):
+                differences.append((row["name"], field, text(row.get(field)), text(expected.get(field))))
+        values = sorted(text(row[name]) for name in metadata_df.columns if name.startswith("V") and text(row[name]))
+        expected_values = sorted(text(expected[name]) for name in reference.columns if name.startswith("V") and text(expected[name]))
+        if len(values) != len(expected_values) or not all(same(a, b) for a, b in zip(values, expected_values)):
+            differences.append((row["name"], "V", ", ".join(values), ", ".join(expected_values)))
+    for name in reference.index.difference(metadata_df["name"]):
+        differences.append((name, "name", "missing", "present"))
+    return pd.DataFrame(differences, columns=["name", "field", "value", "reference"])
+
+
+def main(argv):
+    """Write the metadata template of a CSV file: metadata_template.py data.csv metadata.csv"""
+    if len(argv) != 2:
+        print(main.__doc__, file=sys.stderr)
+        return 2
+    build_metadata_template(argv[0], argv[1])
+    print(f"Metadata written to {os.path.abspath(argv[1])}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
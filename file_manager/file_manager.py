@@ -1,7 +1,10 @@
 from PySide6.QtCore import QObject, Signal
 import os
 import shutil
+import threading
 from appdirs import user_data_dir
+from data_processing.dataset_profile import dataset_profiles
+from data_processing.dataset_sidecar import write_sidecar, open_sidecar, remove_sidecar, rename_sidecar
 
 APP_DIR = user_data_dir("Inferno App", "inferno")
 os.makedirs(APP_DIR, exist_ok=True)
@@ -18,12 +21,16 @@ for folder in [UPLOAD_FOLDER, METADATA_FOLDER, LEARNT_FOLDER, CONFIG_FOLDER]:
 class FileManager(QObject):
     files_updated = Signal()
     learnt_folders_updated = Signal()
+    learnt_folder_changed = Signal(str)
+    profile_ready = Signal(str)
 
     def __init__(self):
         super().__init__()
         self.uploaded_files = []
         self.metadata_files = []
         self.learnt_folders = []
+        self._profiling = set()
+        self._profiling_lock = threading.Lock()
         self.refresh()
 
     def load_files(self):
@@ -35,9 +42,12 @@ class FileManager(QObject):
             self.metadata_files = [f for f in os.listdir(METADATA_FOLDER) if f.endswith('.csv')]
 
         if os.path.exists(LEARNT_FOLDER):
+            previous_folders = set(self.learnt_folders)
             self.learnt_folders = [
                 f for f in os.listdir(LEARNT_FOLDER) if os.path.isdir(os.path.join(LEARNT_FOLDER, f))
             ]
+            for folder_name in previous_folders - set(self.learnt_folders):
+                self.learnt_folder_changed.emit(os.path.join(LEARNT_FOLDER, folder_name))
 
     def refresh(self):
         """Refresh the list of uploaded files, metadata files, and learnt folders."""
@@ -55,17 +65,62 @@ class FileManager(QObject):
             self.refresh()
         except Exception as e:
             print(f"Error copying file: {e}")
+            return
+        if folder == UPLOAD_FOLDER and destination.endswith('.csv'):
+            self.profile_file(destination)
+
+    def profile_file(self, file_path):
+        """Profile an uploaded CSV file and write its columnar sidecar on a background thread.
+
+        profile_ready is emitted with the path of the file as soon as the profile is available.
+        """
+        with self._profiling_lock:
+            if file_path in self._profiling:
+                return
+            self._profiling.add(file_path)
+        threading.Thread(target=self._profile_worker, args=(file_path,), name="DatasetProfile", daemon=True).start()
+
+    def _profile_worker(self, file_path):
+        try:
+            dataset_profiles.profile(file_path)
+            self.profile_ready.emit(file_path)
+            if open_sidecar(file_path) is None:
+                write_sidecar(file_path)
+        except Exception as e:
+            print(f"Error profiling file: {e}")
+        finally:
+            with self._profiling_lock:
+                self._profiling.discard(file_path)
+
+    def get_profile(self, file_path):
+        """Return the stored profile of an uploaded CSV file, or None and profile it in the background.
+
+        Files whose hash is not known yet are hashed in the background too, not on the calling thread.
+        """
+        profile = dataset_profiles.get(file_path, compute_hash=False)
+        if profile is None:
+            self.profile_file(file_path)
+        return profile
 
     def delete_file(self, file_name, folder):
         """Delete the file from the specified folder and refresh the list."""
         file_path = os.path.join(folder, file_name)
         if os.path.exists(file_path):
             try:
+                if folder == LEARNT_FOLDER:
+                    # Before deleting, so the caches let go of the folder's files first
+                    self.learnt_folder_changed.emit(file_path)
                 if os.path.isdir(file_path):
-                    os.rmdir(file_path)
+                    shutil.rmtree(file_path)
                 else:
                     os.remove(file_path)
+                    if folder == UPLOAD_FOLDER:
+                        remove_sidecar(file_path)
                 self.refresh()
+                if folder == UPLOAD_FOLDER:
+                    # Files changed since they were last hashed are read again, so prune off the GUI thread
+                    remaining = [os.path.join(UPLOAD_FOLDER, f) for f in self.uploaded_files]
+                    threading.Thread(target=dataset_profiles.prune, args=(remaining,), name="DatasetProfilePrune", daemon=True).start()
             except Exception as e:
                 print(f"Error deleting file: {e}")
 
@@ -76,7 +131,13 @@ class FileManager(QObject):
         if os.path.exists(old_path):
             try:
                 if os.path.exists(old_path):
+                    if folder == LEARNT_FOLDER:
+                        self.learnt_folder_changed.emit(old_path)
+                        self.learnt_folder_changed.emit(new_path)
                     os.rename(old_path, new_path)
+                    if folder == UPLOAD_FOLDER:
+                        rename_sidecar(old_path, new_path)
+                        dataset_profiles.forget(old_path)
                     self.refresh()
             except Exception as e:
                 print(f"Error renaming file: {e}")
@@ -4,14 +4,16 @@
 block_cipher = None
 
 from PyInstaller.utils.hooks import collect_submodules
-hiddenimports = collect_submodules('file_manager')
+hiddenimports = collect_submodules('file_manager') + collect_submodules('data_processing')
 
 a = Analysis(
     [
         'main.py', 
+        'startup_timing.py',
         'pages/shared/custom_combobox.py',
         'pages/home/page.py',
         'pages/metadata/page.py',
+        'pages/metadata/metadata_table.py',
         'pages/learn/page.py',
         'pages/plotting/page.py',
         'pages/plotting/config.py',
@@ -19,8 +21,26 @@ a = Analysis(
         'pages/plotting/plotting.py',
         'pages/plotting/variables.py',
         'pages/mutualinfo/page.py',
+        'pages/mutualinfo/mi_functions.py',
         'pages/literature/page.py',
         'r_integration/inferno_functions.py',
+        'r_integration/r_executor.py',
+        'r_integration/learn_job.py',
+        'r_integration/learn_worker.py',
+        'r_integration/learnt_cache.py',
+        'r_integration/result_cache.py',
+        'r_integration/conversion.py',
+        'r_integration/results.py',
+        'r_integration/r_cluster.py',
+        'r_integration/resources.py',
+        'r_integration/learn_queue.py',
+        'r_integration/backend.py',
+        'r_integration/native_pr.py',
+        'r_integration/sample_store.py',
+        'r_integration/mi_worker.py',
+        'r_integration/mi_pool.py',
+        'r_integration/mi_ranking.py',
+        'r_integration/mi_selection.py',
     ],
     pathex=['.'],
     binaries=[],
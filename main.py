@@ -1,3 +1,4 @@
+import startup_timing
 import sys
 import os
 import platform
@@ -17,10 +18,23 @@ elif system_platform == 'Linux':
         os.environ['R_HOME'] = '/usr/lib/R'
     os.environ['PATH'] += ':/usr/bin:/usr/local/bin'
 
+# R gets its parallelism from worker processes, so keep each one's BLAS/OpenMP pool to a single thread
+from r_integration.resources import configure_thread_env
+configure_thread_env()
+startup_timing.mark("environment setup")
+
+# The packaged app re-launches itself to run learn computations and mutualinfo sweeps in separate processes
+if len(sys.argv) > 1 and sys.argv[1] == '--learn-worker':
+    from r_integration.learn_worker import main as learn_worker_main
+    sys.exit(learn_worker_main(sys.argv[2:]))
+if len(sys.argv) > 1 and sys.argv[1] == '--mi-worker':
+    from r_integration.mi_worker import main as mi_worker_main
+    sys.exit(mi_worker_main(sys.argv[2:]))
 
 from PySide6.QtWidgets import QApplication, QMainWindow, QPushButton, QVBoxLayout, QWidget, QStackedWidget, QHBoxLayout, QLabel, QStyle, QProxyStyle, QStyleOptionViewItem
-from PySide6.QtCore import QSize, Qt
+from PySide6.QtCore import QSize, Qt, QTimer
 from PySide6.QtGui import QIcon, QPixmap, QPalette, QColor
+startup_timing.mark("Qt imports")
 
 # Import the individual pages from their respective files
 from pages.home.page import HomePage
@@ -30,6 +44,18 @@ from pages.plotting.page import PlottingPage
 from pages.mutualinfo.page import MutualInfoPage
 from pages.literature.page import LiteraturePage
 from file_manager.file_manager import FileManager
+from r_integration.r_executor import get_executor
+from r_integration.learnt_cache import learnt_cache
+from r_integration.backend import native_samples
+from r_integration.learn_queue import get_learn_queue
+startup_timing.mark("page imports")
+
+R_STATUS_TEXT = {
+    "not loaded": "R: starting...",
+    "loading": "R: loading inferno...",
+    "ready": "R: ready",
+    "failed": "R: failed to load"
+}
 
 
 class CustomFusionStyle(QProxyStyle):
@@ -57,6 +83,10 @@ class MainWindow(QMainWindow):
             base_path = os.path.abspath(".")
 
         self.file_manager = FileManager()
+        # Cached learnt objects are R objects, so they are released on the R executor thread
+        self.file_manager.learnt_folder_changed.connect(lambda path: get_executor().submit(learnt_cache.invalidate, path))
+        # Called before the folder is deleted or renamed, so no samples file in it is still mapped
+        self.file_manager.learnt_folder_changed.connect(native_samples.invalidate)
 
         self.setWindowTitle("Inferno App")
         ico_icon_path = os.path.join(base_path, 'resources', 'inferno_symbol.png')
@@ -113,6 +143,13 @@ class MainWindow(QMainWindow):
 
         self.sidebar_layout.addStretch() 
 
+        # R and inferno load in the background after the window is shown
+        self.r_status_label = QLabel()
+        self.r_status_label.setObjectName("r_status")
+        self.sidebar_layout.addWidget(self.r_status_label)
+        self.update_r_status(get_executor().r_status)
+        get_executor().r_status_changed.connect(self.update_r_status)
+
         self.sidebar_widget = QWidget()
         self.sidebar_widget.setObjectName("side_menu")
         self.sidebar_widget.setLayout(self.sidebar_layout)
@@ -146,6 +183,11 @@ class MainWindow(QMainWindow):
             background-color: #0288d1;
             border-radius: 0px;
         }
+        #r_status {
+            color: white;
+            font-size: 12px;
+            padding: 0px 10px 10px 10px;
+        }
         #sidebar_title {
             color: white;
             font-size: 20px;
@@ -174,6 +216,13 @@ class MainWindow(QMainWindow):
         """)
 
     ### HELPER FUNCTIONS ###
+    def update_r_status(self, status):
+        """Show whether the R runtime is loaded in the sidebar."""
+        self.r_status_label.setText(R_STATUS_TEXT.get(status, f"R: {status}"))
+        if status in ("ready", "failed"):
+            startup_timing.mark(f"R {status} (background)")
+            startup_timing.print_report_if_requested()
+
     def switch_page(self, page_widget, button):
         """Switch to the given page and update the active button's style."""
         self.stacked_widget.setCurrentWidget(page_widget)
@@ -200,7 +249,19 @@ if __name__ == "__main__":
     palette.setColor(QPalette.Window, QColor("white"))
     app.setPalette(palette)
 
+    app.aboutToQuit.connect(get_executor().shutdown)
+    app.aboutToQuit.connect(lambda: get_learn_queue().shutdown())
+    startup_timing.mark("QApplication")
+
     window = MainWindow()
+    startup_timing.mark("main window built")
     window.show()
 
+    def on_first_event_loop_turn():
+        startup_timing.mark("window shown")
+        # Starting R only now keeps it off the critical path to the first paint
+        get_executor().preload()
+
+    QTimer.singleShot(0, on_first_event_loop_turn)
+
     sys.exit(app.exec())
\ No newline at end of file
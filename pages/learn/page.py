@@ -2,10 +2,16 @@ import os
 import json
 import shutil
 import importlib.resources
-from PySide6.QtCore import Qt
+import pandas as pd
+from PySide6.QtCore import Qt, QTimer
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGroupBox, QLabel, QPushButton, QMessageBox, QListWidget, 
-                                QInputDialog, QSizePolicy, QDialog, QFormLayout, QLineEdit, QSpacerItem, QFileDialog, QHBoxLayout, QLabel, QGridLayout)
-from r_integration.inferno_functions import run_learn
+                                QInputDialog, QSizePolicy, QDialog, QFormLayout, QLineEdit, QSpacerItem, QFileDialog, QHBoxLayout, QLabel, QGridLayout,
+                                QProgressBar, QListWidgetItem)
+from r_integration.learn_job import format_duration
+from r_integration.learn_queue import get_learn_queue
+from data_processing.dataset_profile import format_profile, column_names
+from data_processing.dataset_sidecar import open_sidecar, read_dataset, dataset_columns
+from data_processing.metadata_engine import check_data_values, v_columns, format_report
 from appdirs import user_data_dir
 from pages.shared.custom_combobox import CustomComboBox
 
@@ -21,6 +27,7 @@ class LearnPage(QWidget):
     def __init__(self, file_manager):
         super().__init__()
         self.file_manager = file_manager
+        self.learn_queue = get_learn_queue()
         self.load_configuration()
         layout = QGridLayout()
         button_width = 100
@@ -30,10 +37,10 @@ class LearnPage(QWidget):
         title_label.setObjectName("title")
         title_label.setAlignment(Qt.AlignHCenter)
         title_label.setContentsMargins(0, 0, 0, 0)  # left, top, right, bottom
-        layout.addWidget(title_label, 0, 0, 1, 2)
+        layout.addWidget(title_label, 0, 0, 1, 3)
 
         vertical_spacer = QSpacerItem(0, 30, QSizePolicy.Minimum, QSizePolicy.Fixed)
-        layout.addItem(vertical_spacer, 1, 0, 1, 2)
+        layout.addItem(vertical_spacer, 1, 0, 1, 3)
 
         # --- Group box for left side (run simulation) ---
         self.simulation_group = QGroupBox("Computation")
@@ -49,10 +56,16 @@ class LearnPage(QWidget):
         csv_label.setFixedWidth(fixed_label_width)
         self.csv_combobox = CustomComboBox()
         self.csv_combobox.currentIndexChanged.connect(self.check_selection)
+        self.csv_combobox.currentIndexChanged.connect(self.show_csv_profile)
         file_layout.addWidget(csv_label)
         file_layout.addWidget(self.csv_combobox)
         simulation_layout.addLayout(file_layout)
 
+        self.csv_profile_label = QLabel("")
+        self.csv_profile_label.setContentsMargins(fixed_label_width, 0, 0, 0)  # left, top, right, bottom
+        self.csv_profile_label.setWordWrap(True)
+        simulation_layout.addWidget(self.csv_profile_label)
+
         simulation_layout.addSpacing(5)
 
         meta_layout = QHBoxLayout()
@@ -85,8 +98,60 @@ class LearnPage(QWidget):
         button_layout.addWidget(self.configure_button)
 
         simulation_layout.addLayout(button_layout)
+
+        # Progress of the running learn job selected in the queue
+        self.progress_widget = QWidget()
+        progress_layout = QVBoxLayout(self.progress_widget)
+        progress_layout.setContentsMargins(0, 30, 0, 0)  # left, top, right, bottom
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setFormat("%v / %m chains")
+        progress_layout.addWidget(self.progress_bar)
+
+        self.progress_label = QLabel("")
+        self.progress_label.setAlignment(Qt.AlignHCenter)
+        progress_layout.addWidget(self.progress_label)
+
+        self.progress_widget.hide()
+        simulation_layout.addWidget(self.progress_widget)
         simulation_layout.addStretch()
 
+        # Refresh the elapsed/idle times while jobs run, even without new output
+        self.progress_timer = QTimer(self)
+        self.progress_timer.setInterval(1000)
+        self.progress_timer.timeout.connect(self.update_learn_progress)
+
+        # --- Group box for the learn queue ---
+        self.queue_group = QGroupBox("Learn Queue")
+        self.queue_group.setAlignment(Qt.AlignHCenter)
+
+        queue_layout = QVBoxLayout()
+        queue_layout.setContentsMargins(50, 50, 50, 50)  # left, top, right, bottom
+        self.queue_group.setLayout(queue_layout)
+
+        self.queue_list = QListWidget()
+        self.queue_list.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.queue_list.currentItemChanged.connect(self.update_learn_progress)
+        queue_layout.addWidget(self.queue_list)
+        queue_layout.addItem(QSpacerItem(0, 10, QSizePolicy.Minimum, QSizePolicy.Fixed))
+
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.setObjectName("redButton")
+        self.cancel_button.setFixedWidth(button_width)
+        self.cancel_button.clicked.connect(self.cancel_learn_function)
+
+        self.clear_queue_button = QPushButton("Clear Ended")
+        self.clear_queue_button.setFixedWidth(button_width)
+        self.clear_queue_button.clicked.connect(self.learn_queue.clear_ended)
+
+        queue_button_layout = QHBoxLayout()
+        queue_button_layout.setContentsMargins(0, 0, 0, 10)  # left, top, right, bottom
+        queue_button_layout.setAlignment(Qt.AlignHCenter)
+        queue_button_layout.addWidget(self.clear_queue_button)
+        queue_button_layout.addItem(QSpacerItem(20, 0, QSizePolicy.Fixed, QSizePolicy.Minimum))
+        queue_button_layout.addWidget(self.cancel_button)
+        queue_layout.addLayout(queue_button_layout)
+
         # --- Group box for right side (results folder list) ---
         self.results_list_group = QGroupBox("Learnt Folders")
         self.results_list_group.setAlignment(Qt.AlignHCenter)
@@ -138,12 +203,15 @@ class LearnPage(QWidget):
 
         layout.addWidget(self.simulation_group, 2, 0)
         layout.addWidget(self.results_list_group, 2, 1)
+        layout.addWidget(self.queue_group, 2, 2)
 
         self.simulation_group.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         self.results_list_group.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.queue_group.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
 
         layout.setColumnStretch(0, 1)  # Left side will take 1 part
-        layout.setColumnStretch(1, 2)  # Right side will take 2 parts
+        layout.setColumnStretch(1, 1)  # Learnt folders will take 1 part
+        layout.setColumnStretch(2, 1)  # Learn queue will take 1 part
 
         self.setLayout(layout)
 
@@ -154,8 +222,13 @@ class LearnPage(QWidget):
 
         self.file_manager.files_updated.connect(self.load_files)
         self.file_manager.learnt_folders_updated.connect(self.load_result_folders)
+        self.file_manager.profile_ready.connect(self.on_profile_ready)
         self.file_manager.refresh()
 
+        self.learn_queue.jobs_changed.connect(self.load_learn_queue)
+        self.learn_queue.job_ended.connect(self.on_learn_job_ended)
+        self.load_learn_queue()
+
 
     ### HELPER FUNCTIONS ###
 
@@ -227,9 +300,7 @@ class LearnPage(QWidget):
             confirm = QMessageBox.question(self, "Delete Folder", f"Are you sure you want to delete the folder '{folder_name}'?", 
                                            QMessageBox.Yes | QMessageBox.No)
             if confirm == QMessageBox.Yes:
-                folder_path = os.path.join(LEARNT_FOLDER, folder_name)
-                shutil.rmtree(folder_path)
-                self.file_manager.refresh()
+                self.file_manager.delete_file(folder_name, LEARNT_FOLDER)
                 QMessageBox.information(self, "Success", f"Folder '{folder_name}' deleted.")
         else:
             QMessageBox.warning(self, "Error", "No folder selected.")
@@ -257,6 +328,51 @@ class LearnPage(QWidget):
         metadata_selected = self.metadata_combobox.currentText() != "No metadata files available"
         self.run_button.setEnabled(csv_selected and metadata_selected)
 
+    def selected_csv_path(self):
+        csv_file = self.csv_combobox.currentText()
+        if csv_file not in self.file_manager.uploaded_files:
+            return None
+        return os.path.join(UPLOAD_FOLDER, csv_file)
+
+    def show_csv_profile(self):
+        """Describe the selected CSV file from its profile, which is computed in the background if missing."""
+        csv_file_path = self.selected_csv_path()
+        if csv_file_path is None:
+            self.csv_profile_label.setText("")
+            return
+        profile = self.file_manager.get_profile(csv_file_path)
+        self.csv_profile_label.setText(format_profile(profile) if profile else "Profiling...")
+
+    def on_profile_ready(self, file_path):
+        if file_path == self.selected_csv_path():
+            self.show_csv_profile()
+
+    def read_metadata(self, metadata_file_path):
+        try:
+            return pd.read_csv(metadata_file_path, dtype=str)
+        except (OSError, ValueError) as e:
+            print(f"Error reading metadata file: {e}")
+            return None
+
+    def missing_variables(self, csv_file_path, metadata_df):
+        """Variables of a metadata table that are not columns of the CSV file, according to its profile."""
+        profile = self.file_manager.get_profile(csv_file_path)
+        if profile is None or 'name' not in metadata_df.columns:
+            return []
+        columns = set(column_names(profile))
+        return [name for name in metadata_df['name'].dropna() if name not in columns]
+
+    def unlisted_values(self, csv_file_path, metadata_df):
+        """Check the data of the variables with 'V' values against them, reading only their columns from the sidecar."""
+        if open_sidecar(csv_file_path) is None or 'name' not in metadata_df.columns:
+            return None
+        listed = metadata_df[v_columns(metadata_df.columns)].notna().any(axis=1)
+        columns = set(dataset_columns(csv_file_path))
+        names = [name for name in metadata_df.loc[listed, 'name'].dropna() if name in columns]
+        if not names:
+            return None
+        return check_data_values(metadata_df, read_dataset(csv_file_path, columns=names))
+
     def load_configuration(self):
         """Load configuration from JSON"""
         if os.path.exists(USER_CONFIG_PATH):
@@ -367,8 +483,18 @@ class LearnPage(QWidget):
         except ValueError as e:
             QMessageBox.warning(self, "Invalid Input", str(e))
 
+    def learn_parameters(self):
+        """Return the current learn configuration as the parameters of a queued job."""
+        return {
+            'nsamples': self.nsamples,
+            'nchains': self.nchains,
+            'maxhours': 'inf' if self.maxhours == float('inf') else self.maxhours,
+            'parallel': self.parallel,
+            'seed': self.seed
+        }
+
     def run_learn_function(self):
-        """Run the learn function with the selected CSV and Metadata files."""
+        """Queue a learn job with the selected CSV and Metadata files."""
         self.load_configuration()
 
         csv_file = self.csv_combobox.currentText()
@@ -378,10 +504,28 @@ class LearnPage(QWidget):
             QMessageBox.warning(self, "Error", "Please select both a CSV file and a Metadata file.")
             return
 
+        csv_file_path = os.path.join(UPLOAD_FOLDER, csv_file)
+        metadata_file_path = os.path.join(METADATA_FOLDER, metadata_file)
+
+        metadata_df = self.read_metadata(metadata_file_path)
+        if metadata_df is not None:
+            missing = self.missing_variables(csv_file_path, metadata_df)
+            if missing:
+                QMessageBox.warning(self, "Error", f"The metadata file describes variables that are not columns of '{csv_file}': "
+                                                   f"{', '.join(missing)}.")
+                return
+
+            report = self.unlisted_values(csv_file_path, metadata_df)
+            if report is not None and len(report):
+                answer = QMessageBox.question(self, "Unlisted Values", f"{format_report(report, limit=10)}\n\nQueue the computation anyway?",
+                                              QMessageBox.Yes | QMessageBox.No)
+                if answer == QMessageBox.No:
+                    return
+
         confirmation = QMessageBox.question(
             self, 
             "Confirm", 
-            f"Run Monte Carlo computation with:\nMetadata: {metadata_file}\nData: {csv_file}", 
+            f"Queue Monte Carlo computation with:\nMetadata: {metadata_file}\nData: {csv_file}", 
             QMessageBox.Yes | QMessageBox.No
         )
         if confirmation == QMessageBox.No:
@@ -390,6 +534,10 @@ class LearnPage(QWidget):
         datafile_name = os.path.splitext(csv_file)[0]
         outputdir = os.path.join(LEARNT_FOLDER, datafile_name)
 
+        if self.learn_queue.is_output_in_use(outputdir):
+            QMessageBox.warning(self, "Error", f"A queued or running computation already writes to the folder '{datafile_name}'.")
+            return
+
         if os.path.exists(outputdir):
             overwrite_confirmation = QMessageBox.question(
                 self,
@@ -400,30 +548,102 @@ class LearnPage(QWidget):
             if overwrite_confirmation == QMessageBox.No:
                 return
 
-        running_message = QMessageBox(self)
-        running_message.setWindowTitle("Running")
-        running_message.setText("Running the Monte Carlo computation... \n This can take a few minutes, so you might want\n to go grab a cup of coffee while waiting.")
-        running_message.setStandardButtons(QMessageBox.NoButton)
-        running_message.show()
+        self.learn_queue.add(datafile_name, csv_file_path, metadata_file_path, outputdir, self.learn_parameters())
 
-        csv_file_path = os.path.join(UPLOAD_FOLDER, csv_file)
-        metadata_file_path = os.path.join(METADATA_FOLDER, metadata_file)
+    def load_learn_queue(self):
+        """List the queued, running and ended learn jobs, keeping the selection."""
+        selected_id = self.selected_job_id()
+        self.queue_list.clear()
 
-        result = run_learn(
-            metadatafile=metadata_file_path, 
-            datafile=csv_file_path, 
-            outputdir=outputdir, 
-            nsamples=self.nsamples, 
-            nchains=self.nchains, 
-            maxhours=self.maxhours, 
-            seed=self.seed,
-            parallel=self.parallel
-        )
+        for job in reversed(self.learn_queue.jobs):
+            item = QListWidgetItem(self.job_text(job))
+            item.setData(Qt.UserRole, job['id'])
+            if job['message']:
+                item.setToolTip(job['message'])
+            self.queue_list.addItem(item)
+            if job['id'] == selected_id:
+                self.queue_list.setCurrentItem(item)
 
-        running_message.done(0)
+        if self.learn_queue.running:
+            self.progress_timer.start()
+        else:
+            self.progress_timer.stop()
+        self.update_learn_progress()
+
+    def job_text(self, job):
+        """Describe a learn job for the queue list."""
+        learn_job = self.learn_queue.running.get(job['id'])
+        if learn_job is not None and learn_job.learn_progress is not None:
+            progress = learn_job.learn_progress
+            if progress.unrecognised:
+                return f"{job['name']}: running on {job['workers']} cores for {format_duration(progress.elapsed())}"
+            return f"{job['name']}: running on {job['workers']} cores, {progress.completed}/{job['params']['nchains']} chains"
+        return f"{job['name']}: {job['state']}"
+
+    def selected_job_id(self):
+        item = self.queue_list.currentItem()
+        return item.data(Qt.UserRole) if item is not None else None
+
+    def update_learn_progress(self, *args):
+        """Show the completed chains, estimated time left and time since the last output of the selected running job."""
+        running = self.learn_queue.running
+        job_id = self.selected_job_id()
+        if job_id not in running:
+            job_id = next(iter(running), None)
+        if job_id is None or running[job_id].learn_progress is None:
+            self.progress_widget.hide()
+            return
 
-        if result:
-            QMessageBox.information(self, "Success", f"Monte Carlo computation runned successfully!\nThe results are saved in the '{datafile_name}' folder.")
-            self.file_manager.refresh()
+        for index in range(self.queue_list.count()):
+            item = self.queue_list.item(index)
+            job = self.learn_queue.get(item.data(Qt.UserRole))
+            if job is not None and job['id'] in running:
+                item.setText(self.job_text(job))
+
+        job = self.learn_queue.get(job_id)
+        progress = running[job_id].learn_progress
+        if progress.completed:
+            self.progress_bar.setRange(0, progress.nchains)
+            self.progress_bar.setValue(progress.completed)
+        else:
+            # Busy indicator until a chain is seen to finish, so a run is never shown as stuck at 0
+            self.progress_bar.setRange(0, 0)
+
+        eta = progress.eta()
+        if eta is not None:
+            eta_text = f"about {format_duration(eta)} left"
+        elif progress.unrecognised:
+            eta_text = "chain progress not reported by inferno"
         else:
-            QMessageBox.critical(self, "Error", "An error occurred while running the computation")
\ No newline at end of file
+            eta_text = "estimating time left..."
+        self.progress_label.setText(
+            f"{job['name']}\n"
+            f"Elapsed: {format_duration(progress.elapsed())}, {eta_text}\n"
+            f"Last output {format_duration(progress.idle())} ago"
+        )
+        self.progress_widget.show()
+
+    def cancel_learn_function(self):
+        """Cancel the selected queued or running job after confirmation, or remove an ended job from the list."""
+        job = self.learn_queue.get(self.selected_job_id())
+        if job is None:
+            QMessageBox.warning(self, "Error", "No job selected.")
+            return
+        if job['state'] not in ("queued", "running"):
+            self.learn_queue.remove(job['id'])
+            return
+
+        message = f"Are you sure you want to cancel the computation '{job['name']}'?"
+        if job['state'] == "running":
+            message += "\nThe partial results will be deleted."
+        confirmation = QMessageBox.question(self, "Cancel Computation", message, QMessageBox.Yes | QMessageBox.No)
+        if confirmation == QMessageBox.Yes:
+            self.learn_queue.cancel(job['id'])
+
+    def on_learn_job_ended(self, job):
+        """Refresh the learnt folders when a job ends and report failures."""
+        if job['state'] == "finished":
+            self.file_manager.learnt_folder_changed.emit(job['outputdir'])
+        self.file_manager.refresh()
+        if job['state'] == "failed":
+            QMessageBox.critical(self, "Error", f"An error occurred while running the computation '{job['name']}':\n{job['message']}")
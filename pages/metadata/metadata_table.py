@@ -0,0 +1,223 @@
+import pandas as pd
+from PySide6.QtWidgets import QTableView, QStyledItemDelegate, QComboBox, QLineEdit, QStyle, QStyleOptionComboBox, QApplication
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer
+from PySide6.QtGui import QColor
+from data_processing.metadata_engine import MetadataValidator, TYPES, CONTINUOUS_COLUMNS
+
+
+INVALID_ROW_COLOR = QColor("#fdecea")
+
+
+class MetadataTableModel(QAbstractTableModel):
+    """Metadata table stored column by column as lists of strings.
+
+    Editability is computed from the type of each row and the kind of each column, so nothing is stored per cell
+    and opening or scrolling the table does not depend on the number of variables. Rows breaking a metadata rule
+    are highlighted; each edit re-validates only its row.
+    """
+
+    def __init__(self, header_tooltips=None, parent=None):
+        super().__init__(parent)
+        self.header_tooltips = header_tooltips or {}
+        self.column_names = []
+        self.columns = []  # one list of strings per column
+        self._kinds = []
+        self._type_column = None
+        self.validator = MetadataValidator({})
+
+    ####### Loading and saving #######
+    def set_frame(self, metadata_df):
+        """Replace the table with the values of a DataFrame, shown as strings."""
+        self.beginResetModel()
+        self.column_names = [str(name) for name in metadata_df.columns]
+        self.columns = [[str(value) for value in metadata_df[name].tolist()] for name in metadata_df.columns]
+        self._update_kinds()
+        self.validator = MetadataValidator(self.column_map())
+        self.endResetModel()
+
+    def to_frame(self):
+        return pd.DataFrame({name: column for name, column in zip(self.column_names, self.columns)}, columns=self.column_names)
+
+    def column_map(self):
+        """Return the columns by name, without copying them."""
+        return dict(zip(self.column_names, self.columns))
+
+    def column(self, name):
+        """Return the values of a column, or None if there is no such column."""
+        if name not in self.column_names:
+            return None
+        return self.columns[self.column_names.index(name)]
+
+    def v_columns(self):
+        return [name for name in self.column_names if name.startswith("V")]
+
+    def row_type(self, row):
+        return self.columns[self._type_column][row] if self._type_column is not None else ""
+
+    def _update_kinds(self):
+        self._kinds = []
+        for name in self.column_names:
+            if name == "type":
+                self._kinds.append("type")
+            elif name.startswith("V"):
+                self._kinds.append("V")
+            elif name in CONTINUOUS_COLUMNS:
+                self._kinds.append("continuous")
+            else:
+                self._kinds.append("other")
+        self._type_column = self._kinds.index("type") if "type" in self._kinds else None
+
+    ####### Qt model interface #######
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or not self.columns:
+            return 0
+        return len(self.columns[0])
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.column_names)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return self.columns[index.column()][index.row()]
+        if role == Qt.BackgroundRole and index.row() in self.validator.violations:
+            return INVALID_ROW_COLOR
+        if role == Qt.ToolTipRole and index.row() in self.validator.violations:
+            return "\n".join(self.validator.row_messages(index.row()))
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal:
+            if role == Qt.DisplayRole:
+                return self.column_names[section]
+            if role == Qt.ToolTipRole:
+                return self.header_tooltips.get(self.column_names[section], '')
+        elif role == Qt.DisplayRole:
+            return str(section + 1)
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if self.is_editable(index.row(), index.column()):
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def is_editable(self, row, column):
+        """Whether a cell can be edited, given the type of its row."""
+        kind = self._kinds[column]
+        if kind == "type":
+            return True
+        row_type = self.row_type(row)
+        if row_type == "nominal":
+            return kind == "V"
+        if row_type == "continuous":
+            return kind == "continuous"
+        return True  # "ordinal": all columns editable
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.EditRole:
+            return False
+        row, column = index.row(), index.column()
+        value = str(value)
+        if self.columns[column][row] == value:
+            return True
+        self.columns[column][row] = value
+        if self._kinds[column] == "type":
+            self.reset_row(row, value)
+        self.validator.validate(self.column_map(), [row])
+        self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+        return True
+
+    def reset_row(self, row, selected_type):
+        """Clear the fields of a row that do not apply to its type."""
+        if selected_type == "nominal":
+            reset_kind = "continuous"
+        elif selected_type == "continuous":
+            reset_kind = "V"
+        else:
+            return  # No columns to reset for "ordinal"
+        for column, kind in enumerate(self._kinds):
+            if kind == reset_kind:
+                self.columns[column][row] = ''
+
+    ####### V columns #######
+    def add_v_column(self):
+        """Append an empty 'V' column."""
+        name = f"V{len(self.v_columns()) + 1}"
+        position = len(self.column_names)
+        self.beginInsertColumns(QModelIndex(), position, position)
+        self.column_names.append(name)
+        self.columns.append([''] * self.rowCount())
+        self._update_kinds()
+        self.endInsertColumns()
+
+    def remove_v_column(self):
+        """Remove the last 'V' column, keeping at least two."""
+        v_indices = [column for column, kind in enumerate(self._kinds) if kind == "V"]
+        if len(v_indices) <= 2:
+            return
+        position = v_indices[-1]
+        self.beginRemoveColumns(QModelIndex(), position, position)
+        del self.column_names[position]
+        del self.columns[position]
+        self._update_kinds()
+        self.endRemoveColumns()
+        # Removing a V column can break the nominal and ordinal rules of any row
+        self.validator.validate(self.column_map())
+        self.dataChanged.emit(self.index(0, 0), self.index(self.rowCount() - 1, self.columnCount() - 1))
+
+
+class TypeDelegate(QStyledItemDelegate):
+    """Draws the 'type' cells as combo boxes and edits them with one, without a widget per row."""
+
+    def __init__(self, item_tooltips=None, parent=None):
+        super().__init__(parent)
+        self.item_tooltips = item_tooltips or {}
+
+    def paint(self, painter, option, index):
+        widget = option.widget
+        style = widget.style() if widget else QApplication.style()
+        combo_option = QStyleOptionComboBox()
+        combo_option.rect = option.rect
+        combo_option.state = option.state | QStyle.State_Enabled
+        combo_option.currentText = index.data()
+        combo_option.frame = True
+        style.drawComplexControl(QStyle.CC_ComboBox, combo_option, painter, widget)
+        style.drawControl(QStyle.CE_ComboBoxLabel, combo_option, painter, widget)
+
+    def createEditor(self, parent, option, index):
+        combo = QComboBox(parent)
+        combo.addItems(TYPES)
+        for position, name in enumerate(TYPES):
+            combo.setItemData(position, self.item_tooltips.get(name, ''), Qt.ToolTipRole)
+        combo.activated.connect(lambda _, combo=combo: self._commit(combo))
+        QTimer.singleShot(0, combo.showPopup)
+        return combo
+
+    def setEditorData(self, editor, index):
+        editor.setCurrentText(index.data())
+
+    def setModelData(self, editor, model, index):
+        model.setData(index, editor.currentText())
+
+    def _commit(self, combo):
+        self.commitData.emit(combo)
+        self.closeEditor.emit(combo)
+
+
+class MetadataTableView(QTableView):
+    """Table view that starts editing an editable cell with a single click and shows the edits as they are typed."""
+
+    def mousePressEvent(self, event):
+        super().mousePressEvent(event)
+        index = self.indexAt(event.pos())
+        if not index.isValid() or not (index.flags() & Qt.ItemIsEditable):
+            return
+        self.edit(index)
+        editor = self.indexWidget(index)
+        if isinstance(editor, QLineEdit):
+            editor.setCursorPosition(len(editor.text()))
+            editor.textChanged.connect(lambda text, index=index: self.model().setData(index, text))
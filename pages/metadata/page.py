@@ -1,11 +1,12 @@
 import os
 import pandas as pd
-from functools import partial
-from PySide6.QtWidgets import (QWidget, QVBoxLayout, QPushButton, QTableWidget, QTableWidgetItem,
-                               QComboBox, QGridLayout, QListWidget, QGroupBox, QStackedWidget, QMessageBox, QFileDialog,
-                               QLabel, QSpacerItem, QSizePolicy, QHBoxLayout, QLineEdit, QInputDialog)
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QPushButton, QGridLayout, QListWidget, QGroupBox, QStackedWidget,
+                               QMessageBox, QFileDialog, QLabel, QSpacerItem, QSizePolicy, QHBoxLayout, QInputDialog)
 from PySide6.QtCore import Qt
-from r_integration.inferno_functions import build_metadata
+from r_integration.r_executor import get_executor
+from pages.metadata.metadata_table import MetadataTableModel, TypeDelegate, MetadataTableView
+from data_processing.metadata_engine import normalize_metadata, format_report
+from data_processing.dataset_profile import format_profile
 import json
 import importlib.resources
 from appdirs import user_data_dir
@@ -23,30 +24,13 @@ APP_DIR = user_data_dir("Inferno App", "inferno")
 UPLOAD_FOLDER = os.path.join(APP_DIR, 'uploads')
 METADATA_FOLDER = os.path.join(APP_DIR, 'metadata')
 
-class CustomTableWidget(QTableWidget):
-    def mousePressEvent(self, event):
-        super().mousePressEvent(event)
-        item = self.itemAt(event.pos())
-        if item:
-            if not (item.flags() & Qt.ItemIsEditable):
-                return
-            self.editItem(item)
-            editor = self.indexWidget(self.currentIndex())
-            if isinstance(editor, QLineEdit):
-                editor.setCursorPosition(len(editor.text()))
-                editor.textChanged.connect(lambda: self.update_cell_display(editor))
-
-    def update_cell_display(self, editor):
-        """Update the cell display with the current text in the editor."""
-        current_index = self.currentIndex()
-        self.model().setData(current_index, editor.text())
-
 class MetadataPage(QWidget):
     def __init__(self, file_manager):
         super().__init__()
         self.file_manager = file_manager
         self.selected_file_path = None
         self.selected_metadata_path = None
+        self.metadata_task = None
 
         layout = QVBoxLayout()
 
@@ -68,6 +52,7 @@ class MetadataPage(QWidget):
         self.setStyleSheet(common_style + page_style)
 
         self.file_manager.files_updated.connect(self.load_files)
+        self.file_manager.profile_ready.connect(self.on_profile_ready)
         self.file_manager.refresh()
 
     def create_file_management_panel(self):
@@ -98,6 +83,12 @@ class MetadataPage(QWidget):
         file_list_layout.setContentsMargins(20, 40, 10, 10) # left, top, right, bottom
         file_list_layout.setSpacing(20)
 
+        # Profile of the selected file, computed once per upload
+        self.file_profile_label = QLabel("")
+        self.file_profile_label.setAlignment(Qt.AlignHCenter)
+        self.file_profile_label.setWordWrap(True)
+        file_list_layout.addWidget(self.file_profile_label)
+
         file_button_layout = QHBoxLayout()
         file_button_layout.setAlignment(Qt.AlignHCenter)
         file_button_layout.setSpacing(20)
@@ -177,9 +168,13 @@ class MetadataPage(QWidget):
         self.meta_title.setContentsMargins(0, 0, 0, 10) # left, top, right, bottom
         layout.addWidget(self.meta_title)
 
-        # Create the table widget to display the metadata
-        self.table_widget = CustomTableWidget()
-        layout.addWidget(self.table_widget)
+        # Create the table view to display the metadata
+        self.metadata_model = MetadataTableModel(header_tooltips)
+        self.table_view = MetadataTableView()
+        self.table_view.setModel(self.metadata_model)
+        self.type_delegate = TypeDelegate(combobox_item_tooltips, self.table_view)
+        self.table_view.verticalHeader().setDefaultSectionSize(40)
+        layout.addWidget(self.table_view)
 
         # Create a horizontal layout for the buttons
         button_width = 100
@@ -228,6 +223,7 @@ class MetadataPage(QWidget):
     def load_files(self):
         """Load the list of uploaded files from the FileManager."""
         self.file_list.clear()
+        self.file_profile_label.setText("")
         if self.file_manager.uploaded_files:
             self.file_list.addItems(self.file_manager.uploaded_files)
         else:
@@ -263,26 +259,59 @@ class MetadataPage(QWidget):
         
         if folder == UPLOAD_FOLDER:
             self.selected_file_path = os.path.join(folder, file_name)
+            self.show_file_profile()
 
         if folder == METADATA_FOLDER:
             self.selected_metadata_path = os.path.join(folder, file_name)
 
+    def show_file_profile(self):
+        """Describe the selected uploaded file from its profile, which is computed in the background if missing."""
+        if not self.selected_file_path or not os.path.exists(self.selected_file_path):
+            self.file_profile_label.setText("")
+            return
+        profile = self.file_manager.get_profile(self.selected_file_path)
+        self.file_profile_label.setText(format_profile(profile) if profile else "Profiling...")
+
+    def on_profile_ready(self, file_path):
+        if file_path == self.selected_file_path:
+            self.show_file_profile()
+
     def process_file(self):
         """Generate metadata for the selected uploaded file."""
         if self.selected_file_path:
             metadata_file_name = f"metadata_{os.path.basename(self.selected_file_path)}"
             metadata_file_path = os.path.join(METADATA_FOLDER, metadata_file_name)
 
-            self.metadata_file_path = build_metadata(self.selected_file_path, metadata_file_path)
-            self.file_manager.refresh()
-
-            self.display_metadata(self.metadata_file_path)
-            self.stacked_widget.setCurrentWidget(self.metadata_editing_panel)
+            self.generate_button.setEnabled(False)
+            self.generate_button.setText("Generating...")
 
-            QMessageBox.information(self, "Success", "Metadata generated successfully.")
+            self.metadata_task = get_executor().submit('build_metadata', self.selected_file_path, metadata_file_path)
+            self.metadata_task.finished.connect(self.on_metadata_generated)
+            self.metadata_task.failed.connect(self.on_metadata_failed)
         else:
             QMessageBox.warning(self, "Error", "Please select a file to generate metadata.")
 
+    def on_metadata_generated(self, metadata_file_path):
+        """Open the generated metadata file in the editing panel."""
+        self.generate_button.setEnabled(True)
+        self.generate_button.setText("Generate")
+        self.metadata_task = None
+
+        self.metadata_file_path = metadata_file_path
+        self.file_manager.refresh()
+
+        self.display_metadata(self.metadata_file_path)
+        self.stacked_widget.setCurrentWidget(self.metadata_editing_panel)
+
+        QMessageBox.information(self, "Success", "Metadata generated successfully.")
+
+    def on_metadata_failed(self, error):
+        """Report a failed metadata generation."""
+        self.generate_button.setEnabled(True)
+        self.generate_button.setText("Generate")
+        self.metadata_task = None
+        QMessageBox.critical(self, "Error", f"Failed to generate metadata: {str(error)}")
+
     def modify_metadata(self):
         """Display the metadata editing panel to modify an existing metadata file."""
         if self.selected_metadata_path:
@@ -314,174 +343,30 @@ class MetadataPage(QWidget):
 
     ####### Metadata Editing Panel Functions #######
     def display_metadata(self, metadata_file_path):
-        """Display metadata in the table widget with tooltips."""
+        """Display metadata in the table view with tooltips."""
         metadata_df = pd.read_csv(metadata_file_path)
-        metadata_df = self.replace_empty_values(metadata_df)
+        metadata_df = normalize_metadata(metadata_df)
         metadata_df = metadata_df.fillna('')
-        
-        self.table_widget.setRowCount(len(metadata_df))
-        self.table_widget.setColumnCount(len(metadata_df.columns))
-        self.table_widget.setHorizontalHeaderLabels(metadata_df.columns)
-
-        header_tooltip_dict = {column_name: header_tooltips.get(column_name, '') for column_name in metadata_df.columns}
-
-        for i, column_name in enumerate(metadata_df.columns):
-            header_item = self.table_widget.horizontalHeaderItem(i)
-            header_item.setToolTip(header_tooltip_dict[column_name])
-
-        row_height = 40
-        for row in range(self.table_widget.rowCount()):
-            self.table_widget.setRowHeight(row, row_height)
 
+        self.metadata_model.set_frame(metadata_df)
         type_column = metadata_df.columns.get_loc("type")
-        self.table_widget.setColumnWidth(type_column, 130)
-
-        combobox_tooltip_dict = {
-            "nominal": combobox_item_tooltips.get("nominal", ''),
-            "ordinal": combobox_item_tooltips.get("ordinal", ''),
-            "continuous": combobox_item_tooltips.get("continuous", '')
-        }
-
-        for i, row in metadata_df.iterrows():
-            for j, value in enumerate(row):
-                column_name = metadata_df.columns[j]
-
-                if column_name == "type":
-                    combo = QComboBox()
-                    combo.addItems(["nominal", "ordinal", "continuous"])
-                    combo.setCurrentText(str(value))
-                    combo.currentIndexChanged.connect(partial(self.on_type_combobox_change, i, combo))
-
-                    for index in range(combo.count()):
-                        item_text = combo.itemText(index)
-                        combo.setItemData(index, combobox_tooltip_dict[item_text], Qt.ToolTipRole)
-
-                    self.table_widget.setCellWidget(i, j, combo)
-                else:
-                    item = QTableWidgetItem(str(value))
-                    self.table_widget.setItem(i, j, item)
-            
-            initial_type = self.table_widget.cellWidget(i, type_column).currentText()
-            self.update_editability(i, initial_type)
+        for column in range(self.metadata_model.columnCount()):
+            self.table_view.setItemDelegateForColumn(column, self.type_delegate if column == type_column else None)
+        self.table_view.setColumnWidth(type_column, 130)
 
         self.meta_title.setText(f"Editing Metadata File: {os.path.basename(metadata_file_path)}")
 
-    def replace_empty_values(self, metadata_df):
-        """Replace empty values in the metadata DataFrame based on type."""
-        for index, row in metadata_df.iterrows():
-            row_type = row["type"]
-
-            if row_type == "continuous":
-                self.replace(row, metadata_df, index)
-
-            elif row_type == "ordinal":
-                v_columns = [col for col in metadata_df.columns if col.startswith("V")]
-                v_values = [row[col] for col in v_columns if col in metadata_df.columns]
-
-                if all(pd.isna(val) or val == "" for val in v_values):
-                    self.replace(row, metadata_df, index)
-
-        return metadata_df
-    
-    def replace(self, row, metadata_df, index):
-        if pd.isna(row.get("domainmin", None)):
-            metadata_df.at[index, "domainmin"] = float("-Inf")
-        if pd.isna(row.get("domainmax", None)):
-            metadata_df.at[index, "domainmax"] = float("+Inf")
-        if pd.isna(row.get("datastep", None)):
-            metadata_df.at[index, "datastep"] = 1.0
-        if pd.isna(row.get("minincluded", None)):
-            metadata_df.at[index, "minincluded"] = "False"
-        if pd.isna(row.get("maxincluded", None)):
-            metadata_df.at[index, "maxincluded"] = "False"
-
-    def on_type_combobox_change(self, row_index, combo, index):
-        selected_type = combo.currentText()
-        self.reset_row(row_index, selected_type)
-        self.update_editability(row_index, selected_type)
-
-    def update_editability(self, row_index, selected_type):
-        """Enable or disable cells based on the value of the 'type' column."""
-        column_names = [self.table_widget.horizontalHeaderItem(i).text() for i in range(self.table_widget.columnCount())]
-
-        if selected_type == "nominal":
-            editable_columns = [col for col in column_names if col.startswith("V")]
-        elif selected_type == "continuous":
-            editable_columns = ["datastep", "domainmin", "domainmax", "minincluded", "maxincluded"]
-        else:  # "ordinal"
-            editable_columns = column_names  # All columns editable
-
-        for col_index, column_name in enumerate(column_names):
-            item = self.table_widget.item(row_index, col_index)
-            if item:
-                if column_name in editable_columns:
-                    item.setFlags(item.flags() | Qt.ItemIsEditable) # Enable editing
-                else:
-                    item.setFlags(item.flags() & ~Qt.ItemIsEditable) # Disable editing
-
-    def reset_row(self, row_index, selected_type):
-        """Reset irrelevant fields in the row based on the selected type."""
-        column_names = [self.table_widget.horizontalHeaderItem(i).text() for i in range(self.table_widget.columnCount())]
-
-        if selected_type == "nominal":
-            reset_columns = ["datastep", "domainmin", "domainmax", "minincluded", "maxincluded"]
-        elif selected_type == "continuous":
-            reset_columns = [col for col in column_names if col.startswith("V")]
-        else:
-            reset_columns = []  # No columns to reset for "ordinal"
-
-        for col_index, column_name in enumerate(column_names):
-            if column_name in reset_columns:
-                item = self.table_widget.item(row_index, col_index)
-                if item:
-                    item.setText('')  # Clear the value
-
     def on_save_button_clicked(self):
         """Validate and save the metadata file if validation passes."""
         if self.validate_metadata():
             self.save_metadata_file()
     
     def validate_metadata(self):
-        column_names = [self.table_widget.horizontalHeaderItem(i).text() for i in range(self.table_widget.columnCount())]
-        type_column_index = column_names.index("type")
-
-        v_columns = [i for i, col in enumerate(column_names) if col.startswith("V")]
-        continuous_columns = ["datastep", "domainmin", "domainmax", "minincluded", "maxincluded"]
-        continuous_indices = [column_names.index(col) for col in continuous_columns if col in column_names]
-
-        acceptable_values = {'', 'true', 'false', 'True', 'False', 'TRUE', 'FALSE'}  # Acceptable value for 'minincluded' and 'maxincluded'
-
-        for i in range(self.table_widget.rowCount()):
-            type_value = self.table_widget.cellWidget(i, type_column_index).currentText()
-            v_values = [self.table_widget.item(i, v_index).text().strip() for v_index in v_columns]
-            continuous_values = [self.table_widget.item(i, cont_index).text().strip() for cont_index in continuous_indices]
-
-            if type_value == "nominal":
-                valid_v_count = sum(bool(self.table_widget.item(i, v_index).text().strip()) for v_index in v_columns)
-                if valid_v_count < 2:
-                    QMessageBox.warning(self, "Validation Error", f"Row {i+1}: 'Nominal' type requires at least 2 'V' columns with values.")
-                    return False
-
-            elif type_value == "continuous":
-                if not all(continuous_values) or any(v_values):
-                    QMessageBox.warning(self, "Validation Error", f"Row {i+1}: Variables with type 'Continuous' requires values in all fields except the 'V' columns.")
-                    return False
-                minincluded_index = column_names.index("minincluded")
-                maxincluded_index = column_names.index("maxincluded")
-                minincluded_value = self.table_widget.item(i, minincluded_index).text().strip()
-                maxincluded_value = self.table_widget.item(i, maxincluded_index).text().strip()
-                if minincluded_value not in acceptable_values or maxincluded_value not in acceptable_values:
-                    QMessageBox.warning(self, "Validation Error", f"Row {i+1}: 'minincluded' and 'maxincluded' must be empty, 'False' or 'TRUE'.")
-                    return False
-
-            elif type_value == "ordinal":
-                has_v_values = any(v_values)
-                has_continuous_values = any(continuous_values)
-
-                if has_v_values == has_continuous_values:  # Both True or both False
-                    QMessageBox.warning(self, "Validation Error", f"Row {i+1}: Variables with type 'Ordinal' requires values in either the 'V' columns or the other fields, but not both.")
-                    return False
-
+        """Report every row that breaks a metadata rule; the rows are also highlighted in the table."""
+        report = self.metadata_model.validator.report()
+        if len(report):
+            QMessageBox.warning(self, "Validation Error", format_report(report, limit=10))
+            return False
         return True
 
     def save_metadata_file(self):
@@ -494,17 +379,7 @@ class MetadataPage(QWidget):
             QMessageBox.warning(self, "Error", "No file selected to save.")
             return
 
-        metadata_df = pd.DataFrame(columns=[self.table_widget.horizontalHeaderItem(i).text() for i in range(self.table_widget.columnCount())])
-        for i in range(self.table_widget.rowCount()):
-            row = []
-            for j in range(self.table_widget.columnCount()):
-                if isinstance(self.table_widget.cellWidget(i, j), QComboBox):
-                    row.append(self.table_widget.cellWidget(i, j).currentText())
-                else:
-                    row.append(self.table_widget.item(i, j).text())
-            metadata_df.loc[i] = row
-            
-        metadata_df.to_csv(metadata_file_path, index=False)
+        self.metadata_model.to_frame().to_csv(metadata_file_path, index=False)
         QMessageBox.information(self, "Metadata Saved", "Metadata file saved successfully.")
         self.stacked_widget.setCurrentWidget(self.file_management_panel)
 
@@ -516,28 +391,8 @@ class MetadataPage(QWidget):
 
     def add_v_column(self):
         """Add a new 'V' column to the metadata table."""
-        current_v_columns = [col for col in [self.table_widget.horizontalHeaderItem(i).text() for i in range(self.table_widget.columnCount())] if col.startswith('V')]
-        new_v_column_name = f"V{len(current_v_columns) + 1}"
-        self.table_widget.insertColumn(self.table_widget.columnCount())
-        column_index = self.table_widget.columnCount() - 1
-        self.table_widget.setHorizontalHeaderItem(column_index, QTableWidgetItem(new_v_column_name))
-
-        type_column_index = 1 # 'type' column index
-
-        for row_index in range(self.table_widget.rowCount()):
-            selected_type = self.table_widget.cellWidget(row_index, type_column_index).currentText()
-
-            new_item = QTableWidgetItem('')
-            self.table_widget.setItem(row_index, column_index, new_item)
+        self.metadata_model.add_v_column()
 
-            if selected_type == "nominal" or selected_type == "ordinal":
-                new_item.setFlags(new_item.flags() | Qt.ItemIsEditable)
-            else:
-                new_item.setFlags(new_item.flags() & ~Qt.ItemIsEditable)
-  
     def remove_v_column(self):
         """Remove the last 'V' column from the metadata table."""
-        current_v_columns = [i for i, col in enumerate([self.table_widget.horizontalHeaderItem(i).text() for i in range(self.table_widget.columnCount())]) if col.startswith('V')]
-        if len(current_v_columns) > 2:
-            self.table_widget.removeColumn(current_v_columns[-1])
-     
\ No newline at end of file
+        self.metadata_model.remove_v_column()
@@ -0,0 +1,291 @@
+import os
+import numpy as np
+import pandas as pd
+from PySide6.QtWidgets import QMessageBox, QTableWidgetItem
+from PySide6.QtCore import Qt
+from r_integration.r_executor import get_executor
+from r_integration.mi_ranking import MIRanking, SuccessiveHalvingRanking, mi_estimate
+from r_integration.mi_selection import ForwardSelection
+from appdirs import user_data_dir
+
+
+APP_DIR = user_data_dir("Inferno App", "inferno")
+LEARNT_FOLDER = os.path.join(APP_DIR, 'learnt')
+
+RESULT_COLUMNS = ["Y1", "Y2", "MI", "Error", "MImax", "Status"]
+RANKING_COLUMNS = ["Rank", "Variable", "MI", "Error", "Samples", "Status"]
+SELECTION_COLUMNS = ["Step", "Variable", "Joint MI", "Error", "Gain", "Status"]
+
+
+def load_mi_variables(self):
+    """Load the variables of the selected learnt folder into the Y1, Y2, target and candidate lists."""
+    self.Y1_listwidget.clear()
+    self.Y2_listwidget.clear()
+    self.target_combobox.clear()
+    self.candidates_listwidget.clear()
+    learnt_folder = self.mi_learnt_combobox.currentText()
+    metadata_path = os.path.join(LEARNT_FOLDER, learnt_folder, 'metadata.csv')
+    if not os.path.exists(metadata_path):
+        QMessageBox.warning(None, "Error", "Metadata file not found.")
+        return False
+
+    try:
+        variables = pd.read_csv(metadata_path)["name"].tolist()
+    except Exception as e:
+        QMessageBox.critical(None, "Error", f"Failed to load metadata: {str(e)}")
+        return False
+
+    self.Y1_listwidget.addItems(variables)
+    self.Y2_listwidget.addItems(variables)
+    self.target_combobox.addItems(variables)
+    self.candidates_listwidget.addItems(variables)
+    return True
+
+def build_mi_queries(self):
+    """Return the (Y1names, Y2names) pairs to compute for the current selection, or None if it is invalid."""
+    y1 = [item.text() for item in self.Y1_listwidget.selectedItems()]
+    y2 = [item.text() for item in self.Y2_listwidget.selectedItems()]
+    if not y1:
+        QMessageBox.warning(self, "Error", "Please select at least one Y1 variable.")
+        return None
+    if set(y1) & set(y2):
+        QMessageBox.warning(self, "Error", "The Y1 and Y2 variables must not overlap.")
+        return None
+    if not y2 and (len(y1) < 2 or not self.separate_checkbox.isChecked()):
+        QMessageBox.warning(self, "Error", "Please select the Y2 variable(s) to compute the mutual information with.")
+        return None
+
+    if not self.separate_checkbox.isChecked():
+        return [(y1, y2)]
+    if y2:
+        return [([name], y2) for name in y1]
+    # Without Y2 variables, every Y1 variable is paired with the other selected ones
+    return [([name], [other for other in y1 if other != name]) for name in y1]
+
+def run_mi_queries(self):
+    """Queue one mutualinfo task per query and add a row for each to the results table."""
+    queries = build_mi_queries(self)
+    if queries is None:
+        return
+
+    cancel_mi_queries(self)
+    learnt_dir = os.path.join(LEARNT_FOLDER, self.mi_learnt_combobox.currentText())
+    nsamples = self.nsamples_spinbox.value()
+    unit = self.unit_combobox.currentText()
+
+    self.results_table.setRowCount(0)
+    for y1, y2 in queries:
+        row = self.results_table.rowCount()
+        self.results_table.insertRow(row)
+        set_mi_row(self, row, [", ".join(y1), ", ".join(y2), "", "", "", "Pending"])
+        task = get_executor().submit('run_mutualinfo', y1, learnt_dir, y2, None, nsamples=nsamples, unit=unit)
+        task.finished.connect(lambda result, task=task, row=row: on_mi_finished(self, task, row, result))
+        task.failed.connect(lambda error, task=task, row=row: on_mi_failed(self, task, row, error))
+        self.pending_tasks.append(task)
+    update_mi_status(self)
+
+def on_mi_finished(self, task, row, result):
+    """Show the result of one finished mutualinfo task in its row."""
+    if not finish_mi_task(self, task):
+        return
+    mi, error = mi_estimate(result, 'MI')
+    mi_max, _ = mi_estimate(result, 'MImax')
+    unit = result.get('unit', '')
+    set_mi_row(self, row, [None, None, format_mi(mi, unit), format_mi(error, unit), format_mi(mi_max, unit), "Done"])
+    self.results[row] = result
+
+def on_mi_failed(self, task, row, error):
+    """Report a failed mutualinfo task in its row."""
+    if not finish_mi_task(self, task):
+        return
+    set_mi_row(self, row, [None, None, "", "", "", "Failed"])
+    self.results_table.item(row, RESULT_COLUMNS.index("Status")).setToolTip(str(error))
+
+def cancel_mi_queries(self):
+    """Cancel the queued mutualinfo tasks; a task that is already running finishes, but its result is dropped."""
+    for task in self.pending_tasks:
+        task.cancel()
+    for row in range(self.results_table.rowCount()):
+        status = self.results_table.item(row, RESULT_COLUMNS.index("Status"))
+        if status is not None and status.text() == "Pending":
+            status.setText("Cancelled")
+    self.pending_tasks = []
+    self.results = {}
+    update_mi_status(self)
+
+def finish_mi_task(self, task):
+    """Mark a task as done and return whether its result belongs to the current queries."""
+    if task not in self.pending_tasks:
+        return False
+    self.pending_tasks.remove(task)
+    update_mi_status(self)
+    return True
+
+def update_mi_status(self):
+    total = self.results_table.rowCount()
+    ranking_running = self.ranking is not None and self.ranking.state == "running"
+    selection_running = self.selection is not None and self.selection.state == "running"
+    if selection_running:
+        step = len(self.selection.selected) + 1
+        self.mi_status_label.setText(f"Selecting predictors on {self.selection.pool.size} worker(s)... step {step}, "
+                                     f"{self.selection.pending_count()} candidate(s) left")
+    elif ranking_running:
+        rows = self.ranking.rows.values()
+        done = sum(1 for row in rows if row['status'] != "Pending")
+        self.mi_status_label.setText(f"Ranking variables on {self.ranking.pool.size} worker(s)... {done} of {len(rows)} done")
+    elif self.pending_tasks:
+        self.mi_status_label.setText(f"Computing mutual information... {total - len(self.pending_tasks)} of {total} done")
+    else:
+        self.mi_status_label.setText("")
+    self.cancel_button.setEnabled(bool(self.pending_tasks) or ranking_running or selection_running)
+
+def set_mi_row(self, row, values, table=None):
+    """Fill the cells of a results row, leaving cells given as None unchanged."""
+    table = table or self.results_table
+    for column, value in enumerate(values):
+        if value is None:
+            continue
+        item = QTableWidgetItem(value)
+        item.setFlags(item.flags() & ~Qt.ItemIsEditable)
+        table.setItem(row, column, item)
+
+############# RANKING #############
+def selected_candidates(self):
+    """Return the target and the candidate variables, all the other variables if none is selected, or None if invalid."""
+    target = self.target_combobox.currentText()
+    if not target:
+        QMessageBox.warning(self, "Error", "Please select a target variable.")
+        return None
+    candidates = [item.text() for item in self.candidates_listwidget.selectedItems() if item.text() != target]
+    if not candidates:
+        candidates = [self.candidates_listwidget.item(row).text() for row in range(self.candidates_listwidget.count())]
+        candidates = [name for name in candidates if name != target]
+    if not candidates:
+        QMessageBox.warning(self, "Error", "There are no candidate variables.")
+        return None
+    return target, candidates
+
+def run_ranking(self):
+    """Rank the candidate variables by their mutual information with the target, in parallel worker processes."""
+    selection = selected_candidates(self)
+    if selection is None:
+        return
+    target, candidates = selection
+
+    cancel_ranking(self)
+    learnt_dir = os.path.join(LEARNT_FOLDER, self.mi_learnt_combobox.currentText())
+    if self.adaptive_checkbox.isChecked():
+        self.ranking = SuccessiveHalvingRanking(learnt_dir, target, candidates, top_k=self.top_k_spinbox.value(),
+                                                nsamples=self.nsamples_spinbox.value(), unit=self.unit_combobox.currentText())
+    else:
+        self.ranking = MIRanking(learnt_dir, target, candidates, nsamples=self.nsamples_spinbox.value(),
+                                 unit=self.unit_combobox.currentText())
+    self.ranking.updated.connect(lambda ranking=self.ranking: on_ranking_updated(self, ranking))
+    self.ranking.finished.connect(lambda ranking=self.ranking: on_ranking_updated(self, ranking))
+    self.ranking.failed.connect(lambda error, ranking=self.ranking: on_ranking_failed(self, ranking, error))
+    self.export_button.setEnabled(False)
+    self.ranking.start()
+    on_ranking_updated(self, self.ranking)
+
+def on_ranking_updated(self, ranking):
+    """Refill the ranking table with the current, possibly partial, ranking."""
+    if ranking is not self.ranking:
+        return
+    rows = ranking.ranking()
+    self.ranking_table.setRowCount(len(rows))
+    for index, row in enumerate(rows):
+        rank = str(index + 1) if np.isfinite(row['MI']) else ""
+        set_mi_row(self, index, [rank, row['variable'], format_mi(row['MI'], ranking.unit),
+                                 format_mi(row['error'], ranking.unit), str(row['nsamples'] or ""), row['status']], self.ranking_table)
+        if 'message' in row:
+            self.ranking_table.item(index, RANKING_COLUMNS.index("Status")).setToolTip(str(row['message']))
+    self.export_button.setEnabled(ranking.state != "running" and any(np.isfinite(row['MI']) for row in rows))
+    update_mi_status(self)
+    if ranking.state == "finished" and isinstance(ranking, SuccessiveHalvingRanking):
+        self.mi_status_label.setText(ranking.summary())
+
+def on_ranking_failed(self, ranking, error):
+    if ranking is not self.ranking:
+        return
+    on_ranking_updated(self, ranking)
+    QMessageBox.critical(self, "Error", f"Failed to rank the variables: {error}")
+
+def cancel_ranking(self):
+    """Stop a running ranking; the candidates evaluated so far stay in the table."""
+    if self.ranking is None or self.ranking.state != "running":
+        return
+    self.ranking.cancel()
+    on_ranking_updated(self, self.ranking)
+
+def export_ranking(self, file_path):
+    if self.ranking is None:
+        return
+    try:
+        self.ranking.export(file_path)
+    except Exception as e:
+        QMessageBox.critical(self, "Error", f"Failed to export the ranking: {str(e)}")
+
+def format_mi(value, unit):
+    if value is None or not np.isfinite(value):
+        return ""
+    return f"{value:.4f} {unit}"
+
+############# FORWARD SELECTION #############
+def run_selection(self):
+    """Select predictors of the target among the candidate variables by forward selection on joint mutual information."""
+    selection = selected_candidates(self)
+    if selection is None:
+        return
+    target, candidates = selection
+
+    cancel_selection(self)
+    learnt_dir = os.path.join(LEARNT_FOLDER, self.mi_learnt_combobox.currentText())
+    nsamples = self.nsamples_spinbox.value()
+    unit = self.unit_combobox.currentText()
+    # Values computed by earlier selections with the same settings are reused
+    values = self.selection_values.setdefault((target, nsamples, unit), {})
+    self.selection = ForwardSelection(learnt_dir, target, candidates, threshold=self.threshold_spinbox.value(),
+                                      nsamples=nsamples, unit=unit, values=values)
+    self.selection.updated.connect(lambda selection=self.selection: on_selection_updated(self, selection))
+    self.selection.finished.connect(lambda selection=self.selection: on_selection_updated(self, selection))
+    self.selection.failed.connect(lambda error, selection=self.selection: on_selection_failed(self, selection, error))
+    self.export_button.setEnabled(False)
+    self.selection.start()
+    on_selection_updated(self, self.selection)
+
+def on_selection_updated(self, selection):
+    """Refill the selection table with the steps done so far."""
+    if selection is not self.selection:
+        return
+    self.selection_table.setRowCount(len(selection.steps))
+    for index, step in enumerate(selection.steps):
+        status = "Selected" if step['selected'] else "Below threshold"
+        set_mi_row(self, index, [str(step['step']), step['variable'], format_mi(step['MI'], selection.unit),
+                                 format_mi(step['error'], selection.unit), format_mi(step['gain'], selection.unit), status],
+                   self.selection_table)
+    self.export_button.setEnabled(selection.state != "running" and bool(selection.steps))
+    update_mi_status(self)
+    if selection.state == "finished":
+        self.mi_status_label.setText(f"Selected {len(selection.selected)} variable(s): {selection.evaluations} evaluation(s), "
+                                     f"{selection.reused} reused.")
+
+def on_selection_failed(self, selection, error):
+    if selection is not self.selection:
+        return
+    on_selection_updated(self, selection)
+    QMessageBox.critical(self, "Error", f"Failed to select the predictors: {error}")
+
+def cancel_selection(self):
+    """Stop a running selection; the steps done so far stay in the table."""
+    if self.selection is None or self.selection.state != "running":
+        return
+    self.selection.cancel()
+    on_selection_updated(self, self.selection)
+
+def export_selection(self, file_path):
+    if self.selection is None:
+        return
+    try:
+        self.selection.export(file_path)
+    except Exception as e:
+        QMessageBox.critical(self, "Error", f"Failed to export the selection: {str(e)}")
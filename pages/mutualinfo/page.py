@@ -1,23 +1,345 @@
+import os
 import importlib.resources
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame, QPushButton, QListWidget, QAbstractItemView, QSpinBox, QDoubleSpinBox, QCheckBox, QTableWidget, QHeaderView, QSizePolicy, QFileDialog
 from PySide6.QtCore import Qt
+from PySide6.QtGui import QFont
+from pages.mutualinfo.mi_functions import load_mi_variables, run_mi_queries, cancel_mi_queries, update_mi_status, run_ranking, cancel_ranking, export_ranking, run_selection, cancel_selection, export_selection, RESULT_COLUMNS, RANKING_COLUMNS, SELECTION_COLUMNS
+from pages.shared.custom_combobox import CustomComboBox
+from appdirs import user_data_dir
+
+
+APP_DIR = user_data_dir("Inferno App", "inferno")
+LEARNT_FOLDER = os.path.join(APP_DIR, 'learnt')
 
 class MutualInfoPage(QWidget):
     def __init__(self, file_manager):
         super().__init__()
         self.file_manager = file_manager
+        self.pending_tasks = []
+        self.results = {}
+        self.ranking = None
+        self.selection = None
+        self.selection_values = {}
 
         main_layout = QVBoxLayout()
 
+        font = QFont()
+        font.setPointSize(11)
+
         # Title
-        title = QLabel("Work In Progress ...")
+        title_layout = QVBoxLayout()
+        title_layout.setContentsMargins(0, 0, 0, 40)  # left, top, right, bottom
+        title = QLabel("Mutual Information")
         title.setObjectName("title")
         title.setAlignment(Qt.AlignCenter)
-        main_layout.addWidget(title)
+        title_layout.addWidget(title)
+        main_layout.addLayout(title_layout)
+
+        content_layout = QHBoxLayout()
+        content_layout.setContentsMargins(50, 0, 50, 20) # left, top, right, bottom
+
+        # --- Left side of the page ---
+        left_layout = QVBoxLayout()
+        left_layout.setAlignment(Qt.AlignTop)
+
+        input_label = QLabel("Data selection")
+        input_label.setObjectName("inputLabel")
+        left_layout.addWidget(input_label)
+
+        learnt_layout = QHBoxLayout()
+        learnt_layout.setSpacing(5)
+        learnt_label = QLabel("Select a learnt folder:")
+        learnt_label.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Preferred)
+        self.mi_learnt_combobox = CustomComboBox()
+        self.mi_learnt_combobox.setFont(font)
+        self.mi_learnt_combobox.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Preferred)
+        self.mi_learnt_combobox.currentIndexChanged.connect(self.on_learnt_folder_selected)
+        learnt_layout.addWidget(learnt_label)
+        learnt_layout.addWidget(self.mi_learnt_combobox)
+        left_layout.addLayout(learnt_layout)
+
+        # Variable selection frame
+        self.variable_selection_frame = QFrame()
+        self.variable_selection_frame.setObjectName("variableSelectionFrame")
+        self.variable_selection_frame.hide()
+        variable_selection_layout = QVBoxLayout(self.variable_selection_frame)
+        variable_selection_layout.setContentsMargins(0, 20, 0, 0) # left, top, right, bottom
+
+        mode_layout = QHBoxLayout()
+        mode_layout.setSpacing(5)
+        mode_label = QLabel("Select a computation:")
+        mode_label.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Preferred)
+        self.mode_combobox = CustomComboBox()
+        self.mode_combobox.setFont(font)
+        self.mode_combobox.addItems(["Mutual information", "Rank variables", "Select predictors"])
+        self.mode_combobox.setItemData(0, "Compute the mutual information between the Y1 and Y2 variables.", Qt.ToolTipRole)
+        self.mode_combobox.setItemData(1, "Rank candidate variables by their mutual information with a target variable,\n"
+                                          "evaluating the candidates in parallel worker processes.", Qt.ToolTipRole)
+        self.mode_combobox.setItemData(2, "Grow a set of predictors of a target variable one variable at a time,\n"
+                                          "adding the candidate with the largest joint mutual information until the gain is too small.", Qt.ToolTipRole)
+        self.mode_combobox.currentIndexChanged.connect(self.on_mode_selected)
+        mode_layout.addWidget(mode_label)
+        mode_layout.addWidget(self.mode_combobox)
+        variable_selection_layout.addLayout(mode_layout)
+
+        # Mutual information between two sets of variables
+        self.query_frame = QFrame()
+        query_layout = QVBoxLayout(self.query_frame)
+        query_layout.setContentsMargins(0, 10, 0, 0) # left, top, right, bottom
+
+        query_layout.addWidget(QLabel("Select Y1 variable(s):"))
+        self.Y1_listwidget = QListWidget()
+        self.Y1_listwidget.setFont(font)
+        self.Y1_listwidget.setSelectionMode(QAbstractItemView.MultiSelection)
+        query_layout.addWidget(self.Y1_listwidget)
+
+        query_layout.addWidget(QLabel("Select Y2 variable(s):"))
+        self.Y2_listwidget = QListWidget()
+        self.Y2_listwidget.setFont(font)
+        self.Y2_listwidget.setSelectionMode(QAbstractItemView.MultiSelection)
+        query_layout.addWidget(self.Y2_listwidget)
+
+        self.separate_checkbox = QCheckBox("Separate query for each Y1 variable")
+        self.separate_checkbox.setToolTip("Compute the mutual information of every selected Y1 variable on its own with the Y2 variables,\n"
+                                          "or with the other selected Y1 variables when no Y2 variable is selected.")
+        query_layout.addWidget(self.separate_checkbox)
+        variable_selection_layout.addWidget(self.query_frame)
+
+        # Ranking or selection of candidate variables against a target
+        self.ranking_frame = QFrame()
+        self.ranking_frame.hide()
+        ranking_layout = QVBoxLayout(self.ranking_frame)
+        ranking_layout.setContentsMargins(0, 10, 0, 0) # left, top, right, bottom
+
+        target_layout = QHBoxLayout()
+        target_layout.setSpacing(5)
+        target_label = QLabel("Select the target variable:")
+        target_label.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Preferred)
+        self.target_combobox = CustomComboBox()
+        self.target_combobox.setFont(font)
+        self.target_combobox.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Preferred)
+        target_layout.addWidget(target_label)
+        target_layout.addWidget(self.target_combobox)
+        ranking_layout.addLayout(target_layout)
+
+        ranking_layout.addWidget(QLabel("Select candidate variables (none selected ranks all of them):"))
+        self.candidates_listwidget = QListWidget()
+        self.candidates_listwidget.setFont(font)
+        self.candidates_listwidget.setSelectionMode(QAbstractItemView.MultiSelection)
+        ranking_layout.addWidget(self.candidates_listwidget)
+
+        self.adaptive_widget = QWidget()
+        adaptive_layout = QHBoxLayout(self.adaptive_widget)
+        adaptive_layout.setContentsMargins(0, 0, 0, 0) # left, top, right, bottom
+        self.adaptive_checkbox = QCheckBox("Adaptive ranking of the top")
+        self.adaptive_checkbox.setToolTip("Evaluate every candidate with few samples first, drop the ones clearly below the top variables\n"
+                                          "and evaluate the others again with more samples, until the top variables are resolved.")
+        adaptive_layout.addWidget(self.adaptive_checkbox)
+        self.top_k_spinbox = QSpinBox()
+        self.top_k_spinbox.setRange(1, 100)
+        self.top_k_spinbox.setValue(5)
+        adaptive_layout.addWidget(self.top_k_spinbox)
+        adaptive_layout.addWidget(QLabel("variables"))
+        adaptive_layout.addStretch()
+        ranking_layout.addWidget(self.adaptive_widget)
+
+        self.threshold_widget = QWidget()
+        self.threshold_widget.hide()
+        threshold_layout = QHBoxLayout(self.threshold_widget)
+        threshold_layout.setContentsMargins(0, 0, 0, 0) # left, top, right, bottom
+        threshold_layout.addWidget(QLabel("Stop when the gain is below:"))
+        self.threshold_spinbox = QDoubleSpinBox()
+        self.threshold_spinbox.setRange(0, 10)
+        self.threshold_spinbox.setDecimals(3)
+        self.threshold_spinbox.setSingleStep(0.01)
+        self.threshold_spinbox.setValue(0.01)
+        self.threshold_spinbox.setToolTip("Minimum increase of the joint mutual information, in the selected unit, to add a variable.")
+        threshold_layout.addWidget(self.threshold_spinbox)
+        threshold_layout.addStretch()
+        ranking_layout.addWidget(self.threshold_widget)
+        variable_selection_layout.addWidget(self.ranking_frame)
+
+        settings_layout = QHBoxLayout()
+        settings_layout.addWidget(QLabel("Number of samples:"))
+        self.nsamples_spinbox = QSpinBox()
+        self.nsamples_spinbox.setRange(100, 100000)
+        self.nsamples_spinbox.setSingleStep(100)
+        self.nsamples_spinbox.setValue(3600)
+        settings_layout.addWidget(self.nsamples_spinbox)
+        settings_layout.addSpacing(20)
+        settings_layout.addWidget(QLabel("Unit:"))
+        self.unit_combobox = CustomComboBox()
+        self.unit_combobox.setFont(font)
+        self.unit_combobox.addItems(["Sh", "Hart", "nat"])
+        settings_layout.addWidget(self.unit_combobox)
+        settings_layout.addStretch()
+        variable_selection_layout.addLayout(settings_layout)
+
+        button_layout = QHBoxLayout()
+        button_layout.setAlignment(Qt.AlignCenter)
+        button_layout.setSpacing(20)
+        button_layout.setContentsMargins(0, 10, 0, 10)  # left, top, right, bottom
+
+        compute_button = QPushButton("Compute")
+        compute_button.setFixedWidth(150)
+        compute_button.clicked.connect(self.on_compute_button_clicked)
+        button_layout.addWidget(compute_button)
+
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.setObjectName("redButton")
+        self.cancel_button.setFixedWidth(150)
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.on_cancel_button_clicked)
+        button_layout.addWidget(self.cancel_button)
+        variable_selection_layout.addLayout(button_layout)
+
+        self.mi_status_label = QLabel("")
+        self.mi_status_label.setAlignment(Qt.AlignCenter)
+        self.mi_status_label.setWordWrap(True)
+        variable_selection_layout.addWidget(self.mi_status_label)
+
+        left_layout.addWidget(self.variable_selection_frame)
+
+        left_widget = QWidget()
+        left_widget.setLayout(left_layout)
+        left_widget.setMinimumWidth(400)
+
+        # --- Right side of the page ---
+        right_layout = QVBoxLayout()
+        results_label = QLabel("Results")
+        results_label.setObjectName("inputLabel")
+        right_layout.addWidget(results_label)
+
+        self.results_table = QTableWidget(0, len(RESULT_COLUMNS))
+        self.results_table.setHorizontalHeaderLabels(RESULT_COLUMNS)
+        self.results_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.results_table.verticalHeader().setVisible(False)
+        self.results_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        right_layout.addWidget(self.results_table)
+
+        self.ranking_table = QTableWidget(0, len(RANKING_COLUMNS))
+        self.ranking_table.setHorizontalHeaderLabels(RANKING_COLUMNS)
+        self.ranking_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.ranking_table.verticalHeader().setVisible(False)
+        self.ranking_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.ranking_table.hide()
+        right_layout.addWidget(self.ranking_table)
+
+        self.selection_table = QTableWidget(0, len(SELECTION_COLUMNS))
+        self.selection_table.setHorizontalHeaderLabels(SELECTION_COLUMNS)
+        self.selection_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.selection_table.verticalHeader().setVisible(False)
+        self.selection_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.selection_table.hide()
+        right_layout.addWidget(self.selection_table)
+
+        self.export_button = QPushButton("Export")
+        self.export_button.setFixedWidth(100)
+        self.export_button.setEnabled(False)
+        self.export_button.hide()
+        self.export_button.clicked.connect(self.on_export_button_clicked)
+        right_layout.addWidget(self.export_button, alignment=Qt.AlignCenter)
+
+        right_widget = QWidget()
+        right_widget.setLayout(right_layout)
+        right_widget.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+
+        content_layout.addWidget(left_widget, stretch=0)
+        content_layout.addSpacing(50)
+        content_layout.addWidget(right_widget, stretch=1)
+        main_layout.addLayout(content_layout)
 
         self.setLayout(main_layout)
 
         # Apply the stylesheet
         with importlib.resources.open_text('pages.shared', 'styles.qss') as f:
-            style = f.read()
-            self.setStyleSheet(style)
+            common_style = f.read()
+
+        with importlib.resources.open_text('pages.mutualinfo', 'styles.qss') as f:
+            page_style = f.read()
+
+        self.setStyleSheet(common_style + page_style)
+
+        # Connect to file manager signals
+        self.file_manager.learnt_folders_updated.connect(self.load_learnt_folders)
+        self.file_manager.learnt_folder_changed.connect(self.on_learnt_folder_changed)
+        self.load_learnt_folders()
+
+    ############# LEARNT FOLDERS #############
+    def load_learnt_folders(self):
+        """Load learnt folders into the learnt combobox from the FileManager, keeping the current selection."""
+        current = self.mi_learnt_combobox.currentText()
+        self.mi_learnt_combobox.blockSignals(True)
+        self.mi_learnt_combobox.clear()
+        if self.file_manager.learnt_folders:
+            self.mi_learnt_combobox.addItems(self.file_manager.learnt_folders)
+            self.mi_learnt_combobox.setCurrentIndex(self.mi_learnt_combobox.findText(current))
+        else:
+            self.mi_learnt_combobox.addItem("No learnt folders available")
+            self.mi_learnt_combobox.setItemData(0, Qt.NoItemFlags)
+            self.mi_learnt_combobox.setCurrentIndex(-1)
+        self.mi_learnt_combobox.blockSignals(False)
+
+        if current and self.mi_learnt_combobox.currentText() != current:
+            self.on_learnt_folder_selected(self.mi_learnt_combobox.currentIndex())
+
+    def on_learnt_folder_selected(self, index):
+        """Show the variables of the selected learnt folder and drop the results of the previous one."""
+        cancel_mi_queries(self)
+        cancel_ranking(self)
+        cancel_selection(self)
+        self.selection_values = {}
+        self.results_table.setRowCount(0)
+        self.ranking_table.setRowCount(0)
+        self.selection_table.setRowCount(0)
+        self.export_button.setEnabled(False)
+        self.variable_selection_frame.hide()
+        if index >= 0 and self.mi_learnt_combobox.currentText() in self.file_manager.learnt_folders:
+            if load_mi_variables(self):
+                self.variable_selection_frame.show()
+
+    def on_learnt_folder_changed(self, learnt_dir):
+        """Reset the page when the selected learnt folder is deleted or replaced."""
+        if os.path.basename(learnt_dir) == self.mi_learnt_combobox.currentText():
+            self.on_learnt_folder_selected(self.mi_learnt_combobox.currentIndex())
+
+    def on_mode_selected(self, index):
+        """Show the inputs and results of the selected computation."""
+        mode = self.mode_combobox.currentText()
+        self.query_frame.setVisible(mode == "Mutual information")
+        self.results_table.setVisible(mode == "Mutual information")
+        self.ranking_frame.setVisible(mode != "Mutual information")
+        self.adaptive_widget.setVisible(mode == "Rank variables")
+        self.ranking_table.setVisible(mode == "Rank variables")
+        self.threshold_widget.setVisible(mode == "Select predictors")
+        self.selection_table.setVisible(mode == "Select predictors")
+        self.export_button.setVisible(mode != "Mutual information")
+        job = self.ranking if mode == "Rank variables" else self.selection
+        self.export_button.setEnabled(mode != "Mutual information" and job is not None and job.state != "running")
+
+    ############# MUTUAL INFORMATION #############
+    def on_compute_button_clicked(self):
+        mode = self.mode_combobox.currentText()
+        if mode == "Rank variables":
+            run_ranking(self)
+        elif mode == "Select predictors":
+            run_selection(self)
+        else:
+            run_mi_queries(self)
+
+    def on_cancel_button_clicked(self):
+        cancel_mi_queries(self)
+        cancel_ranking(self)
+        cancel_selection(self)
+        update_mi_status(self)
+
+    def on_export_button_clicked(self):
+        """Save the ranking or the selection steps as a CSV file."""
+        if self.mode_combobox.currentText() == "Rank variables":
+            file_path, _ = QFileDialog.getSaveFileName(self, "Export Ranking", "ranking.csv", "CSV Files (*.csv);;All Files (*)")
+            if file_path:
+                export_ranking(self, file_path)
+        else:
+            file_path, _ = QFileDialog.getSaveFileName(self, "Export Selection", "selection.csv", "CSV Files (*.csv);;All Files (*)")
+            if file_path:
+                export_selection(self, file_path)
@@ -73,7 +73,7 @@ def update_configuration(self):
             self.config[plot_key]['uncertantity_label'] = ""
 
     elif self.selected_func == "Pr":
-        num_variables = self.probabilities_values.shape[1] if self.probabilities_values is not None else 1
+        num_variables = self.probabilities.n_curves(plot_variable) if self.probabilities is not None else 1
 
         other_values = []
         all_selected_vars = self.selected_y_values + self.selected_x_values
@@ -333,6 +333,11 @@ def save_configuration(self, dialog):
 
         if not validate_configuration(self, config):
             return
+
+        # Curves beyond the second one are not editable in the dialog, keep their current settings
+        for key, value in self.config.items():
+            if key.startswith("plot_") and key not in config:
+                config[key] = value
         
         self.config = config
         write_configuration(self)
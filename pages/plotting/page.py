@@ -6,7 +6,7 @@ from PySide6.QtCore import Qt
 from PySide6.QtGui import QFont
 from pages.plotting.config import load_configuration, reset_configuration, write_configuration, configure_plot
 from pages.plotting.variables import load_variables_into_lists, update_plot_variable_combobox, sync_variable_selections, clear_input_layout, update_values_layout_pr, clear_list_widget, update_values_layout_tailpr, update_categorical_variable_combobox, get_input_value
-from pages.plotting.prob_functions import run_pr_function, run_tailpr_function
+from pages.plotting.prob_functions import run_pr_function, run_tailpr_function, start_query
 from pages.plotting.plotting import plot_pr_probabilities, plot_tailpr_probabilities, plot_tailpr_probabilities_multi, clear_plot
 from pages.shared.custom_combobox import CustomComboBox
 from appdirs import user_data_dir
@@ -29,9 +29,9 @@ class PlottingPage(QWidget):
         self.input_fields = {}
         self.current_list_widget = None
         self.config = {}
-        self.probabilities_values = None
-        self.probabilities_quantiles = None
+        self.probabilities = None
         self.selected_func = None
+        self.pending_tasks = []
         reset_configuration(self)
         write_configuration(self)
 
@@ -189,7 +189,7 @@ class PlottingPage(QWidget):
         categorical_variable_layout.setContentsMargins(0, 0, 0, 0)
         categorical_variable_layout.setSpacing(5)
 
-        categorical_variable_label = QLabel("Categorical variable with two values?")
+        categorical_variable_label = QLabel("Categorical variable with multiple values?")
         self.categorical_variable_combobox = CustomComboBox()
         self.categorical_variable_combobox.setFont(font)
         self.categorical_variable_combobox.currentIndexChanged.connect(self.on_categorical_variable_selected)
@@ -236,6 +236,11 @@ class PlottingPage(QWidget):
         button_layout.addWidget(clear_all_button)
 
         input_layout.addLayout(button_layout)
+
+        self.plot_status_label = QLabel("")
+        self.plot_status_label.setAlignment(Qt.AlignCenter)
+        input_layout.addWidget(self.plot_status_label)
+
         left_layout.addWidget(self.input_frame)
 
         # Wrap the left side in a widget
@@ -538,7 +543,7 @@ class PlottingPage(QWidget):
         """Open the configuration dialog to change plot settings."""
         load_configuration(self)
         configure_plot(self)
-        if self.probabilities_values is not None and self.probabilities_quantiles is not None:
+        if self.probabilities is not None:
             if self.selected_func == "Pr":
                 plot_pr_probabilities(self)
             elif self.selected_func == "tailPr":
@@ -597,9 +602,9 @@ class PlottingPage(QWidget):
         self.categorical_variable_frame.hide()
         self.categorical_variable_combobox.clear()
 
-        self.probabilities_values = None
-        self.probabilities_quantiles = None
+        self.probabilities = None
 
+        start_query(self)
         clear_input_layout(self)
         self.update_plot_title()
         clear_plot(self)
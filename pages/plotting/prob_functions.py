@@ -4,7 +4,7 @@ import pandas as pd
 from PySide6.QtWidgets import QMessageBox
 from pages.plotting.variables import get_input_value
 from pages.plotting.config import reset_configuration, update_configuration, write_configuration
-from r_integration.inferno_functions import run_Pr, run_tailPr
+from r_integration.r_executor import get_executor
 from pages.plotting.plotting import plot_pr_probabilities, plot_tailpr_probabilities, plot_tailpr_probabilities_multi
 from appdirs import user_data_dir
 
@@ -33,8 +33,17 @@ def run_pr_function(self):
     
     learnt_dir = os.path.join(LEARNT_FOLDER, self.pr_learnt_combobox.currentText())
 
+    start_query(self)
+    task = submit_query(self, 'run_Pr', self.Y, learnt_dir, self.X)
+    task.finished.connect(lambda result: on_pr_finished(self, task, result))
+    task.failed.connect(lambda error: on_query_failed(self, task, "Pr", error))
+
+def on_pr_finished(self, task, result):
+    """Plot the probabilities returned by a finished Pr task."""
+    if not finish_query(self, task):
+        return
     try:
-        self.probabilities_values, self.probabilities_quantiles = run_Pr(self.Y, learnt_dir, self.X)
+        self.probabilities = result
         reset_configuration(self)
         update_configuration(self)
         write_configuration(self)
@@ -67,39 +76,73 @@ def run_tailpr_function(self):
 
     learnt_dir = os.path.join(LEARNT_FOLDER, self.pr_learnt_combobox.currentText())
 
+    start_query(self)
+    if categorical_variable and categorical_variable in self.variable_values and len(self.variable_values[categorical_variable]) > 1:
+        selected_categories = self.variable_values[categorical_variable]
+        X_frames = [build_single_category_X(X_df, cat_val, categorical_variable) for cat_val in selected_categories]
+        task = submit_query(self, 'run_tailPr_batch', self.Y, learnt_dir, eq, lower_tail, X_frames)
+        task.finished.connect(lambda result: on_tailpr_categories_finished(self, task, result, selected_categories))
+        task.failed.connect(lambda error: on_query_failed(self, task, "tailPr", error))
+    else:
+        task = submit_query(self, 'run_tailPr', self.Y, learnt_dir, eq, lower_tail, self.X)
+        task.finished.connect(lambda result: on_tailpr_finished(self, task, result))
+        task.failed.connect(lambda error: on_query_failed(self, task, "tailPr", error))
+
+def on_tailpr_finished(self, task, result):
+    """Plot the cumulative probabilities returned by a finished tailPr task."""
+    if not finish_query(self, task):
+        return
     try:
-        if categorical_variable and categorical_variable in self.variable_values:
-            selected_categories = self.variable_values[categorical_variable]
-            if len(selected_categories) > 1:
-                self.probabilities_values = []
-                self.probabilities_quantiles = []
-                for cat_val in selected_categories:
-                    X_single = build_single_category_X(X_df, cat_val, categorical_variable)
-
-                    single_values, single_quantiles = run_tailPr(self.Y, learnt_dir, eq, lower_tail, X_single)
-                    self.probabilities_values.append(single_values)
-                    self.probabilities_quantiles.append(single_quantiles)
-
-                reset_configuration(self)
-                update_configuration(self)
-                write_configuration(self)
-                plot_tailpr_probabilities_multi(self, selected_categories)
-            else:
-                self.probabilities_values, self.probabilities_quantiles = run_tailPr(self.Y, learnt_dir, eq, lower_tail, self.X)
-                reset_configuration(self)
-                update_configuration(self)
-                write_configuration(self)
-                plot_tailpr_probabilities(self)
-        else:
-            self.probabilities_values, self.probabilities_quantiles = run_tailPr(self.Y, learnt_dir, eq, lower_tail, self.X)
-            reset_configuration(self)
-            update_configuration(self)
-            write_configuration(self)
-            plot_tailpr_probabilities(self)
+        self.probabilities = result
+        reset_configuration(self)
+        update_configuration(self)
+        write_configuration(self)
+        plot_tailpr_probabilities(self)
+    except Exception as e:
+        QMessageBox.critical(None, "Error", f"Failed to plot probabilities using tailPr function: {str(e)}")
 
+def on_tailpr_categories_finished(self, task, results, categories):
+    """Plot the cumulative probabilities of every category returned by a finished batched tailPr task."""
+    if not finish_query(self, task):
+        return
+    try:
+        self.probabilities = results
+        reset_configuration(self)
+        update_configuration(self)
+        write_configuration(self)
+        plot_tailpr_probabilities_multi(self, categories)
     except Exception as e:
         QMessageBox.critical(None, "Error", f"Failed to plot probabilities using tailPr function: {str(e)}")
+
+def submit_query(self, func_name, *args):
+    """Queue a probability query on the R executor and track it as part of the current query."""
+    task = get_executor().submit(func_name, *args)
+    self.pending_tasks.append(task)
+    self.plot_status_label.setText("Computing probabilities...")
+    return task
+
+def start_query(self):
+    """Drop the tasks of the previous query so their results are not plotted."""
+    for task in self.pending_tasks:
+        task.cancel()
+    self.pending_tasks = []
+    self.plot_status_label.setText("")
+
+def finish_query(self, task):
+    """Mark a task as done and return whether its result belongs to the current query."""
+    if task not in self.pending_tasks:
+        return False
+    self.pending_tasks.remove(task)
+    if not self.pending_tasks:
+        self.plot_status_label.setText("")
+    return True
+
+def on_query_failed(self, task, func_name, error):
+    """Report a failed probability query."""
+    if not finish_query(self, task):
         return
+    start_query(self)
+    QMessageBox.critical(None, "Error", f"Failed to plot probabilities using {func_name} function: {str(error)}")
 
 def build_single_category_X(X_df, cat_val, cat_var):
     X_single = X_df.copy()
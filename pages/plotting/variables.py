@@ -10,6 +10,9 @@ from appdirs import user_data_dir
 APP_DIR = user_data_dir("Inferno App", "inferno")
 LEARNT_FOLDER = os.path.join(APP_DIR, 'learnt')
 
+MAX_PR_CATEGORIES = 2
+MAX_TAILPR_CATEGORIES = 4  # tailPr evaluates all selected categories in one batched call
+
 
 def load_variables_into_lists(self):
     """Load variates from the metadata.csv file into the list widgets."""
@@ -238,7 +241,7 @@ def update_values_layout_pr(self):
             options = self.metadata_dict[variable].get("options", [])
             list_widget = QListWidget()
             list_widget.setFont(font)
-            list_widget.itemSelectionChanged.connect(lambda: limit_selection(self, list_widget, 2))
+            list_widget.itemSelectionChanged.connect(lambda: limit_selection(self, list_widget, MAX_PR_CATEGORIES))
             list_widget.setSelectionMode(QAbstractItemView.MultiSelection)
             list_widget.addItems(options)
             if variable in self.variable_values:
@@ -401,7 +404,7 @@ def update_values_layout_tailpr(self):
             list_widget.setFont(font)
             list_widget.setSelectionMode(QAbstractItemView.MultiSelection)
             list_widget.addItems(options)
-            list_widget.itemSelectionChanged.connect(lambda: limit_selection(self, list_widget, 2))
+            list_widget.itemSelectionChanged.connect(lambda: limit_selection(self, list_widget, MAX_TAILPR_CATEGORIES))
             if variable in self.variable_values:
                 selected_options = self.variable_values[variable]
                 for i in range(list_widget.count()):
@@ -0,0 +1,245 @@
+import os
+import time
+import zlib
+import importlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from r_integration.results import ProbResult, mutualinfo_to_arrays, mutualinfo_from_arrays
+from r_integration.result_cache import result_cache, result_key
+from data_processing.dataset_profile import cached_metadata_template
+
+
+# Select the backend with INFERNO_BACKEND=r (default) or INFERNO_BACKEND=stub
+BACKEND_ENV_VAR = 'INFERNO_BACKEND'
+STUB_LATENCY_ENV_VAR = 'INFERNO_STUB_LATENCY_MS'
+# Set INFERNO_NATIVE_PR=0 to send every Pr query to the backend instead of the NumPy engine
+NATIVE_PR_ENV_VAR = 'INFERNO_NATIVE_PR'
+MAX_OPEN_SAMPLES = 8  # learnt folders whose samples file is kept mapped
+
+
+def stub_probabilities(Y, X, quantiles):
+    """Deterministic probabilities for every (Y row, X row) pair, from the sums of their numeric values."""
+    y = Y.select_dtypes('number').sum(axis=1).to_numpy(dtype=np.float64)
+    if X is not None and not X.empty:
+        x = X.select_dtypes('number').sum(axis=1).to_numpy(dtype=np.float64)
+    else:
+        x = np.zeros(1)
+    values = 1 / (1 + np.exp(-(y[:, None] - x[None, :]) / 10))
+    spread = (np.asarray(quantiles, dtype=np.float64) - 0.5) * 0.1
+    quantile_values = np.clip(values[:, :, None] + spread[None, None, :], 0, 1)
+    return ProbResult(values, quantile_values, quantiles, list(Y.columns), list(X.columns) if X is not None else [])
+
+
+class StubBackend:
+    """NumPy stand-in for inferno with correctly shaped results and a configurable latency per call.
+
+    The results are not probabilities of any model; the stub exists to run and measure the Python side
+    without R.
+    """
+    name = 'stub'
+    streams_metadata = True  # build_metadata always uses the streaming generator
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def run_Pr(self, Y: pd.DataFrame, learnt_dir: str, X: pd.DataFrame = None, quantiles = [0.055, 0.945], nsamples: int = 100, parallel: int = None):
+        self._wait()
+        return stub_probabilities(Y, X, quantiles)
+
+    def run_tailPr(self, Y: pd.DataFrame, learnt_dir: str, eq: bool, lower_tail: bool, X: pd.DataFrame = None, quantiles = [0.055, 0.945], nsamples: int = 100, parallel: int = None):
+        self._wait()
+        result = stub_probabilities(Y, X, quantiles)
+        if not lower_tail:
+            result.values = 1 - result.values
+            result.quantiles = 1 - result.quantiles[:, :, ::-1]
+        return result
+
+    def run_mutualinfo(self, predictor: list, learnt_dir: str, additional_predictor: list = None, predictand: pd.DataFrame = None, nsamples: int = 3600, unit: str = "Sh", parallel: int = None):
+        self._wait()
+        additional_predictor = additional_predictor or []
+        seed = zlib.crc32(",".join(predictor + ["|"] + additional_predictor).encode())
+        value = (seed % 1000) / 1000
+        return {
+            'MI': np.array([value, value / np.sqrt(nsamples)]),
+            'CondEn12': np.array([1 - value, 0.0]),
+            'CondEn21': np.array([1 - value, 0.0]),
+            'En1': np.array([1.0, 0.0]),
+            'En2': np.array([1.0, 0.0]),
+            'MImax': np.array([1.0, 0.0]),
+            'unit': unit,
+            'Y1names': predictor,
+            'Y2names': additional_predictor
+        }
+
+    def build_metadata(self, csv_file_path, output_file_name, includevrt=None, excludevrt=None, streaming=False):
+        cached_metadata_template(csv_file_path, output_file_name, includevrt=includevrt, excludevrt=excludevrt)
+        return output_file_name
+
+    def run_learn(self, *args, **kwargs):
+        raise RuntimeError("Learn needs the R backend.")
+
+    def _wait(self):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+
+class SampleCache:
+    """Samples of learnt folders opened by NativePrBackend, each kept with the learnt.rds stamp it was loaded for.
+
+    Loaded samples map the folder's samples file, which Windows refuses to replace or delete while it is mapped, so
+    at most max_entries folders are kept and invalidate() drops a folder before its files change.
+    """
+
+    def __init__(self, max_entries=MAX_OPEN_SAMPLES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # learnt folder -> (learnt.rds stamp, MixtureSamples or None)
+        self._lock = threading.Lock()
+
+    def get(self, learnt_dir, stamp):
+        """Return the (stamp, samples) entry of a folder if it was loaded for this stamp; drop it if it is stale."""
+        key = os.path.abspath(learnt_dir)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(key)
+                return entry
+            self._entries.pop(key, None)
+        return None
+
+    def put(self, learnt_dir, stamp, samples):
+        with self._lock:
+            self._entries[os.path.abspath(learnt_dir)] = (stamp, samples)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, learnt_dir=None):
+        """Drop the samples of a folder, or of every folder when none is given, closing their mappings."""
+        with self._lock:
+            if learnt_dir is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(learnt_dir), None)
+
+
+native_samples = SampleCache()
+
+
+class NativePrBackend:
+    """Answer Pr queries with the NumPy engine in native_pr.py and forward everything else to the wrapped backend.
+
+    The samples of a learnt folder are exported through the wrapped backend on first use and only used once they
+    reproduce its Pr; queries on folders that cannot be exported or validated, and queries at an nsamples whose
+    thinning was not checked against the wrapped backend, go to the wrapped backend.
+    """
+
+    def __init__(self, backend, sample_cache=native_samples):
+        # Imported here rather than at the top, so scipy is loaded with the backend and not on the GUI start path
+        from r_integration import native_pr
+        self.native_pr = native_pr
+        self.backend = backend
+        self.sample_cache = sample_cache
+        self.name = getattr(backend, 'name', 'r')
+        self.native_calls = 0
+
+    def run_Pr(self, Y: pd.DataFrame, learnt_dir: str, X: pd.DataFrame = None, quantiles = [0.055, 0.945], nsamples: int = 100, parallel: int = None):
+        samples = self.samples(learnt_dir)
+        if samples is not None and samples.serves(nsamples) and samples.supports(Y, X):
+            self.native_calls += 1
+            return self.native_pr.evaluate_pr(samples, Y, X, quantiles=quantiles, nsamples=nsamples)
+        return self.backend.run_Pr(Y, learnt_dir, X, quantiles=quantiles, nsamples=nsamples, parallel=parallel)
+
+    def samples(self, learnt_dir):
+        """Return the validated samples of a learnt folder, exporting them first if needed, or None."""
+        key = os.path.abspath(learnt_dir)
+        try:
+            stamp = self.native_pr.source_stamp(key)
+        except OSError:
+            return None
+        # A stale entry is dropped here, so its mapping is closed before the samples file is replaced
+        entry = self.sample_cache.get(key, stamp)
+        if entry is not None:
+            return entry[1]
+
+        samples = self.native_pr.load_samples(key)
+        if samples is None and hasattr(self.backend, 'export_samples'):
+            try:
+                samples = self.native_pr.export_samples(self.backend, key)
+            except Exception as e:
+                print(f"Error exporting Monte Carlo samples: {e}")
+        if samples is not None and not samples.validated:
+            samples = None
+        self.sample_cache.put(key, stamp, samples)
+        return samples
+
+    def invalidate(self, learnt_dir=None):
+        """Drop the samples of a learnt folder that is being changed or deleted."""
+        self.sample_cache.invalidate(learnt_dir)
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+
+class CachingBackend:
+    """Serve Pr, tailPr and mutualinfo from the result cache and forward everything else to the wrapped backend."""
+
+    def __init__(self, backend, cache=result_cache):
+        self.backend = backend
+        self.cache = cache
+        self.name = getattr(backend, 'name', 'r')
+
+    def run_Pr(self, Y: pd.DataFrame, learnt_dir: str, X: pd.DataFrame = None, quantiles = [0.055, 0.945], nsamples: int = 100, parallel: int = None):
+        key = result_key('Pr', learnt_dir, [Y, X], backend=self.name, quantiles=list(quantiles), nsamples=nsamples)
+        return self._cached(key, lambda: self.backend.run_Pr(Y, learnt_dir, X, quantiles=quantiles, nsamples=nsamples, parallel=parallel))
+
+    def run_tailPr(self, Y: pd.DataFrame, learnt_dir: str, eq: bool, lower_tail: bool, X: pd.DataFrame = None, quantiles = [0.055, 0.945], nsamples: int = 100, parallel: int = None):
+        key = result_key('tailPr', learnt_dir, [Y, X], backend=self.name, quantiles=list(quantiles), nsamples=nsamples, eq=eq, lower_tail=lower_tail)
+        return self._cached(key, lambda: self.backend.run_tailPr(Y, learnt_dir, eq, lower_tail, X, quantiles=quantiles, nsamples=nsamples, parallel=parallel))
+
+    def run_tailPr_batch(self, Y: pd.DataFrame, learnt_dir: str, eq: bool, lower_tail: bool, X_frames: list, quantiles = [0.055, 0.945], nsamples: int = 100, parallel: int = None):
+        """Evaluate tailPr for several X frames in one call and split the result back per frame."""
+        X_stacked = pd.concat(X_frames, ignore_index=True)
+        result = self.run_tailPr(Y, learnt_dir, eq, lower_tail, X_stacked, quantiles=quantiles, nsamples=nsamples, parallel=parallel)
+        if result is None:
+            return None
+
+        return result.split_x([len(X) for X in X_frames])
+
+    def run_mutualinfo(self, predictor: list, learnt_dir: str, additional_predictor: list = None, predictand: pd.DataFrame = None, nsamples: int = 3600, unit: str = "Sh", parallel: int = None):
+        key = result_key('mutualinfo', learnt_dir, [predictand], backend=self.name, Y1names=list(predictor),
+                         Y2names=list(additional_predictor or []), nsamples=nsamples, unit=unit)
+        return self._cached(key, lambda: self.backend.run_mutualinfo(predictor, learnt_dir, additional_predictor, predictand, nsamples=nsamples, unit=unit, parallel=parallel),
+                            to_arrays=mutualinfo_to_arrays, from_arrays=mutualinfo_from_arrays)
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+    def _cached(self, key, compute, to_arrays=ProbResult.to_arrays, from_arrays=ProbResult.from_arrays):
+        cached = self.cache.get(key)
+        if cached is not None:
+            return from_arrays(cached)
+        result = compute()
+        arrays = to_arrays(result) if result is not None else None
+        if arrays is not None:
+            self.cache.put(key, arrays)
+        return result
+
+
+def load_backend(name=None, cache=result_cache):
+    """Create the inference backend selected by name or by the INFERNO_BACKEND environment variable.
+
+    The R backend starts the embedded R session, so call this on the thread that will make the R calls.
+    """
+    name = name or os.environ.get(BACKEND_ENV_VAR, 'r')
+    if name == 'r':
+        backend = importlib.import_module('r_integration.inferno_functions')
+    elif name == 'stub':
+        backend = StubBackend(latency=float(os.environ.get(STUB_LATENCY_ENV_VAR, 0)) / 1000)
+    else:
+        raise ValueError(f"Unknown backend '{name}'. Use 'r' or 'stub'.")
+    if os.environ.get(NATIVE_PR_ENV_VAR, '1') != '0':
+        backend = NativePrBackend(backend)
+    return CachingBackend(backend, cache)
@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+from rpy2 import robjects, rinterface
+from rpy2.robjects.conversion import localconverter
+from r_integration.results import ProbResult
+
+
+# Converter for inferno calls: plain rpy2 objects in and out, no global activate/deactivate toggling
+r_converter = robjects.default_converter
+
+
+def numeric_column_to_r(column):
+    """Transfer a numeric column to an R vector with a single buffer copy."""
+    if pd.api.types.is_bool_dtype(column):
+        values = np.ascontiguousarray(column.to_numpy(dtype=bool), dtype=np.int32)
+        return rinterface.BoolSexpVector.from_memoryview(memoryview(values))
+
+    if pd.api.types.is_integer_dtype(column) and not column.isna().any():
+        values = column.to_numpy()
+        if values.size == 0 or (values.min() >= np.iinfo(np.int32).min + 1 and values.max() <= np.iinfo(np.int32).max):
+            values = np.ascontiguousarray(values, dtype=np.int32)
+            return rinterface.IntSexpVector.from_memoryview(memoryview(values))
+
+    values = np.ascontiguousarray(column.to_numpy(dtype=np.float64, na_value=np.nan))
+    vector = rinterface.FloatSexpVector.from_memoryview(memoryview(values))
+    if np.isnan(values).any():
+        # NaN from pandas means missing, which R represents as NA_real_
+        vector = robjects.r['replace'](vector, robjects.r['is.nan'](vector), rinterface.NA_Real)
+    return vector
+
+
+def string_column_to_r(column):
+    """Convert a non-numeric column to an R character vector, keeping missing values as NA."""
+    return robjects.StrVector([rinterface.NA_Character if pd.isna(v) else str(v) for v in column])
+
+
+def dataframe_to_r(df):
+    """Convert a pandas DataFrame to an R data.frame, transferring numeric columns as contiguous buffers."""
+    if df is None or df.empty:
+        return rinterface.NULL
+
+    columns = rinterface.ListSexpVector([
+        numeric_column_to_r(df[name]) if pd.api.types.is_numeric_dtype(df[name]) else string_column_to_r(df[name])
+        for name in df.columns
+    ])
+    columns.names = rinterface.StrSexpVector([str(name) for name in df.columns])
+    return robjects.r['as.data.frame'](columns, **{'stringsAsFactors': False, 'optional': True})
+
+
+def r_to_numpy(r_array):
+    """Copy an R numeric vector, matrix or array into a float64 NumPy array with R's dimensions.
+
+    The data is copied in one block from R's buffer: a view would not keep the R vector alive, and R may free it
+    while the array is still cached.
+    """
+    if isinstance(r_array, np.ndarray):
+        return np.asarray(r_array, dtype=np.float64)
+
+    dims = r_dims(r_array)
+    if r_array.typeof != rinterface.RTYPES.REALSXP:
+        r_array = robjects.r['as.double'](r_array)
+
+    flat = np.frombuffer(r_array.memoryview(), dtype=np.float64).copy()
+    if dims is None:
+        return flat
+    # R stores arrays in column-major order, so a Fortran-ordered reshape is a view of the copy
+    return flat.reshape(dims, order='F')
+
+
+def r_dims(r_object):
+    """Return the dim attribute of an R object as a tuple, or None."""
+    dims = r_object.do_slot('dim') if 'dim' in r_object.list_attrs() else None
+    return tuple(int(d) for d in dims) if dims is not None else None
+
+
+def r_dimnames(r_object):
+    """Return the dimension names of an R array as a list of (axis name, labels) pairs, or None."""
+    if 'dimnames' not in r_object.list_attrs():
+        return None
+
+    dimnames = r_object.do_slot('dimnames')
+    axis_names = list(dimnames.names) if dimnames.names is not rinterface.NULL else [None] * len(dimnames)
+    axes = []
+    for axis_name, labels in zip(axis_names, dimnames):
+        labels = None if labels is rinterface.NULL else [str(label) for label in labels]
+        axes.append((axis_name if axis_name else None, labels))
+    return axes
+
+
+def prob_result_from_r(probabilities, Y, X, quantile_levels):
+    """Build a ProbResult from the list returned by inferno's Pr or tailPr."""
+    n_y = len(Y)
+    n_x = len(X) if X is not None and not X.empty else 1
+    r_values = probabilities.rx2('values')
+    r_quantiles = probabilities.rx2('quantiles')
+
+    # The axis order is fixed by inferno, (Y, X) and (Y, X, quantile); R drops dims of length one
+    values = r_to_numpy(r_values)
+    if values.ndim != 2:
+        values = values.reshape((n_y, n_x), order='F')
+    quantiles = r_to_numpy(r_quantiles)
+    if quantiles.ndim != 3:
+        quantiles = quantiles.reshape((n_y, n_x, len(quantile_levels)), order='F')
+
+    dimnames = r_dimnames(r_values) or [(None, None), (None, None)]
+    return ProbResult(
+        values,
+        quantiles,
+        quantile_levels,
+        list(Y.columns),
+        list(X.columns) if X is not None else [],
+        y_labels=dimnames[0][1],
+        x_labels=dimnames[1][1] if len(dimnames) > 1 else None
+    )
+
+
+def r_list_to_dict(r_list):
+    """Convert a named R list to a dict of NumPy arrays, scalars and strings."""
+    result = {}
+    for name, value in zip(r_list.names, r_list):
+        if value.typeof in (rinterface.RTYPES.REALSXP, rinterface.RTYPES.INTSXP, rinterface.RTYPES.LGLSXP):
+            array = r_to_numpy(value)
+            result[name] = array.item() if array.size == 1 and r_dims(value) is None else array
+        elif value.typeof == rinterface.RTYPES.STRSXP:
+            result[name] = list(value) if len(value) != 1 else value[0]
+        elif value.typeof == rinterface.RTYPES.VECSXP:
+            result[name] = r_list_to_dict(value)
+        else:
+            result[name] = value
+    return result
+
+
+def str_vector(values):
+    """Convert a list of strings to an R character vector, or NULL when there are none."""
+    return robjects.StrVector(values) if values else rinterface.NULL
+
+
+def float_vector(values):
+    """Convert a sequence of numbers to an R double vector with a single buffer copy."""
+    return rinterface.FloatSexpVector.from_memoryview(memoryview(np.ascontiguousarray(values, dtype=np.float64)))
+
+
+def converter_context():
+    """Context manager for calls into inferno with the app's converter."""
+    return localconverter(r_converter)
@@ -1,46 +1,118 @@
 import pandas as pd
 from rpy2.robjects.packages import importr
-from rpy2.robjects import pandas2ri, StrVector, FloatVector
-from rpy2 import rinterface
+from rpy2.robjects import StrVector
+from rpy2 import robjects, rinterface
 import os
 import shutil
-import subprocess
-
-def get_physical_cores():
-    if os.name == 'nt':  # Windows
-        return get_physical_cores_windows()
-    elif os.name == 'posix':  # macOS/Linux
-        return get_physical_cores_unix()
-    else:
-        return 4
-
-def get_physical_cores_windows():
-    try:
-        output = subprocess.check_output("wmic cpu get NumberOfCores", shell=True)
-        lines = output.decode().strip().split("\n")
-        cores = sum(int(line.strip()) for line in lines if line.strip().isdigit())
-        return cores
-    except Exception as e:
-        print(f"Error fetching physical cores on Windows: {e}")
-        return None
-
-def get_physical_cores_unix():
-    try:
-        output = subprocess.check_output("sysctl -n hw.physicalcpu", shell=True)
-        return int(output.decode().strip())
-    except Exception as e:
-        print(f"Error fetching physical cores on macOS/Linux: {e}")
-        return None
+from r_integration.learnt_cache import learnt_cache
+from r_integration.conversion import converter_context, dataframe_to_r, prob_result_from_r, r_list_to_dict, str_vector, float_vector
+from r_integration.r_cluster import WarmCluster
+from r_integration.resources import get_governor
+from data_processing.metadata_template import select_columns
+from data_processing.dataset_profile import cached_metadata_template
+from data_processing.dataset_sidecar import read_dataset, dataset_columns
 
 
 inferno = importr('inferno')
 
-def build_metadata(csv_file_path, output_file_name, includevrt=None, excludevrt=None):
-    try:
-        pandas2ri.activate()
+# Mixture parameters of every variable of a learnt object, by variable name, for r_integration.native_pr
+_R_EXPORT_SAMPLES = """
+function(learnt) {
+    aux <- as.data.frame(learnt$auxmetadata)
+    arrays <- list(W = learnt$W)
+    options <- list()
+    option_columns <- grep('^V[0-9]+$', names(aux))
+    for (i in seq_len(nrow(aux))) {
+        name <- aux$name[i]
+        type <- aux$mcmctype[i]
+        id <- aux$id[i]
+        if (type %in% c('R', 'C', 'D')) {
+            arrays[[paste0('mean.', name)]] <- learnt[[paste0(type, 'mean')]][id, , ]
+            arrays[[paste0('var.', name)]] <- learnt[[paste0(type, 'var')]][id, , ]
+        } else {
+            arrays[[paste0('prob.', name)]] <- if (type == 'B') learnt$Bprob[id, , ] else learnt[[paste0(type, 'prob')]][id, , , ]
+            values <- unlist(aux[i, option_columns])
+            options[[name]] <- as.character(values[!is.na(values)])
+        }
+    }
+    keep <- intersect(c('name', 'mcmctype', 'transform', 'domainmin', 'domainmax', 'tlocation', 'tscale',
+                        'halfstep', 'leftbound', 'rightbound'), names(aux))
+    list(arrays = arrays, variables = as.list(aux[keep]), options = options)
+}
+"""
+export_samples_function = robjects.r(_R_EXPORT_SAMPLES)
+warm_cluster = WarmCluster()
+query_lease = None
+
+
+def query_parallel(parallel=None):
+    """Return the value for inferno's parallel argument of a query.
+
+    With parallel=None the warm cluster is started if needed, sized to the cores the governor can spare, and
+    inferno is passed NULL so it uses the registered backend instead of creating and stopping its own workers
+    for every call.
+    """
+    global query_lease
+    if parallel is not None:
+        return parallel
+    if query_lease is not None and get_governor().overcommitted():
+        # A learn run started since the cluster was sized: give its cores back
+        stop_cluster()
+    if query_lease is None:
+        query_lease = get_governor().acquire('query', preemptible=True)
+    warm_cluster.acquire(query_lease.workers)
+    return rinterface.NULL if warm_cluster.is_running() else False
+
+
+def stop_cluster():
+    """Stop the warm cluster and return its cores to the governor."""
+    global query_lease
+    warm_cluster.stop()
+    if query_lease is not None:
+        query_lease.release()
+        query_lease = None
+
+
+def on_idle():
+    """Shut down the warm cluster once it has not been used for a while."""
+    if warm_cluster.is_idle():
+        stop_cluster()
+
+
+def on_shutdown():
+    stop_cluster()
+
+
+def read_learnt(learnt_dir):
+    """Read the learnt object of a folder from disk and measure its size in memory."""
+    learnt = robjects.r['readRDS'](os.path.join(learnt_dir, 'learnt.rds'))
+    size = robjects.r['object.size'](learnt)[0]
+    return learnt, size
+
+def load_learnt(learnt_dir):
+    """Return the learnt object of a folder, reusing the copy kept in memory when the folder is unchanged."""
+    return learnt_cache.get(learnt_dir, read_learnt)
+
+def export_samples(learnt_dir):
+    """Return the Monte Carlo samples of the mixture parameters and the variable metadata of a learnt folder."""
+    with converter_context():
+        return r_list_to_dict(export_samples_function(load_learnt(learnt_dir)))
+
+def build_metadata(csv_file_path, output_file_name, includevrt=None, excludevrt=None, streaming=False):
+    """Write the metadata template of a CSV file with inferno's metadatatemplate.
+
+    With streaming, the file is not loaded into R: the template is built by data_processing.metadata_template from
+    the stored profile of the file, or by reading it in chunks if it has none. Its type rules approximate
+    metadatatemplate's, so it is only used when asked for.
+    """
+    if streaming:
+        cached_metadata_template(csv_file_path, output_file_name, includevrt=includevrt, excludevrt=excludevrt)
+        return output_file_name
 
-        data = pd.read_csv(csv_file_path)
-        r_data = pandas2ri.py2rpy(data)
+    with converter_context():
+        # Only the columns of the template, from the columnar sidecar of the file when there is one
+        data = read_dataset(csv_file_path, columns=select_columns(dataset_columns(csv_file_path), includevrt, excludevrt))
+        r_data = dataframe_to_r(data)
 
         includevrt_r = StrVector(includevrt) if includevrt is not None else rinterface.NULL
         excludevrt_r = StrVector(excludevrt) if excludevrt is not None else rinterface.NULL
@@ -55,13 +127,7 @@ def build_metadata(csv_file_path, output_file_name, includevrt=None, excludevrt=
             verbose=False
         )
 
-        return output_file_name
-
-    except Exception as e:
-        raise e
-
-    finally:
-        pandas2ri.deactivate()
+    return output_file_name
 
 
 def run_learn(metadatafile: str, datafile: str, outputdir: str, nsamples: int = 3600, nchains: int = 60, maxhours: float = float('inf'), seed: int = None, parallel: str = "True"):
@@ -70,7 +136,7 @@ def run_learn(metadatafile: str, datafile: str, outputdir: str, nsamples: int =
         datafile_r = StrVector([datafile])
 
         if parallel == "True":
-            parallel = get_physical_cores()
+            parallel = get_governor().budget.usable
         else:
             parallel = int(parallel)
 
@@ -102,95 +168,48 @@ def run_learn(metadatafile: str, datafile: str, outputdir: str, nsamples: int =
         raise e
 
 
-def run_Pr(Y: pd.DataFrame, learnt_dir: str, X: pd.DataFrame = None, quantiles = [0.055, 0.945], nsamples: int = 100, parallel: int = 12):
-    try:
-        pandas2ri.activate()
-
-        r_Y = pandas2ri.py2rpy(Y)
-        r_X = pandas2ri.py2rpy(X) if X is not None and not X.empty else rinterface.NULL
-        learnt_r = StrVector([learnt_dir])
-        quantiles_r = FloatVector(quantiles)
-
+def run_Pr(Y: pd.DataFrame, learnt_dir: str, X: pd.DataFrame = None, quantiles = [0.055, 0.945], nsamples: int = 100, parallel: int = None):
+    with converter_context():
         probabilities = inferno.Pr(
-            Y=r_Y,
-            X=r_X,
-            learnt=learnt_r,
+            Y=dataframe_to_r(Y),
+            X=dataframe_to_r(X),
+            learnt=load_learnt(learnt_dir),
             nsamples=nsamples,
-            parallel=parallel,
-            quantiles=quantiles_r
+            parallel=query_parallel(parallel),
+            quantiles=float_vector(quantiles)
         )
-        if probabilities:
-            values = probabilities.rx2('values')
-            quantiles = probabilities.rx2('quantiles')
-            return values, quantiles
-        else:
+        if not probabilities:
             return None
+        return prob_result_from_r(probabilities, Y, X, quantiles)
 
-    except Exception as e:
-        raise e
-
-    finally:
-        pandas2ri.deactivate()
-
-
-def run_tailPr(Y: pd.DataFrame, learnt_dir: str, eq: bool, lower_tail: bool, X: pd.DataFrame = None, quantiles = [0.055, 0.945], nsamples: int = 100, parallel: int = 12):
-    try:
-        pandas2ri.activate()
-
-        r_Y = pandas2ri.py2rpy(Y)
-        r_X = pandas2ri.py2rpy(X) if X is not None and not X.empty else rinterface.NULL
-        learnt_r = StrVector([learnt_dir])
-        quantiles_r = FloatVector(quantiles)
 
+def run_tailPr(Y: pd.DataFrame, learnt_dir: str, eq: bool, lower_tail: bool, X: pd.DataFrame = None, quantiles = [0.055, 0.945], nsamples: int = 100, parallel: int = None):
+    with converter_context():
         probabilities = inferno.tailPr(
-            Y=r_Y,
-            X=r_X,
-            learnt=learnt_r,
+            Y=dataframe_to_r(Y),
+            X=dataframe_to_r(X),
+            learnt=load_learnt(learnt_dir),
             nsamples=nsamples,
-            parallel=parallel,
-            quantiles=quantiles_r,
+            parallel=query_parallel(parallel),
+            quantiles=float_vector(quantiles),
             eq=eq,
             **{'lower.tail': lower_tail}
         )
-        if probabilities:
-            values = probabilities.rx2('values')
-            quantiles = probabilities.rx2('quantiles')
-            return values, quantiles
-        else:
+        if not probabilities:
             return None
-
-    except Exception as e:
-        raise e 
-
-    finally:
-        pandas2ri.deactivate()
+        return prob_result_from_r(probabilities, Y, X, quantiles)
 
 
-
-def run_mutualinfo(predictor: list, learnt_dir: str, additional_predictor: list = None, predictand: pd.DataFrame = None, nsamples: int = 3600, unit: str = "Sh", parallel: int = 1):
-    try:
-        pandas2ri.activate()
-
-        Y1names_r = StrVector(predictor)
-        Y2names_r = StrVector(additional_predictor) if additional_predictor else rinterface.NULL
-        r_X = pandas2ri.py2rpy(predictand) if predictand is not None and not predictand.empty else rinterface.NULL
-        learnt_r = StrVector([learnt_dir])
-
+def run_mutualinfo(predictor: list, learnt_dir: str, additional_predictor: list = None, predictand: pd.DataFrame = None, nsamples: int = 3600, unit: str = "Sh", parallel: int = None):
+    with converter_context():
         result = inferno.mutualinfo(
-            Y1names=Y1names_r,
-            Y2names=Y2names_r,
-            X=r_X,
-            learnt=learnt_r,
+            Y1names=str_vector(predictor),
+            Y2names=str_vector(additional_predictor),
+            X=dataframe_to_r(predictand),
+            learnt=load_learnt(learnt_dir),
             nsamples=nsamples,
             unit=unit,
-            parallel=parallel, 
+            parallel=query_parallel(parallel),
             silent=True
         )
-
-        return result
-
-    except Exception as e:
-        raise e
-
-    finally:
-        pandas2ri.deactivate()
+        return r_list_to_dict(result)
@@ -0,0 +1,248 @@
+import os
+import re
+import sys
+import glob
+import json
+import time
+import shutil
+import signal
+import subprocess
+import threading
+from PySide6.QtCore import QObject, Signal, QTimer
+from r_integration.resources import get_governor
+
+
+# Lines from inferno's console output and chain logs that mark a finished Markov chain. The pattern is not checked
+# against every inferno version, so runs where no line matches fall back to showing the elapsed time only.
+CHAIN_DONE_PATTERN = re.compile(r'chain\s*#?\s*(\d+)\b.*?\b(?:finished|completed|done|saved)', re.IGNORECASE)
+LOG_POLL_INTERVAL_MS = 2000
+UNRECOGNISED_OUTPUT_LINES = 200  # lines of output without a finished chain before chain progress is given up on
+
+
+class LearnProgress:
+    """Track chain completion of a learn run and estimate the remaining time."""
+
+    def __init__(self, nchains):
+        self.nchains = nchains
+        self.completed_chains = set()
+        self.start_time = time.monotonic()
+        self.last_activity = self.start_time
+        self.lines = 0
+        self.warned = False
+
+    def feed(self, line):
+        """Parse one line of output and return True if it completed a new chain."""
+        self.last_activity = time.monotonic()
+        self.lines += 1
+        match = CHAIN_DONE_PATTERN.search(line)
+        if match:
+            chain = int(match.group(1))
+            if chain not in self.completed_chains:
+                self.completed_chains.add(chain)
+                return True
+        return False
+
+    @property
+    def completed(self):
+        return min(len(self.completed_chains), self.nchains)
+
+    @property
+    def unrecognised(self):
+        """True when plenty of output came without any line matching CHAIN_DONE_PATTERN."""
+        return not self.completed_chains and self.lines >= UNRECOGNISED_OUTPUT_LINES
+
+    def warn_unrecognised(self, finished=False):
+        """Log once that chain progress cannot be followed, when no chain line matched so far."""
+        if self.warned or self.completed_chains or not (finished or self.unrecognised):
+            return
+        self.warned = True
+        print(f"Warning: no line of the learn output matched CHAIN_DONE_PATTERN after {self.lines} lines; "
+              f"showing the elapsed time instead of chain progress")
+
+    def elapsed(self):
+        """Seconds since the run started."""
+        return time.monotonic() - self.start_time
+
+    def idle(self):
+        """Seconds since the run last produced any output."""
+        return time.monotonic() - self.last_activity
+
+    def eta(self):
+        """Estimated seconds left, or None until the first chain has finished."""
+        if self.completed == 0:
+            return None
+        per_chain = self.elapsed() / self.completed
+        return per_chain * (self.nchains - self.completed)
+
+
+def format_duration(seconds):
+    """Format a number of seconds as a short human readable duration."""
+    seconds = int(seconds)
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m"
+    if minutes:
+        return f"{minutes}m {seconds:02d}s"
+    return f"{seconds}s"
+
+
+def remove_output_dir(outputdir):
+    """Remove the partial output directory of an unsuccessful learn run."""
+    if os.path.exists(outputdir):
+        shutil.rmtree(outputdir, ignore_errors=True)
+
+
+def worker_command(learn_args):
+    """Build the command line that runs a learn computation in a separate process."""
+    encoded_args = json.dumps(learn_args)
+    if getattr(sys, 'frozen', False):
+        return [sys.executable, '--learn-worker', encoded_args]
+    return [sys.executable, '-u', '-m', 'r_integration.learn_worker', encoded_args]
+
+
+class LearnJob(QObject):
+    """Run inferno's learn in a separate process, reporting progress and supporting cancellation."""
+    progress = Signal(object)
+    output = Signal(str)
+    finished = Signal()
+    failed = Signal(str)
+    cancelled = Signal()
+    _line_read = Signal(str)
+    _process_exited = Signal(int)
+
+    def __init__(self, metadatafile, datafile, outputdir, nsamples=3600, nchains=60, maxhours=float('inf'), seed=None, parallel="True"):
+        super().__init__()
+        self.outputdir = outputdir
+        self.nchains = nchains
+        self.learn_args = {
+            "metadatafile": metadatafile,
+            "datafile": datafile,
+            "outputdir": outputdir,
+            "nsamples": nsamples,
+            "nchains": nchains,
+            "maxhours": 'inf' if maxhours == float('inf') else maxhours,
+            "seed": seed,
+            "parallel": str(parallel)
+        }
+        self.state = "queued"
+        self.lease = None
+        self.process = None
+        self.learn_progress = None
+        self._stderr_lines = []
+        self._log_offsets = {}
+        self._cancel_requested = False
+        self._readers = []
+
+        self._line_read.connect(self._on_line)
+        self._process_exited.connect(self._on_exit)
+        self._log_timer = QTimer(self)
+        self._log_timer.setInterval(LOG_POLL_INTERVAL_MS)
+        self._log_timer.timeout.connect(self._poll_logs)
+
+    def start(self):
+        """Launch the worker process."""
+        self.learn_progress = LearnProgress(self.nchains)
+        # Take the cores from the shared budget; an explicit parallel setting from the user is passed on unchanged
+        requested = None if self.learn_args["parallel"] == "True" else int(self.learn_args["parallel"])
+        self.lease = get_governor().acquire('learn', requested)
+        if requested is None:
+            self.learn_args["parallel"] = str(self.lease.workers)
+        # Skip logs left over from an earlier run into the same folder
+        self._log_offsets = {path: os.path.getsize(path) for path in glob.glob(os.path.join(self.outputdir, '*.log'))}
+        popen_args = {
+            "stdout": subprocess.PIPE,
+            "stderr": subprocess.PIPE,
+            "text": True,
+            "bufsize": 1,
+            "cwd": os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        }
+        if os.name == 'nt':
+            popen_args["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            popen_args["start_new_session"] = True
+
+        try:
+            self.process = subprocess.Popen(worker_command(self.learn_args), **popen_args)
+        except OSError:
+            self.lease.release()
+            raise
+        self.state = "running"
+        self._readers = [
+            threading.Thread(target=self._read_stream, args=(self.process.stdout, False), daemon=True),
+            threading.Thread(target=self._read_stream, args=(self.process.stderr, True), daemon=True)
+        ]
+        for reader in self._readers:
+            reader.start()
+        threading.Thread(target=self._wait_for_exit, daemon=True).start()
+        self._log_timer.start()
+        self.progress.emit(self.learn_progress)
+
+    def cancel(self):
+        """Stop the worker process and all R workers it started."""
+        if self.state != "running":
+            if self.state == "queued":
+                self.state = "cancelled"
+                self.cancelled.emit()
+            return
+
+        self._cancel_requested = True
+        try:
+            if os.name == 'nt':
+                subprocess.run(["taskkill", "/F", "/T", "/PID", str(self.process.pid)], capture_output=True)
+            else:
+                os.killpg(self.process.pid, signal.SIGTERM)
+        except (OSError, ProcessLookupError) as e:
+            print(f"Error stopping learn process: {e}")
+
+    def _read_stream(self, stream, is_stderr):
+        """Forward lines from the worker process to the GUI thread."""
+        for line in stream:
+            line = line.rstrip()
+            if is_stderr:
+                self._stderr_lines.append(line)
+            self._line_read.emit(line)
+        stream.close()
+
+    def _wait_for_exit(self):
+        returncode = self.process.wait()
+        for reader in self._readers:
+            reader.join()
+        self._process_exited.emit(returncode)
+
+    def _on_line(self, line):
+        self.output.emit(line)
+        self.learn_progress.feed(line)
+        self.progress.emit(self.learn_progress)
+
+    def _poll_logs(self):
+        """Read new lines from the chain log files that inferno writes into the output directory."""
+        for log_path in glob.glob(os.path.join(self.outputdir, '*.log')):
+            offset = self._log_offsets.get(log_path, 0)
+            try:
+                with open(log_path, 'r', errors='replace') as f:
+                    f.seek(offset)
+                    new_text = f.read()
+                    self._log_offsets[log_path] = f.tell()
+            except OSError:
+                continue
+            for line in new_text.splitlines():
+                self.learn_progress.feed(line)
+        self.learn_progress.warn_unrecognised()
+        self.progress.emit(self.learn_progress)
+
+    def _on_exit(self, returncode):
+        self._log_timer.stop()
+        self.lease.release()
+        self.learn_progress.warn_unrecognised(finished=returncode == 0 and not self._cancel_requested)
+        if self._cancel_requested:
+            remove_output_dir(self.outputdir)
+            self.state = "cancelled"
+            self.cancelled.emit()
+        elif returncode == 0:
+            self.state = "finished"
+            self.finished.emit()
+        else:
+            self.state = "failed"
+            message = "\n".join(self._stderr_lines[-5:]) or f"The learn process exited with code {returncode}."
+            self.failed.emit(message)
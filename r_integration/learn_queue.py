@@ -0,0 +1,213 @@
+import os
+import json
+import time
+import uuid
+import subprocess
+from PySide6.QtCore import QObject, Signal, QTimer
+from appdirs import user_data_dir
+from r_integration.learn_job import LearnJob, remove_output_dir
+from r_integration.resources import get_governor
+
+
+APP_DIR = user_data_dir("Inferno App", "inferno")
+LEARN_QUEUE_PATH = os.path.join(APP_DIR, 'config', 'learn_queue.json')
+
+MIN_WORKERS_PER_JOB = 2  # fewer cores than this per job and it is better to wait for a running job to finish
+MAX_ENDED_JOBS = 50  # finished, failed and cancelled jobs kept in the history
+SHUTDOWN_WAIT_SECONDS = 5  # time given to a stopped learn process to exit before its output is removed
+
+ACTIVE_STATES = ("queued", "running")
+
+
+class LearnQueue(QObject):
+    """Persistent queue of learn jobs, started as the shared core budget allows.
+
+    Each job is a dict with its CSV and metadata paths, output folder, learn parameters and state. The queue is
+    saved to LEARN_QUEUE_PATH on every change, and jobs that were running when the app closed are queued again.
+    """
+    jobs_changed = Signal()
+    job_ended = Signal(dict)
+
+    def __init__(self, path=LEARN_QUEUE_PATH):
+        super().__init__()
+        self.path = path
+        self.jobs = []
+        self.running = {}  # job id -> LearnJob
+        self.load()
+        self.schedule()
+
+    def load(self):
+        """Read the saved queue, putting interrupted jobs back in the queue and removing their partial output."""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                self.jobs = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error loading learn queue: {e}")
+            self.jobs = []
+        for job in self.jobs:
+            if job['state'] == "running":
+                job['state'] = "queued"
+                job['message'] = "Restarted after the app was closed."
+                # Left behind if the app did not shut down cleanly; it would be listed as a learnt folder
+                remove_output_dir(job['outputdir'])
+
+    def save(self):
+        """Write the queue to disk atomically."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(self.jobs, f, indent=4)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Error saving learn queue: {e}")
+
+    def add(self, name, datafile, metadatafile, outputdir, params):
+        """Queue a learn job and start it if there are cores to spare."""
+        job = {
+            'id': uuid.uuid4().hex,
+            'name': name,
+            'datafile': datafile,
+            'metadatafile': metadatafile,
+            'outputdir': outputdir,
+            'params': params,
+            'state': "queued",
+            'workers': None,
+            'created': time.time(),
+            'started': None,
+            'ended': None,
+            'message': ""
+        }
+        self.jobs.append(job)
+        self._changed()
+        # Scheduling on the next event loop turn lets jobs added together share the free cores
+        QTimer.singleShot(0, self.schedule)
+        return job
+
+    def get(self, job_id):
+        return next((job for job in self.jobs if job['id'] == job_id), None)
+
+    def is_output_in_use(self, outputdir):
+        """True if a queued or running job writes to the given folder."""
+        return any(job['outputdir'] == outputdir and job['state'] in ACTIVE_STATES for job in self.jobs)
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job. A running job is stopped and its partial output removed."""
+        job = self.get(job_id)
+        if job is None:
+            return
+        if job['id'] in self.running:
+            self.running[job['id']].cancel()
+        elif job['state'] == "queued":
+            self._end(job, "cancelled")
+
+    def remove(self, job_id):
+        """Remove a job that is not running from the list."""
+        job = self.get(job_id)
+        if job is not None and job['state'] != "running":
+            self.jobs.remove(job)
+            self._changed()
+
+    def clear_ended(self):
+        """Remove the finished, failed and cancelled jobs from the list."""
+        self.jobs = [job for job in self.jobs if job['state'] in ACTIVE_STATES]
+        self._changed()
+
+    def schedule(self):
+        """Start as many queued jobs as the core budget allows, splitting the free cores evenly between them."""
+        queued = [job for job in self.jobs if job['state'] == "queued"]
+        free = get_governor().available(preemptible=False)
+        if not queued or (self.running and free < MIN_WORKERS_PER_JOB):
+            return
+        slots = max(1, min(len(queued), free // MIN_WORKERS_PER_JOB))
+        for index, job in enumerate(queued[:slots]):
+            self._start(job, max(1, free // slots + (1 if index < free % slots else 0)))
+
+    def shutdown(self):
+        """Stop the running jobs when the app quits; they are queued again on the next start.
+
+        LearnJob removes the partial output of a cancelled job from the event loop, which no longer runs once the app
+        quits, so it is removed here.
+        """
+        for job_id, learn_job in list(self.running.items()):
+            job = self.get(job_id)
+            job['state'] = "queued"
+            job['message'] = "Restarted after the app was closed."
+            learn_job.cancel()
+        for job_id, learn_job in list(self.running.items()):
+            try:
+                learn_job.process.wait(timeout=SHUTDOWN_WAIT_SECONDS)
+            except subprocess.TimeoutExpired:
+                print(f"Error stopping learn process: still running after {SHUTDOWN_WAIT_SECONDS} s")
+            remove_output_dir(learn_job.outputdir)
+        self.running.clear()
+        self.save()
+
+    def _start(self, job, workers):
+        params = job['params']
+        # An explicit parallel setting is an upper limit, and workers beyond the number of chains would stay idle
+        if str(params['parallel']).isdigit():
+            workers = min(workers, int(params['parallel']))
+        workers = min(workers, int(params['nchains']))
+
+        maxhours = params['maxhours']
+        learn_job = LearnJob(
+            metadatafile=job['metadatafile'],
+            datafile=job['datafile'],
+            outputdir=job['outputdir'],
+            nsamples=params['nsamples'],
+            nchains=params['nchains'],
+            maxhours=float('inf') if maxhours == 'inf' else float(maxhours),
+            seed=params['seed'],
+            parallel=workers
+        )
+        learn_job.finished.connect(lambda: self._on_job_exit(job['id'], "finished"))
+        learn_job.failed.connect(lambda message: self._on_job_exit(job['id'], "failed", message))
+        learn_job.cancelled.connect(lambda: self._on_job_exit(job['id'], "cancelled"))
+
+        try:
+            learn_job.start()
+        except OSError as e:
+            self._end(job, "failed", f"Failed to start the computation: {e}")
+            return
+
+        self.running[job['id']] = learn_job
+        job['state'] = "running"
+        job['workers'] = workers
+        job['started'] = time.time()
+        job['message'] = ""
+        self._changed()
+
+    def _on_job_exit(self, job_id, state, message=""):
+        job = self.get(job_id)
+        if self.running.pop(job_id, None) is None or job is None:
+            return
+        self._end(job, state, message)
+        self.schedule()
+
+    def _end(self, job, state, message=""):
+        job['state'] = state
+        job['ended'] = time.time()
+        job['message'] = message
+
+        ended = [j for j in self.jobs if j['state'] not in ACTIVE_STATES]
+        for old_job in ended[:-MAX_ENDED_JOBS]:
+            self.jobs.remove(old_job)
+        self._changed()
+        self.job_ended.emit(job)
+
+    def _changed(self):
+        self.save()
+        self.jobs_changed.emit()
+
+
+_learn_queue = None
+
+def get_learn_queue():
+    """Return the application-wide learn queue, loading the saved jobs on first use."""
+    global _learn_queue
+    if _learn_queue is None:
+        _learn_queue = LearnQueue()
+    return _learn_queue
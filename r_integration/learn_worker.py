@@ -0,0 +1,36 @@
+import sys
+import json
+from r_integration.resources import configure_thread_env
+
+
+def main(argv):
+    """Run a single learn computation with the JSON-encoded arguments given on the command line."""
+    # Flush every line, so LearnJob sees progress as it happens also when started through main.py in the packaged app
+    for stream in (sys.stdout, sys.stderr):
+        if stream is not None:
+            stream.reconfigure(line_buffering=True)
+    learn_args = json.loads(argv[0])
+    if learn_args.get('maxhours') == 'inf':
+        learn_args['maxhours'] = float('inf')
+
+    try:
+        configure_thread_env()
+        from r_integration.inferno_functions import run_learn
+        result = run_learn(**learn_args)
+    except Exception as e:
+        print(f"Error running learn: {e}", file=sys.stderr, flush=True)
+        return 1
+
+    if result:
+        # Convert the samples for the NumPy Pr engine now rather than on the first query; learn succeeded regardless
+        try:
+            from r_integration import inferno_functions, native_pr
+            native_pr.export_samples(inferno_functions, learn_args['outputdir'])
+        except Exception as e:
+            print(f"Error exporting Monte Carlo samples: {e}", file=sys.stderr, flush=True)
+
+    return 0 if result else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
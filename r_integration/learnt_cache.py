@@ -0,0 +1,75 @@
+import os
+import threading
+from collections import OrderedDict
+
+
+DEFAULT_MEMORY_BUDGET = 2 * 1024 ** 3  # bytes
+DERIVED_FILES = ('mcsamples.cols',)  # files the app itself writes into learnt folders, see native_pr.py
+
+
+def folder_fingerprint(learnt_dir):
+    """Return a fingerprint of the files in a learnt folder based on names, sizes and modification times.
+
+    Files derived from the learnt object by the app are left out, so writing them does not invalidate anything.
+    """
+    entries = []
+    with os.scandir(learnt_dir) as it:
+        for entry in it:
+            if entry.is_file() and not entry.name.startswith(DERIVED_FILES):
+                stat = entry.stat()
+                entries.append((entry.name, stat.st_mtime_ns, stat.st_size))
+    return tuple(sorted(entries))
+
+
+class LearntCache:
+    """Keep loaded learnt objects in memory, evicting the least recently used ones beyond a memory budget."""
+
+    def __init__(self, max_bytes=DEFAULT_MEMORY_BUDGET):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # path -> (fingerprint, learnt object, size in bytes)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, learnt_dir, load):
+        """Return the learnt object for a folder, calling load(learnt_dir) -> (object, size) when it is not cached or stale."""
+        key = os.path.abspath(learnt_dir)
+        fingerprint = folder_fingerprint(key)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == fingerprint:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self._entries.pop(key, None)
+            self.misses += 1
+
+        learnt, size = load(key)
+
+        with self._lock:
+            self._entries[key] = (fingerprint, learnt, size)
+            self._evict()
+        return learnt
+
+    def invalidate(self, learnt_dir=None):
+        """Drop the cached object for a folder, or every cached object when no folder is given."""
+        with self._lock:
+            if learnt_dir is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(learnt_dir), None)
+
+    def total_bytes(self):
+        with self._lock:
+            return sum(size for _, _, size in self._entries.values())
+
+    def _evict(self):
+        """Remove least recently used entries until the budget is met, always keeping the newest one."""
+        total = sum(size for _, _, size in self._entries.values())
+        while total > self.max_bytes and len(self._entries) > 1:
+            _, (_, _, size) = self._entries.popitem(last=False)
+            total -= size
+
+
+learnt_cache = LearntCache()
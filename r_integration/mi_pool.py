@@ -0,0 +1,180 @@
+import os
+import sys
+import json
+import signal
+import itertools
+import subprocess
+import threading
+from collections import deque
+from PySide6.QtCore import QObject, Signal
+from r_integration.resources import get_governor
+
+
+STDERR_LINES_KEPT = 20
+
+
+def worker_command():
+    """Build the command line that starts one mutualinfo worker process."""
+    if getattr(sys, 'frozen', False):
+        return [sys.executable, '--mi-worker']
+    return [sys.executable, '-u', '-m', 'r_integration.mi_worker']
+
+
+class MIWorker:
+    """One worker process with its own R session, running one mutualinfo request at a time."""
+
+    def __init__(self, pool):
+        popen_args = {
+            "stdin": subprocess.PIPE,
+            "stdout": subprocess.PIPE,
+            "stderr": subprocess.PIPE,
+            "text": True,
+            "bufsize": 1,
+            "cwd": os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        }
+        if os.name == 'nt':
+            popen_args["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            popen_args["start_new_session"] = True
+        self.process = subprocess.Popen(worker_command(), **popen_args)
+        self.ready = False
+        self.job_id = None
+        self.stderr_lines = deque(maxlen=STDERR_LINES_KEPT)
+        threading.Thread(target=self._read_replies, args=(pool,), daemon=True).start()
+        threading.Thread(target=self._read_stderr, daemon=True).start()
+
+    def send(self, job_id, kwargs):
+        self.job_id = job_id
+        self.process.stdin.write(json.dumps({'id': job_id, 'kwargs': kwargs}) + "\n")
+        self.process.stdin.flush()
+
+    def stop(self):
+        """Stop the process and any R workers it started."""
+        try:
+            if os.name == 'nt':
+                subprocess.run(["taskkill", "/F", "/T", "/PID", str(self.process.pid)], capture_output=True)
+            else:
+                os.killpg(self.process.pid, signal.SIGTERM)
+        except (OSError, ProcessLookupError):
+            pass
+
+    def _read_replies(self, pool):
+        for line in self.process.stdout:
+            try:
+                pool._reply.emit(self, json.loads(line))
+            except ValueError:
+                self.stderr_lines.append(line.rstrip())
+        returncode = self.process.wait()
+        pool._worker_exited.emit(self, returncode)
+
+    def _read_stderr(self):
+        for line in self.process.stderr:
+            self.stderr_lines.append(line.rstrip())
+
+
+class MIWorkerPool(QObject):
+    """Compute mutualinfo requests concurrently in worker processes, one core each, sized by the governor.
+
+    Workers share the result cache on disk, so requests answered before, in any process, are not recomputed.
+    Signals are emitted on the GUI thread.
+    """
+    result_ready = Signal(int, object)
+    job_failed = Signal(int, str)
+    idle = Signal()
+    _reply = Signal(object, object)
+    _worker_exited = Signal(object, int)
+
+    def __init__(self, requested=None):
+        super().__init__()
+        self.lease = get_governor().acquire('mi', requested)
+        self.workers = []
+        self._queue = deque()  # (job id, kwargs)
+        self._ids = itertools.count()
+        self._closed = False
+        self._reply.connect(self._on_reply)
+        self._worker_exited.connect(self._on_worker_exit)
+
+    @property
+    def size(self):
+        return self.lease.workers
+
+    def submit(self, **kwargs):
+        """Queue a run_mutualinfo call with the given arguments and return its job id."""
+        job_id = next(self._ids)
+        self._queue.append((job_id, kwargs))
+        self._dispatch()
+        return job_id
+
+    def pending_count(self):
+        """Number of jobs queued or running."""
+        return len(self._queue) + sum(1 for worker in self.workers if worker.job_id is not None)
+
+    def cancel_queued(self):
+        """Drop the jobs that have not started; running ones finish and are reported."""
+        self._queue.clear()
+
+    def shutdown(self):
+        """Stop every worker and return the cores to the governor; unfinished jobs are dropped without signals."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.clear()
+        for worker in self.workers:
+            worker.stop()
+        self.workers = []
+        self.lease.release()
+
+    def _dispatch(self):
+        if self._closed:
+            return
+        for worker in self.workers:
+            if worker.ready and worker.job_id is None and self._queue:
+                worker.send(*self._queue.popleft())
+        # Start more workers while there are jobs no starting or idle worker will take
+        starting = sum(1 for worker in self.workers if not worker.ready)
+        while len(self.workers) < self.size and len(self._queue) > starting:
+            try:
+                self.workers.append(MIWorker(self))
+            except OSError as e:
+                self._fail_queued(f"Could not start a mutualinfo worker: {e}")
+                return
+            starting += 1
+
+    def _on_reply(self, worker, reply):
+        if self._closed or worker not in self.workers:
+            return
+        if reply.get('ready'):
+            worker.ready = True
+        elif 'id' in reply:
+            job_id = worker.job_id
+            worker.job_id = None
+            if 'error' in reply:
+                self.job_failed.emit(job_id, reply['error'])
+            else:
+                self.result_ready.emit(job_id, reply['result'])
+        elif 'error' in reply:
+            worker.stderr_lines.append(reply['error'])
+        self._dispatch()
+        self._check_idle()
+
+    def _on_worker_exit(self, worker, returncode):
+        if self._closed or worker not in self.workers:
+            return
+        self.workers.remove(worker)
+        message = "\n".join(list(worker.stderr_lines)[-5:]) or f"The mutualinfo worker exited with code {returncode}."
+        if worker.job_id is not None:
+            self.job_failed.emit(worker.job_id, message)
+        if not worker.ready:
+            # R could not be started; other workers would fail the same way
+            self._fail_queued(message)
+        self._dispatch()
+        self._check_idle()
+
+    def _fail_queued(self, message):
+        while self._queue:
+            job_id, _ = self._queue.popleft()
+            self.job_failed.emit(job_id, message)
+
+    def _check_idle(self):
+        if self.pending_count() == 0:
+            self.idle.emit()
@@ -0,0 +1,211 @@
+import os
+import numpy as np
+import pandas as pd
+from PySide6.QtCore import QObject, Signal
+from r_integration.mi_pool import MIWorkerPool
+
+
+def mi_estimate(result, name='MI'):
+    """Return the value and Monte Carlo error of an entry of a mutualinfo result."""
+    value = np.atleast_1d(np.asarray(result.get(name, np.nan), dtype=np.float64))
+    return float(value[0]), float(value[1]) if value.size > 1 else np.nan
+
+
+def metadata_variables(learnt_dir):
+    """Return the variable names listed in the metadata.csv of a learnt folder."""
+    return pd.read_csv(os.path.join(learnt_dir, 'metadata.csv'))["name"].tolist()
+
+
+class MIRanking(QObject):
+    """Rank candidate variables by their mutual information with a target variable.
+
+    One mutualinfo evaluation per candidate is fanned out over an MIWorkerPool; `updated` is emitted after every
+    result so the partial ranking can be shown while the rest is computed.
+    """
+    updated = Signal()
+    finished = Signal()
+    failed = Signal(str)
+
+    def __init__(self, learnt_dir, target, candidates=None, nsamples=3600, unit="Sh", workers=None):
+        super().__init__()
+        self.learnt_dir = learnt_dir
+        self.target = target
+        if candidates is None:
+            candidates = [name for name in metadata_variables(learnt_dir) if name != target]
+        self.candidates = [name for name in candidates if name != target]
+        self.nsamples = nsamples
+        self.round_nsamples = nsamples
+        self.unit = unit
+        self.workers = workers
+        self.rows = {name: {'variable': name, 'MI': np.nan, 'error': np.nan, 'MImax': np.nan, 'nsamples': 0, 'status': "Pending"}
+                     for name in self.candidates}
+        self.pool = None
+        self.samples_spent = 0
+        self._jobs = {}  # job id -> (candidate, nsamples)
+        self.state = "queued"
+
+    def start(self):
+        """Submit one evaluation per candidate to a new worker pool, which is kept until the ranking finishes."""
+        if not self.candidates:
+            self.failed.emit("There are no candidate variables to rank.")
+            return
+        self.state = "running"
+        requested = min(self.workers or len(self.candidates), len(self.candidates))
+        self.pool = MIWorkerPool(requested)
+        self.pool.result_ready.connect(self._on_result)
+        self.pool.job_failed.connect(self._on_failed)
+        for name in self.candidates:
+            self._submit(name, self.round_nsamples)
+
+    def cancel(self):
+        """Stop the workers; candidates not evaluated yet stay unranked."""
+        if self.state != "running":
+            return
+        for row in self.rows.values():
+            if row['status'] == "Pending":
+                row['status'] = "Cancelled"
+        self._finish("cancelled")
+
+    def ranking(self):
+        """Return the rows ordered by decreasing mutual information, with the ones not evaluated last.
+
+        Rows evaluated with more samples come first, so candidates dropped early by an adaptive ranking follow the
+        ones that were kept.
+        """
+        evaluated = sorted((row for row in self.rows.values() if np.isfinite(row['MI'])), key=lambda row: (-row['nsamples'], -row['MI']))
+        others = [row for row in self.rows.values() if not np.isfinite(row['MI'])]
+        return evaluated + others
+
+    def uniform_samples(self):
+        """Samples a sweep evaluating every candidate with the full number of samples would spend."""
+        return len(self.candidates) * self.nsamples
+
+    def to_frame(self):
+        """Return the ranking as a table, including the settings needed to reproduce it."""
+        frame = pd.DataFrame(self.ranking(), columns=['variable', 'MI', 'error', 'MImax', 'nsamples', 'status'])
+        frame.insert(0, 'rank', [index + 1 if np.isfinite(mi) else None for index, mi in enumerate(frame['MI'])])
+        frame['target'] = self.target
+        frame['unit'] = self.unit
+        frame['learnt'] = os.path.basename(os.path.normpath(self.learnt_dir))
+        return frame
+
+    def export(self, path):
+        """Write the ranking to a CSV file."""
+        self.to_frame().to_csv(path, index=False)
+
+    def _submit(self, candidate, nsamples):
+        job_id = self.pool.submit(predictor=[self.target], learnt_dir=self.learnt_dir, additional_predictor=[candidate],
+                                  nsamples=nsamples, unit=self.unit)
+        self._jobs[job_id] = (candidate, nsamples)
+
+    def _on_result(self, job_id, result):
+        candidate, nsamples = self._jobs.pop(job_id, (None, 0))
+        if candidate is None:
+            return
+        row = self.rows[candidate]
+        row['MI'], row['error'] = mi_estimate(result)
+        row['MImax'], _ = mi_estimate(result, 'MImax')
+        row['nsamples'] = nsamples
+        row['status'] = "Done"
+        self.samples_spent += nsamples
+        self._after_job()
+
+    def _on_failed(self, job_id, message):
+        candidate, _ = self._jobs.pop(job_id, (None, 0))
+        if candidate is None:
+            return
+        self.rows[candidate]['status'] = "Failed"
+        self.rows[candidate]['message'] = message
+        self._after_job()
+
+    def _after_job(self):
+        self.updated.emit()
+        if not self._jobs:
+            if all(row['status'] == "Failed" for row in self.rows.values()):
+                self._finish("failed")
+                self.failed.emit(next(iter(self.rows.values())).get('message', "Every evaluation failed."))
+                return
+            self._round_finished()
+
+    def _round_finished(self):
+        """Called once every submitted evaluation has been answered."""
+        self._finish("finished")
+        self.finished.emit()
+
+    def _finish(self, state):
+        self.state = state
+        self._jobs = {}
+        if self.pool is not None:
+            self.pool.shutdown()
+
+
+class SuccessiveHalvingRanking(MIRanking):
+    """Find the top_k candidates by successive halving instead of evaluating every candidate with full precision.
+
+    Every candidate is first evaluated with initial_nsamples. After each round, candidates from the lower part
+    of the ranking whose MI is clearly below the k-th best (their upper bound, MI + z * error, under its lower
+    bound) are dropped, at most a fraction 1 - 1/eta of them, and the rest are evaluated again with eta times more
+    samples. It stops once the top_k are separated from the others by their bounds, or when the survivors have
+    been evaluated with nsamples; the ranking of dropped candidates is only as precise as their last evaluation.
+    """
+
+    def __init__(self, learnt_dir, target, candidates=None, top_k=5, initial_nsamples=400, nsamples=3600, eta=2, z=2.0,
+                 unit="Sh", workers=None):
+        super().__init__(learnt_dir, target, candidates, nsamples=nsamples, unit=unit, workers=workers)
+        self.top_k = max(1, top_k)
+        self.initial_nsamples = min(initial_nsamples, nsamples)
+        self.eta = max(2, eta)
+        self.z = z
+        self.round = 0
+        self.round_nsamples = self.initial_nsamples
+        self.resolved = False
+
+    def alive(self):
+        """Rows still in the race, ordered by decreasing MI."""
+        rows = [row for row in self.rows.values() if row['status'] == "Done" and row['nsamples'] == self.round_nsamples]
+        return sorted(rows, key=lambda row: -row['MI'])
+
+    def summary(self):
+        """Describe the samples spent compared with a uniform sweep."""
+        uniform = self.uniform_samples()
+        saving = f" ({uniform / self.samples_spent:.1f}x fewer)" if self.samples_spent else ""
+        outcome = "resolved" if self.resolved else "not resolved, survivors evaluated with the full samples"
+        return (f"Top {self.top_k} {outcome} after {self.round + 1} round(s): {self.samples_spent} samples spent "
+                f"against {uniform} for a uniform sweep{saving}.")
+
+    def to_frame(self):
+        frame = super().to_frame()
+        frame['top_k'] = self.top_k
+        frame['initial_nsamples'] = self.initial_nsamples
+        frame['max_nsamples'] = self.nsamples
+        return frame
+
+    def _separated(self, alive):
+        if len(alive) <= self.top_k:
+            return True
+        lowest_top = min(row['MI'] - self.z * row['error'] for row in alive[:self.top_k])
+        highest_rest = max(row['MI'] + self.z * row['error'] for row in alive[self.top_k:])
+        return lowest_top > highest_rest
+
+    def _round_finished(self):
+        alive = self.alive()
+        self.resolved = self._separated(alive)
+        if self.resolved or self.round_nsamples >= self.nsamples or not alive:
+            self._finish("finished")
+            self.finished.emit()
+            return
+
+        # Drop the clearly worse candidates, from the bottom of the ranking up to the halving limit
+        threshold = alive[self.top_k - 1]['MI'] - self.z * alive[self.top_k - 1]['error']
+        keep = max(self.top_k, int(np.ceil(len(alive) / self.eta)))
+        for row in alive[keep:]:
+            if row['MI'] + self.z * row['error'] < threshold:
+                row['status'] = "Dropped"
+        survivors = [row for row in alive if row['status'] == "Done"]
+
+        self.round += 1
+        self.round_nsamples = min(self.round_nsamples * self.eta, self.nsamples)
+        for row in survivors:
+            row['status'] = "Pending"
+            self._submit(row['variable'], self.round_nsamples)
+        self.updated.emit()
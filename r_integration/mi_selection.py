@@ -0,0 +1,164 @@
+import os
+import numpy as np
+import pandas as pd
+from PySide6.QtCore import QObject, Signal
+from r_integration.mi_pool import MIWorkerPool
+from r_integration.mi_ranking import mi_estimate, metadata_variables
+
+
+class ForwardSelection(QObject):
+    """Grow a set of predictors of a target variable one variable at a time by joint mutual information.
+
+    At each step the mutual information between the target and the selected variables plus one candidate is
+    computed for every remaining candidate, in parallel on an MIWorkerPool, and the candidate with the largest one
+    is added. It stops when the gain over the current set is below threshold, when max_size variables are selected
+    or when no candidate is left. Values are kept per set of variables in `values`, which can be passed on to a new
+    run with the same target, nsamples and unit, and the workers share the result cache on disk, so sets evaluated
+    by an earlier run or ranking are not recomputed.
+    """
+    updated = Signal()
+    finished = Signal()
+    failed = Signal(str)
+
+    def __init__(self, learnt_dir, target, candidates=None, threshold=0.01, max_size=None, nsamples=3600, unit="Sh", workers=None,
+                 values=None):
+        super().__init__()
+        self.learnt_dir = learnt_dir
+        self.target = target
+        if candidates is None:
+            candidates = [name for name in metadata_variables(learnt_dir) if name != target]
+        self.candidates = [name for name in candidates if name != target]
+        self.threshold = threshold
+        self.max_size = max_size or len(self.candidates)
+        self.nsamples = nsamples
+        self.unit = unit
+        self.workers = workers
+        self.selected = []
+        self.current = (0.0, 0.0)  # MI and error of the selected set
+        self.values = values if values is not None else {}  # frozenset of variables -> (MI, error)
+        self.steps = []
+        self.evaluations = 0
+        self.reused = 0
+        self.pool = None
+        self.message = None
+        self._jobs = {}  # job id -> (candidate, set of variables)
+        self._step = None
+        self._step_reused = 0
+        self.state = "queued"
+
+    def start(self):
+        if not self.candidates:
+            self.failed.emit("There are no candidate variables to select from.")
+            return
+        self.state = "running"
+        requested = min(self.workers or len(self.candidates), len(self.candidates))
+        self.pool = MIWorkerPool(requested)
+        self.pool.result_ready.connect(self._on_result)
+        self.pool.job_failed.connect(self._on_failed)
+        self._start_step()
+
+    def cancel(self):
+        """Stop the workers and keep the variables selected so far."""
+        if self.state != "running":
+            return
+        self._finish("cancelled")
+
+    def remaining(self):
+        return [name for name in self.candidates if name not in self.selected]
+
+    def pending_count(self):
+        """Number of evaluations of the current step not answered yet."""
+        return len(self._jobs)
+
+    def to_frame(self):
+        """Return one row per step, including the settings needed to reproduce the selection.
+
+        The last row is the best candidate of the step that stopped the selection, with selected False.
+        """
+        frame = pd.DataFrame(self.steps, columns=['step', 'variable', 'MI', 'error', 'gain', 'gain_error', 'selected',
+                                                  'evaluated', 'reused'])
+        frame['target'] = self.target
+        frame['threshold'] = self.threshold
+        frame['unit'] = self.unit
+        frame['nsamples'] = self.nsamples
+        frame['learnt'] = os.path.basename(os.path.normpath(self.learnt_dir))
+        return frame
+
+    def export(self, path):
+        """Write the selection steps to a CSV file."""
+        self.to_frame().to_csv(path, index=False)
+
+    def _start_step(self):
+        remaining = self.remaining()
+        if not remaining or len(self.selected) >= self.max_size:
+            self._finish("finished")
+            self.finished.emit()
+            return
+        self._step = {}  # candidate -> (MI, error), or None if the evaluation failed
+        self._step_reused = 0
+        for candidate in remaining:
+            variables = frozenset(self.selected + [candidate])
+            if variables in self.values:
+                self._step[candidate] = self.values[variables]
+                self._step_reused += 1
+                continue
+            # Sorted, so the same set always makes the same query and hits the result cache
+            job_id = self.pool.submit(predictor=[self.target], learnt_dir=self.learnt_dir, additional_predictor=sorted(variables),
+                                      nsamples=self.nsamples, unit=self.unit)
+            self._jobs[job_id] = (candidate, variables)
+        self.updated.emit()
+        if not self._jobs:
+            self._end_step()
+
+    def _on_result(self, job_id, result):
+        candidate, variables = self._jobs.pop(job_id, (None, None))
+        if candidate is None:
+            return
+        self.values[variables] = mi_estimate(result)
+        self._step[candidate] = self.values[variables]
+        self.evaluations += 1
+        self._after_job()
+
+    def _on_failed(self, job_id, message):
+        candidate, _ = self._jobs.pop(job_id, (None, None))
+        if candidate is None:
+            return
+        self._step[candidate] = None
+        self.message = message
+        self._after_job()
+
+    def _after_job(self):
+        self.updated.emit()
+        if not self._jobs:
+            self._end_step()
+
+    def _end_step(self):
+        evaluated = {name: value for name, value in self._step.items() if value is not None and np.isfinite(value[0])}
+        if not evaluated:
+            self._finish("failed")
+            self.failed.emit(self.message or "Every evaluation failed.")
+            return
+
+        best = max(evaluated, key=lambda name: evaluated[name][0])
+        mi, error = evaluated[best]
+        gain = mi - self.current[0]
+        gain_error = float(np.hypot(np.nan_to_num(error), np.nan_to_num(self.current[1])))
+        accepted = gain >= self.threshold
+        self.steps.append({'step': len(self.selected) + 1, 'variable': best, 'MI': mi, 'error': error, 'gain': gain,
+                           'gain_error': gain_error, 'selected': accepted, 'evaluated': len(self._step),
+                           'reused': self._step_reused})
+        self.reused += self._step_reused
+        if not accepted:
+            self._finish("finished")
+            self.updated.emit()
+            self.finished.emit()
+            return
+        self.selected.append(best)
+        self.current = (mi, error)
+        self._start_step()
+
+    def _finish(self, state):
+        self.state = state
+        self._jobs = {}
+        if self.pool is not None:
+            self.pool.shutdown()
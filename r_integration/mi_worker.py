@@ -0,0 +1,41 @@
+import os
+import sys
+import json
+import numpy as np
+from r_integration.resources import configure_thread_env
+
+
+def send(protocol, message):
+    """Write one JSON message to the pool, converting NumPy values to lists."""
+    protocol.write(json.dumps(message, default=lambda value: np.asarray(value).tolist()) + "\n")
+    protocol.flush()
+
+
+def main(argv):
+    """Answer mutualinfo requests read as JSON lines from stdin, one at a time, until stdin is closed."""
+    # Keep stdout for the replies; anything else written to it, R's console output included, goes to stderr
+    protocol = os.fdopen(os.dup(sys.stdout.fileno()), 'w')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    try:
+        configure_thread_env()
+        from r_integration.backend import load_backend
+        backend = load_backend()
+    except Exception as e:
+        send(protocol, {'error': f"Error loading R: {e}"})
+        return 1
+    send(protocol, {'ready': True})
+
+    for line in sys.stdin:
+        request = json.loads(line)
+        try:
+            # One core per worker: the pool gets its parallelism from the number of workers
+            result = backend.run_mutualinfo(**request['kwargs'], parallel=False)
+            send(protocol, {'id': request['id'], 'result': result})
+        except Exception as e:
+            send(protocol, {'id': request['id'], 'error': str(e)})
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,402 @@
+import os
+import sys
+import json
+import numpy as np
+import pandas as pd
+from scipy.special import log_ndtr, logsumexp, ndtr, ndtri
+from r_integration.results import ProbResult
+from r_integration.learnt_cache import DERIVED_FILES
+from r_integration.sample_store import write_columns, open_columns
+
+
+SAMPLES_FILE = DERIVED_FILES[0]  # written next to learnt.rds
+SAMPLES_FORMAT_VERSION = 3  # bump when the layout of the samples file changes
+VALIDATED_NSAMPLES = (100,)  # thinned sizes checked against R on export: the nsamples run_Pr and run_tailPr serve by default
+CHUNK_ELEMENTS = 2 ** 22  # bound on the elements of one (rows, components, samples) block
+VALIDATION_RTOL = 1e-6
+VALIDATION_ATOL = 1e-9
+
+CONTINUOUS_TYPES = ('R', 'C', 'D')
+CATEGORICAL_TYPES = ('O', 'N', 'B')
+
+
+def _forward_transform(variable, x):
+    """Map values of a continuous variable to the space of the mixture components."""
+    transform = variable['transform']
+    low, high = variable['domainmin'], variable['domainmax']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if transform == 'identity':
+            t = x
+        elif transform == 'log':
+            t = np.log(x - low)
+        elif transform == 'logminus':
+            t = np.log(high - x)
+        elif transform == 'Q':
+            t = ndtri((x - low) / (high - low))
+        else:
+            raise ValueError(f"Unsupported transform '{transform}' of variable '{variable['name']}'.")
+    return (t - variable['tlocation']) / variable['tscale']
+
+
+def _inverse_transform(variable, t):
+    """Map values in the space of the mixture components back to the variable's own values."""
+    transform = variable['transform']
+    low, high = variable['domainmin'], variable['domainmax']
+    t = t * variable['tscale'] + variable['tlocation']
+    if transform == 'log':
+        return low + np.exp(t)
+    if transform == 'logminus':
+        return high - np.exp(t)
+    if transform == 'Q':
+        return low + (high - low) * ndtr(t)
+    return t
+
+
+def _log_jacobian(variable, x):
+    """Log of |dt/dx| of the transform, turning component densities into densities of the variable itself."""
+    transform = variable['transform']
+    low, high = variable['domainmin'], variable['domainmax']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if transform == 'log':
+            log_derivative = -np.log(x - low)
+        elif transform == 'logminus':
+            log_derivative = -np.log(high - x)
+        elif transform == 'Q':
+            t = ndtri((x - low) / (high - low))
+            log_derivative = 0.5 * t ** 2 + 0.5 * np.log(2 * np.pi) - np.log(high - low)
+        else:
+            log_derivative = np.zeros_like(x)
+    return log_derivative - np.log(variable['tscale'])
+
+
+def _log_normal_interval(lower, upper, mean, sd):
+    """Log probability of a normal variable falling between lower and upper, for (rows,) bounds and (K, S) parameters."""
+    a = (lower[:, None, None] - mean) / sd
+    b = (upper[:, None, None] - mean) / sd
+    # Use the upper tail where it is more accurate
+    flip = a > 0
+    a, b = np.where(flip, -b, a), np.where(flip, -a, b)
+    log_b = log_ndtr(b)
+    with np.errstate(divide='ignore'):
+        return log_b + np.log1p(-np.exp(np.minimum(log_ndtr(a) - log_b, 0)))
+
+
+def _option_labels(values):
+    """Labels of categorical values as strings, writing whole numbers without a decimal point."""
+    labels = []
+    for value in values:
+        if isinstance(value, (float, np.floating)) and float(value).is_integer():
+            value = int(value)
+        labels.append(str(value))
+    return labels
+
+
+class MixtureSamples:
+    """Monte Carlo samples of the mixture model in a learnt folder, held as NumPy arrays.
+
+    Every sample s is a mixture of K components with weights W[:, s]; within a component the variables are
+    independent, continuous ones normal in a transformed space and categorical ones with a probability per option.
+    Loaded samples are views of the memory-mapped samples file, so only the variables and draws a query uses are read.
+    """
+
+    def __init__(self, weights, variables, arrays, source=None, validation_error=None, thinned=None):
+        self.weights = weights  # (K, S)
+        self.variables = variables  # name -> dict with type, transform and bounds from inferno's auxmetadata
+        self.arrays = arrays  # 'mean.<name>', 'sd.<name>' of shape (K, S) or 'prob.<name>' of shape (K, options, S)
+        self.source = source
+        self.validation_error = validation_error
+        self.thinned = list(thinned or [])  # nsamples below n_samples at which select() was checked to match R
+
+    @property
+    def n_components(self):
+        return self.weights.shape[0]
+
+    @property
+    def n_samples(self):
+        return self.weights.shape[1]
+
+    @property
+    def log_weights(self):
+        return np.log(self.weights)
+
+    @property
+    def validated(self):
+        return self.validation_error is not None and bool(np.isfinite(self.validation_error))
+
+    def supports(self, *frames):
+        """Return True when every column of the frames is a variable this engine can evaluate."""
+        for frame in frames:
+            if frame is None:
+                continue
+            for name in frame.columns:
+                variable = self.variables.get(name)
+                if variable is None or (variable['type'] in CONTINUOUS_TYPES and
+                                        variable['transform'] not in ('identity', 'log', 'logminus', 'Q')):
+                    return False
+        return True
+
+    def serves(self, nsamples):
+        """Return True when a query at nsamples uses all draws or a thinning checked against R."""
+        return nsamples is None or nsamples >= self.n_samples or nsamples in self.thinned
+
+    def select(self, nsamples):
+        """Return the samples thinned to nsamples evenly spaced draws, or self when nsamples covers them all."""
+        if nsamples is None or nsamples >= self.n_samples:
+            return self
+        index = np.unique(np.round(np.linspace(0, self.n_samples - 1, nsamples)).astype(np.intp))
+        arrays = {name: array[..., index] for name, array in self.arrays.items()}
+        return MixtureSamples(self.weights[:, index], self.variables, arrays, self.source, self.validation_error, self.thinned)
+
+    def log_likelihood(self, frame):
+        """Log probability (or density) of each row of frame under every component of every sample, shape (rows, K, S).
+
+        Missing values are left out, which marginalises their variables.
+        """
+        total = np.zeros((len(frame), self.n_components, self.n_samples))
+        for name in frame.columns:
+            total += self._log_prob(self.variables[name], frame[name])
+        return total
+
+    def _log_prob(self, variable, column):
+        name = variable['name']
+        if variable['type'] in CATEGORICAL_TYPES:
+            prob = self.arrays[f"prob.{name}"]
+            options = variable['options']
+            present = column.notna().to_numpy()
+            labels = _option_labels(column[present])
+            unknown = set(labels) - set(options)
+            if unknown:
+                raise ValueError(f"Unknown value(s) {sorted(unknown)} for variable '{name}'.")
+            index = np.array([options.index(label) for label in labels], dtype=np.intp)
+            result = np.zeros((len(column),) + prob[:, 0, :].shape)
+            with np.errstate(divide='ignore'):
+                result[present] = np.log(np.moveaxis(prob[:, index, :], 1, 0))
+            return result
+
+        x = column.to_numpy(dtype=np.float64, na_value=np.nan)
+        present = ~np.isnan(x)
+        x = x[present]
+        mean = self.arrays[f"mean.{name}"]
+        sd = self.arrays[f"sd.{name}"]
+        result = np.zeros((len(column),) + mean.shape)
+        t = _forward_transform(variable, x)
+        log_density = (-0.5 * np.log(2 * np.pi) - np.log(sd) -
+                       0.5 * ((t[:, None, None] - mean) / sd) ** 2 + _log_jacobian(variable, x)[:, None, None])
+
+        if variable['type'] == 'R':
+            result[present] = log_density
+        elif variable['type'] == 'D':
+            # Rounded values: probability of the interval of width two half-steps around the value
+            halfstep = variable['halfstep']
+            lower = np.where(x - halfstep <= variable['leftbound'], -np.inf, _forward_transform(variable, x - halfstep))
+            upper = np.where(x + halfstep >= variable['rightbound'], np.inf, _forward_transform(variable, x + halfstep))
+            result[present] = _log_normal_interval(lower, upper, mean, sd)
+        else:
+            # Censored values: the mass beyond a bound is piled up on it
+            at_left = x <= variable['leftbound']
+            at_right = x >= variable['rightbound']
+            inf = np.full(len(x), np.inf)
+            t_left = np.full(len(x), _forward_transform(variable, np.float64(variable['leftbound'])))
+            t_right = np.full(len(x), _forward_transform(variable, np.float64(variable['rightbound'])))
+            log_prob = np.where(at_left[:, None, None], _log_normal_interval(-inf, t_left, mean, sd), log_density)
+            log_prob = np.where(at_right[:, None, None], _log_normal_interval(t_right, inf, mean, sd), log_prob)
+            result[present] = log_prob
+        return result
+
+
+def _chunks(n_rows, row_elements, chunk_elements):
+    """Split range(n_rows) into slices whose blocks of row_elements per row stay within chunk_elements."""
+    size = max(1, chunk_elements // max(1, row_elements))
+    return [slice(start, min(start + size, n_rows)) for start in range(0, n_rows, size)]
+
+
+def evaluate_pr(samples, Y, X=None, quantiles=(0.055, 0.945), nsamples=None, chunk_elements=CHUNK_ELEMENTS):
+    """Compute Pr(Y | X) for every pair of Y and X rows from Monte Carlo samples, like inferno's Pr.
+
+    For each sample, the components are reweighted by how well they explain the X row, and the probability (or
+    density) of the Y row is averaged under those weights; the result is the mean over samples and its quantiles.
+    Rows are processed in blocks so no intermediate array grows much beyond chunk_elements.
+    """
+    samples = samples.select(nsamples)
+    n_components, n_samples = samples.weights.shape
+    levels = np.asarray(quantiles, dtype=np.float64)
+    row_elements = n_components * n_samples
+    has_x = X is not None and not X.empty
+    n_x = len(X) if has_x else 1
+
+    values = np.empty((len(Y), n_x))
+    quantile_values = np.empty((len(Y), n_x, len(levels)))
+    for x_block in _chunks(n_x, row_elements, chunk_elements):
+        # Component weights given each X row, sample-major (S, K, x) for the batched products below
+        if has_x:
+            log_weights = samples.log_weights[None] + samples.log_likelihood(X.iloc[x_block])
+            log_weights -= logsumexp(log_weights, axis=1, keepdims=True)
+            x_weights = np.exp(log_weights).transpose(2, 1, 0)
+        else:
+            x_weights = samples.weights.T[:, :, None]
+
+        n_block = x_weights.shape[2]
+        for y_block in _chunks(len(Y), max(row_elements, n_block * n_samples), chunk_elements):
+            log_y = samples.log_likelihood(Y.iloc[y_block])  # (y, K, S)
+            offset = log_y.max(axis=1)
+            offset[~np.isfinite(offset)] = 0
+            scaled = np.exp(log_y - offset[:, None, :]).transpose(2, 0, 1)  # (S, y, K)
+            per_sample = np.matmul(scaled, x_weights) * np.exp(offset).T[:, :, None]  # (S, y, x)
+            values[y_block, x_block] = per_sample.mean(axis=0)
+            quantile_values[y_block, x_block] = np.moveaxis(np.quantile(per_sample, levels, axis=0), 0, -1)
+
+    return ProbResult(values, quantile_values, levels.tolist(), list(Y.columns), list(X.columns) if has_x else [])
+
+
+def source_stamp(learnt_dir):
+    """Modification time and size of learnt.rds, to tell whether exported samples are still current."""
+    stat = os.stat(os.path.join(learnt_dir, 'learnt.rds'))
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def samples_from_export(exported, source=None):
+    """Build MixtureSamples from the lists returned by the R backend's export_samples."""
+    arrays = exported['arrays']
+    weights = np.array(arrays['W'], dtype=np.float64)
+    weights /= weights.sum(axis=0, keepdims=True)
+    columns = exported['variables']
+    options = exported.get('options', {})
+    names = columns['name'] if isinstance(columns['name'], list) else [columns['name']]
+
+    variables = {}
+    samples_arrays = {}
+    for i, name in enumerate(names):
+        def field(key, default=np.nan):
+            value = columns.get(key, default)
+            if isinstance(value, (list, np.ndarray)):
+                value = value[i]
+            return value
+
+        variable = {
+            'name': name,
+            'type': str(field('mcmctype')),
+            'transform': str(field('transform', 'identity')),
+            'domainmin': float(field('domainmin', -np.inf)),
+            'domainmax': float(field('domainmax', np.inf)),
+            'tlocation': float(field('tlocation', 0.0)),
+            'tscale': float(field('tscale', 1.0)),
+            'halfstep': float(field('halfstep', 0.0)),
+        }
+        variable['leftbound'] = float(field('leftbound', variable['domainmin']))
+        variable['rightbound'] = float(field('rightbound', variable['domainmax']))
+        variable_options = options.get(name, [])
+        variable['options'] = [variable_options] if isinstance(variable_options, str) else list(variable_options)
+        variables[name] = variable
+
+        if variable['type'] in CONTINUOUS_TYPES:
+            samples_arrays[f"mean.{name}"] = np.array(arrays[f"mean.{name}"], dtype=np.float64)
+            samples_arrays[f"sd.{name}"] = np.sqrt(np.array(arrays[f"var.{name}"], dtype=np.float64))
+        elif variable['type'] == 'B':
+            # One probability per component: of the second option
+            p = np.array(arrays[f"prob.{name}"], dtype=np.float64)
+            samples_arrays[f"prob.{name}"] = np.stack([1 - p, p], axis=1)
+        else:
+            samples_arrays[f"prob.{name}"] = np.array(arrays[f"prob.{name}"], dtype=np.float64)
+
+    return MixtureSamples(weights, variables, samples_arrays, source)
+
+
+def save_samples(samples, learnt_dir):
+    """Write the samples and their validation result next to learnt.rds.
+
+    Arrays are stored sample-major, so the draws selected for a query are contiguous rows of each column.
+    """
+    metadata = {
+        'version': SAMPLES_FORMAT_VERSION,
+        'source': samples.source,
+        'validation_error': samples.validation_error,
+        'thinned': samples.thinned,
+        'variables': samples.variables
+    }
+    columns = {'W': samples.weights.T}
+    columns.update((name, np.moveaxis(array, -1, 0)) for name, array in samples.arrays.items())
+    write_columns(os.path.join(learnt_dir, SAMPLES_FILE), columns, metadata)
+
+
+def load_samples(learnt_dir):
+    """Map the exported samples of a learnt folder, or return None when there are none or learnt.rds has changed since."""
+    try:
+        metadata, columns = open_columns(os.path.join(learnt_dir, SAMPLES_FILE))
+        if metadata['version'] != SAMPLES_FORMAT_VERSION or metadata['source'] != source_stamp(learnt_dir):
+            return None
+    except (OSError, ValueError, KeyError):
+        return None
+    arrays = {name: np.moveaxis(column, 0, -1) for name, column in columns.items() if name != 'W'}
+    return MixtureSamples(columns['W'].T, metadata['variables'], arrays, metadata['source'], metadata['validation_error'],
+                          metadata['thinned'])
+
+
+def probe_queries(samples, rows=4):
+    """Small Pr queries covering every variable, used to compare this engine with R."""
+    rng = np.random.default_rng(0)
+    values = {}
+    for name, variable in samples.variables.items():
+        if variable['type'] in CATEGORICAL_TYPES:
+            values[name] = list(variable['options'])
+        else:
+            points = _inverse_transform(variable, np.array([-1.5, -0.5, 0.0, 0.5, 1.5]))
+            points = np.clip(points, variable['leftbound'], variable['rightbound'])
+            if variable['type'] == 'D' and variable['halfstep'] > 0:
+                step = 2 * variable['halfstep']
+                points = np.round(points / step) * step
+            values[name] = points.tolist()
+
+    names = list(values)
+    queries = []
+    for y_name in names[:2]:
+        x_names = [name for name in names if name != y_name]
+        Y = pd.DataFrame({y_name: values[y_name]})
+        X = pd.DataFrame({name: rng.choice(np.array(values[name], dtype=object), rows) for name in x_names}) if x_names else None
+        if X is not None:
+            X = X.infer_objects()
+        queries.append((Y, X))
+    return queries
+
+
+def validate_samples(samples, backend, learnt_dir, nsamples=None):
+    """Compare the engine with the backend's Pr on probe queries at nsamples, or over all samples; return the largest difference.
+
+    Below n_samples this checks that select() thins the draws as R does. The difference is infinite when any probe
+    disagrees beyond the tolerance.
+    """
+    nsamples = nsamples or samples.n_samples
+    largest = 0.0
+    for Y, X in probe_queries(samples):
+        expected = backend.run_Pr(Y, learnt_dir, X, nsamples=nsamples)
+        actual = evaluate_pr(samples, Y, X, nsamples=nsamples)
+        if expected is None:
+            return np.inf
+        if not (np.allclose(actual.values, expected.values, rtol=VALIDATION_RTOL, atol=VALIDATION_ATOL) and
+                np.allclose(actual.quantiles, expected.quantiles, rtol=VALIDATION_RTOL, atol=VALIDATION_ATOL)):
+            difference = np.nanmax(np.abs(actual.values - expected.values))
+            print(f"Error validating the NumPy Pr engine for {learnt_dir} at nsamples={nsamples}: largest difference {difference:g}")
+            return np.inf
+        largest = max(largest, float(np.max(np.abs(actual.values - expected.values), initial=0.0)))
+    return largest
+
+
+def export_samples(backend, learnt_dir):
+    """Export the samples of a learnt folder through the R backend, validate them against its Pr and save them."""
+    samples = samples_from_export(backend.export_samples(learnt_dir), source_stamp(learnt_dir))
+    samples.validation_error = validate_samples(samples, backend, learnt_dir)
+    if samples.validated:
+        # Queries at any other thinned size go to R, so answers never depend on an unchecked choice of draws
+        samples.thinned = [nsamples for nsamples in VALIDATED_NSAMPLES if nsamples < samples.n_samples and
+                           np.isfinite(validate_samples(samples, backend, learnt_dir, nsamples))]
+    save_samples(samples, learnt_dir)
+    return samples
+
+
+if __name__ == "__main__":
+    # python -m r_integration.native_pr <learnt folder>...: export and validate the samples of folders with R
+    import r_integration.inferno_functions as inferno_functions
+    for learnt_dir in sys.argv[1:]:
+        result = export_samples(inferno_functions, learnt_dir)
+        print(json.dumps({'folder': learnt_dir, 'components': result.n_components, 'samples': result.n_samples,
+                          'validation_error': result.validation_error, 'validated': result.validated,
+                          'thinned': result.thinned}))
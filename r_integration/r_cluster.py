@@ -0,0 +1,61 @@
+import time
+from rpy2 import robjects
+
+
+DEFAULT_IDLE_TIMEOUT = 600  # seconds without queries before the workers are shut down
+
+_R_START_CLUSTER = """
+function(n_workers) {
+    cl <- parallel::makeCluster(n_workers)
+    parallel::clusterEvalQ(cl, suppressPackageStartupMessages(library(inferno)))
+    doParallel::registerDoParallel(cl)
+    cl
+}
+"""
+
+_R_STOP_CLUSTER = """
+function(cl) {
+    try(parallel::stopCluster(cl), silent = TRUE)
+    foreach::registerDoSEQ()
+    invisible(NULL)
+}
+"""
+
+
+class WarmCluster:
+    """A persistent R socket cluster with inferno loaded, registered as the foreach backend and reused across calls.
+
+    Must only be used from the R executor thread.
+    """
+
+    def __init__(self, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self.n_workers = 0
+        self._cluster = None
+        self._last_used = time.monotonic()
+        self._start_cluster = robjects.r(_R_START_CLUSTER)
+        self._stop_cluster = robjects.r(_R_STOP_CLUSTER)
+
+    def acquire(self, n_workers):
+        """Make sure a cluster with n_workers workers is running and registered."""
+        self._last_used = time.monotonic()
+        if self._cluster is not None and self.n_workers == n_workers:
+            return
+        self.stop()
+        if n_workers >= 2:
+            self._cluster = self._start_cluster(n_workers)
+            self.n_workers = n_workers
+
+    def is_running(self):
+        return self._cluster is not None
+
+    def stop(self):
+        """Shut down the workers and fall back to sequential evaluation."""
+        if self._cluster is not None:
+            self._stop_cluster(self._cluster)
+            self._cluster = None
+            self.n_workers = 0
+
+    def is_idle(self):
+        """True if the workers are running but no call has used them within the idle timeout."""
+        return self._cluster is not None and time.monotonic() - self._last_used > self.idle_timeout
@@ -0,0 +1,153 @@
+import queue
+import threading
+from concurrent.futures import Future
+from PySide6.QtCore import QObject, Signal
+from r_integration.backend import load_backend
+
+
+class RTask(QObject):
+    """Handle for a call submitted to the R executor. Signals are emitted on the GUI thread."""
+    finished = Signal(object)
+    failed = Signal(object)
+
+    def __init__(self, func_name, args, kwargs):
+        super().__init__()
+        self.func_name = func_name
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+
+    def cancel(self):
+        """Cancel the task if it has not started running yet."""
+        return self.future.cancel()
+
+
+# Queue marker that loads the backend without running a function
+_PRELOAD = object()
+
+
+class RExecutor(QObject):
+    """Single worker thread that owns the inference backend (and with it the rpy2 session) and runs queued calls one at a time.
+
+    If the backend defines on_idle() or on_shutdown(), they are called on the worker thread every
+    idle_interval seconds without tasks and when the executor stops.
+    """
+    _task_done = Signal(object)
+    _status_set = Signal(str)
+    queue_changed = Signal(int)
+    r_status_changed = Signal(str)
+
+    def __init__(self, backend_factory=load_backend, idle_interval=30):
+        super().__init__()
+        self.backend_factory = backend_factory
+        self.idle_interval = idle_interval
+        self._backend = None
+        self.r_status = "not loaded"
+        self._queue = queue.Queue()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._task_done.connect(self._dispatch)
+        self._status_set.connect(self._set_status)
+        self._thread = threading.Thread(target=self._worker, name="RExecutor", daemon=True)
+        self._thread.start()
+
+    def submit(self, func_name, *args, **kwargs):
+        """Queue a call to a backend function, or to a callable that must run on the R thread, and return its task handle."""
+        task = RTask(func_name, args, kwargs)
+        with self._lock:
+            self._pending += 1
+            pending = self._pending
+        self._queue.put(task)
+        self.queue_changed.emit(pending)
+        return task
+
+    def preload(self):
+        """Load the backend, starting R, in the background ahead of the first call."""
+        self._queue.put(_PRELOAD)
+
+    def pending_count(self):
+        """Number of tasks queued or running."""
+        with self._lock:
+            return self._pending
+
+    def shutdown(self, wait=False):
+        """Stop the worker after the tasks already queued have been processed."""
+        self._queue.put(None)
+        if wait:
+            self._thread.join()
+
+    def _worker(self):
+        """Process tasks from the queue on the executor thread."""
+        while True:
+            try:
+                task = self._queue.get(timeout=self.idle_interval)
+            except queue.Empty:
+                self._call_hook('on_idle')
+                continue
+            if task is None:
+                self._call_hook('on_shutdown')
+                break
+            if task is _PRELOAD:
+                try:
+                    self._load_backend()
+                except Exception as e:
+                    print(f"Error loading R: {e}")
+                continue
+
+            if task.future.set_running_or_notify_cancel():
+                try:
+                    func = task.func_name if callable(task.func_name) else getattr(self._load_backend(), task.func_name)
+                    task.future.set_result(func(*task.args, **task.kwargs))
+                except Exception as e:
+                    task.future.set_exception(e)
+
+            with self._lock:
+                self._pending -= 1
+            self._task_done.emit(task)
+
+    def _load_backend(self):
+        """Create the backend on this thread, so the embedded R session is created and used by one thread only."""
+        if self._backend is None:
+            self._status_set.emit("loading")
+            try:
+                self._backend = self.backend_factory()
+            except Exception:
+                self._status_set.emit("failed")
+                raise
+            self._status_set.emit("ready")
+        return self._backend
+
+    def _call_hook(self, name):
+        """Call an optional housekeeping function of the backend, if it has been loaded."""
+        hook = getattr(self._backend, name, None) if self._backend is not None else None
+        if hook is None:
+            return
+        try:
+            hook()
+        except Exception as e:
+            print(f"Error in R executor {name}: {e}")
+
+    def _set_status(self, status):
+        self.r_status = status
+        self.r_status_changed.emit(status)
+
+    def _dispatch(self, task):
+        """Relay the outcome of a task to its signals on the GUI thread."""
+        self.queue_changed.emit(self.pending_count())
+        if task.future.cancelled():
+            return
+        error = task.future.exception()
+        if error is not None:
+            task.failed.emit(error)
+        else:
+            task.finished.emit(task.future.result())
+
+
+_executor = None
+
+def get_executor():
+    """Return the application-wide R executor, creating it on first use."""
+    global _executor
+    if _executor is None:
+        _executor = RExecutor()
+    return _executor
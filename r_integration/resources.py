@@ -0,0 +1,236 @@
+import os
+import sys
+import json
+import math
+import threading
+import subprocess
+
+
+CGROUP_ROOT = '/sys/fs/cgroup'
+CPU_TOPOLOGY_PATH = '/sys/devices/system/cpu/cpu{}/topology/thread_siblings_list'
+
+# Thread pools of the BLAS/OpenMP libraries that R may be linked against
+THREAD_ENV_VARS = ['OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'VECLIB_MAXIMUM_THREADS', 'BLIS_NUM_THREADS']
+
+
+def affinity_cpus():
+    """Return the ids of the CPUs this process may run on, or None when the platform does not tell."""
+    if hasattr(os, 'sched_getaffinity'):
+        try:
+            return sorted(os.sched_getaffinity(0))
+        except OSError:
+            pass
+    return None
+
+
+def read_text(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def cgroup_paths():
+    """Return the cgroup v2 path and the v1 cpu controller path of this process from /proc/self/cgroup."""
+    v2_path, v1_path = None, None
+    content = read_text('/proc/self/cgroup') or ''
+    for line in content.splitlines():
+        parts = line.split(':', 2)
+        if len(parts) != 3:
+            continue
+        _, controllers, path = parts
+        if controllers == '':
+            v2_path = path
+        elif 'cpu' in controllers.split(','):
+            v1_path = path
+    return v2_path, v1_path
+
+
+def cgroup_cpu_limit():
+    """Return the CPU limit set by a cgroup v2 or v1 quota as a number of CPUs, or None when unlimited."""
+    v2_path, v1_path = cgroup_paths()
+
+    # cgroup v2: "<quota> <period>" or "max <period>"; a container usually sees its own cgroup as the root
+    for directory in [os.path.join(CGROUP_ROOT, (v2_path or '').lstrip('/')), CGROUP_ROOT]:
+        cpu_max = read_text(os.path.join(directory, 'cpu.max'))
+        if cpu_max:
+            quota, _, period = cpu_max.partition(' ')
+            if quota == 'max':
+                return None
+            try:
+                return int(quota) / int(period or 100000)
+            except ValueError:
+                return None
+
+    # cgroup v1: cpu.cfs_quota_us is -1 when unlimited
+    for controller in ['cpu,cpuacct', 'cpu', 'cpuacct,cpu']:
+        for directory in [os.path.join(CGROUP_ROOT, controller, (v1_path or '').lstrip('/')), os.path.join(CGROUP_ROOT, controller)]:
+            quota = read_text(os.path.join(directory, 'cpu.cfs_quota_us'))
+            period = read_text(os.path.join(directory, 'cpu.cfs_period_us'))
+            if quota is None or period is None:
+                continue
+            try:
+                quota, period = int(quota), int(period)
+            except ValueError:
+                return None
+            return quota / period if quota > 0 and period > 0 else None
+    return None
+
+
+def physical_cores(cpus=None):
+    """Return the number of physical cores, restricted to the given CPU ids on Linux, or None if unknown."""
+    if sys.platform.startswith('linux'):
+        cpus = cpus if cpus is not None else range(os.cpu_count() or 1)
+        cores = set()
+        for cpu in cpus:
+            siblings = read_text(CPU_TOPOLOGY_PATH.format(cpu))
+            if siblings is None:
+                return None
+            cores.add(siblings)
+        return len(cores) or None
+
+    if sys.platform == 'darwin':
+        command = ['sysctl', '-n', 'hw.physicalcpu']
+    elif os.name == 'nt':
+        command = ['powershell', '-NoProfile', '-Command', '(Get-CimInstance Win32_Processor | Measure-Object -Property NumberOfCores -Sum).Sum']
+    else:
+        return None
+
+    try:
+        output = subprocess.check_output(command, stderr=subprocess.DEVNULL, timeout=10)
+        return int(output.decode().strip())
+    except (OSError, ValueError, subprocess.SubprocessError) as e:
+        print(f"Error fetching physical cores: {e}")
+        return None
+
+
+class CpuBudget:
+    """The number of cores the app may use, and how that number was decided."""
+
+    def __init__(self):
+        self.logical = os.cpu_count() or 1
+        cpus = affinity_cpus()
+        self.affinity = len(cpus) if cpus is not None else None
+        self.cgroup_limit = cgroup_cpu_limit()
+        self.physical = physical_cores(cpus)
+
+        # Hyperthreads share a core's floating point units, so the MCMC and Monte Carlo workers scale with physical cores
+        candidates = {'logical CPUs': self.logical}
+        if self.affinity is not None:
+            candidates['CPU affinity'] = self.affinity
+        if self.physical is not None:
+            candidates['physical cores'] = self.physical
+        if self.cgroup_limit is not None:
+            candidates['cgroup CPU quota'] = max(1, math.floor(self.cgroup_limit))
+        self.limited_by = min(candidates, key=candidates.get)
+        self.usable = candidates[self.limited_by]
+
+    def as_dict(self):
+        return {
+            'logical': self.logical,
+            'affinity': self.affinity,
+            'cgroup_limit': self.cgroup_limit,
+            'physical': self.physical,
+            'usable': self.usable,
+            'limited_by': self.limited_by
+        }
+
+
+class Lease:
+    """A number of workers granted by the governor, returned with release()."""
+
+    def __init__(self, governor, kind, workers, preemptible):
+        self.governor = governor
+        self.kind = kind
+        self.workers = workers
+        self.preemptible = preemptible
+        self.released = False
+
+    def release(self):
+        self.governor.release(self)
+
+
+class ParallelismGovernor:
+    """Hand out worker counts to learn runs and queries from one shared budget of cores.
+
+    A preemptible lease, like the one held by the warm query cluster, does not hold back later requests: they
+    are granted as if it were free, and its holder shrinks once overcommitted() reports the budget exceeded.
+    """
+
+    def __init__(self, budget=None):
+        self.budget = budget or CpuBudget()
+        self.total = self.budget.usable
+        self._leases = []
+        self._lock = threading.Lock()
+
+    def available(self, preemptible=True):
+        """Number of cores not held by any lease, or only not held by non-preemptible leases if preemptible is False."""
+        with self._lock:
+            return self._available(self._holding(preemptible))
+
+    def acquire(self, kind, requested=None, preemptible=False):
+        """Grant up to `requested` workers (all free cores if None) for a 'learn' run, an 'mi' worker pool or the 'query' workers.
+
+        At least one worker is always granted, so a call never waits for the budget.
+        """
+        with self._lock:
+            free = self._available(self._holding(preemptible))
+            workers = free if requested is None else min(int(requested), free)
+            lease = Lease(self, kind, max(1, workers), preemptible)
+            self._leases.append(lease)
+            return lease
+
+    def release(self, lease):
+        with self._lock:
+            if not lease.released:
+                lease.released = True
+                self._leases.remove(lease)
+
+    def overcommitted(self):
+        """True if the leases together hold more workers than the budget."""
+        with self._lock:
+            return sum(lease.workers for lease in self._leases) > self.total
+
+    def describe(self):
+        """Return the detected budget and the current leases, for inspection."""
+        with self._lock:
+            return {
+                'budget': self.budget.as_dict(),
+                'total': self.total,
+                'available': self._available(self._leases),
+                'leases': [{'kind': lease.kind, 'workers': lease.workers, 'preemptible': lease.preemptible} for lease in self._leases]
+            }
+
+    def _holding(self, preemptible):
+        """The leases that count against a request of the given kind."""
+        return self._leases if preemptible else [lease for lease in self._leases if not lease.preemptible]
+
+    def _available(self, leases):
+        return max(0, self.total - sum(lease.workers for lease in leases))
+
+
+def configure_thread_env(threads=1):
+    """Limit the BLAS/OpenMP thread pools of R and its workers, unless the user has set them already.
+
+    Must be called before R is started: parallelism comes from the workers, and every worker also running a
+    full-size BLAS pool would oversubscribe the cores.
+    """
+    for name in THREAD_ENV_VARS:
+        os.environ.setdefault(name, str(threads))
+
+
+_governor = None
+_governor_lock = threading.Lock()
+
+def get_governor():
+    """Return the application-wide parallelism governor, detecting the CPU budget on first use."""
+    global _governor
+    with _governor_lock:
+        if _governor is None:
+            _governor = ParallelismGovernor()
+        return _governor
+
+
+if __name__ == "__main__":
+    print(json.dumps(get_governor().describe(), indent=4))
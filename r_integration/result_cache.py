@@ -0,0 +1,149 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from appdirs import user_data_dir
+from r_integration.learnt_cache import folder_fingerprint
+
+
+APP_DIR = user_data_dir("Inferno App", "inferno")
+RESULT_CACHE_FOLDER = os.path.join(APP_DIR, 'cache', 'results')
+
+DEFAULT_MEMORY_BYTES = 256 * 1024 ** 2
+DEFAULT_DISK_BYTES = 2 * 1024 ** 3
+RESULT_FORMAT_VERSION = 2  # bump when the layout of stored results changes
+
+
+def hash_dataframe(hasher, df):
+    """Feed the column names, dtypes and row hashes of a DataFrame into a hash object."""
+    if df is None or df.empty:
+        hasher.update(b'<empty>')
+        return
+    hasher.update(json.dumps([str(c) for c in df.columns]).encode())
+    hasher.update(json.dumps([str(t) for t in df.dtypes]).encode())
+    hasher.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+
+
+def result_key(func_name, learnt_dir, dataframes, **params):
+    """Build a content-addressed key for a query from its inputs and the state of the learnt folder."""
+    hasher = hashlib.sha256()
+    hasher.update(f"{RESULT_FORMAT_VERSION}:{func_name}".encode())
+    hasher.update(repr(folder_fingerprint(learnt_dir)).encode())
+    for df in dataframes:
+        hash_dataframe(hasher, df)
+    hasher.update(json.dumps(params, sort_keys=True, default=str).encode())
+    return hasher.hexdigest()
+
+
+class ResultCache:
+    """Two-tier cache of query results: an in-memory LRU in front of .npz files on disk."""
+
+    def __init__(self, folder=RESULT_CACHE_FOLDER, max_memory_bytes=DEFAULT_MEMORY_BYTES, max_disk_bytes=DEFAULT_DISK_BYTES):
+        self.folder = folder
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()  # key -> (dict of arrays, size in bytes)
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        os.makedirs(self.folder, exist_ok=True)
+
+    def get(self, key):
+        """Return the cached dict of arrays for a key, or None."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return entry[0]
+
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                arrays = {name: data[name] for name in data.files}
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.disk_hits += 1
+            self._remember(key, arrays)
+        return arrays
+
+    def put(self, key, arrays):
+        """Store a dict of arrays in both tiers."""
+        arrays = {name: np.asarray(value) for name, value in arrays.items()}
+        with self._lock:
+            self._remember(key, arrays)
+
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"  # unique across the processes sharing the folder
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_path, path)
+            self._evict_disk()
+        except OSError as e:
+            print(f"Error writing result cache: {e}")
+
+    def clear(self):
+        """Remove every cached result."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        for name in os.listdir(self.folder):
+            if name.endswith('.npz'):
+                os.remove(os.path.join(self.folder, name))
+
+    def stats(self):
+        """Return the hit and miss counters and the size of both tiers."""
+        with self._lock:
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes
+            }
+
+    def _path(self, key):
+        return os.path.join(self.folder, f"{key}.npz")
+
+    def _remember(self, key, arrays):
+        """Insert into the memory tier and evict least recently used entries beyond its budget."""
+        size = sum(a.nbytes for a in arrays.values())
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= old[1]
+        self._memory[key] = (arrays, size)
+        self._memory_bytes += size
+        while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+            _, (_, evicted_size) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted_size
+
+    def _evict_disk(self):
+        """Delete the least recently used files once the disk tier exceeds its budget."""
+        files = []
+        for entry in os.scandir(self.folder):
+            if entry.name.endswith('.npz'):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+result_cache = ResultCache()
@@ -0,0 +1,119 @@
+import numpy as np
+
+
+class ProbResult:
+    """Result of a Pr or tailPr query with named axes.
+
+    values has shape (Y, X): one row per row of the Y frame and one column per row of the X frame.
+    quantiles has shape (Y, X, quantile), with the quantile levels in quantile_levels.
+    """
+
+    def __init__(self, values, quantiles, quantile_levels, y_variables, x_variables, y_labels=None, x_labels=None):
+        self.values = values
+        self.quantiles = quantiles
+        self.quantile_levels = list(quantile_levels)
+        self.y_variables = list(y_variables)
+        self.x_variables = list(x_variables)
+        self.y_labels = y_labels
+        self.x_labels = x_labels
+
+    @property
+    def n_y(self):
+        return self.values.shape[0]
+
+    @property
+    def n_x(self):
+        return self.values.shape[1]
+
+    def points_axis(self, plot_variable):
+        """Return 'Y' or 'X', the axis whose rows hold the values of the plotted variable."""
+        if plot_variable in self.y_variables:
+            return 'Y'
+        if plot_variable in self.x_variables:
+            return 'X'
+        raise KeyError(f"The plot variable '{plot_variable}' was not found in Y or X.")
+
+    def n_curves(self, plot_variable):
+        """Number of curves when plotting against the given variable."""
+        return self.n_x if self.points_axis(plot_variable) == 'Y' else self.n_y
+
+    def curve(self, index, plot_variable):
+        """Return views of the probabilities and the lowest and highest quantiles of one curve."""
+        if self.points_axis(plot_variable) == 'Y':
+            return self.values[:, index], self.quantiles[:, index, 0], self.quantiles[:, index, -1]
+        return self.values[index, :], self.quantiles[index, :, 0], self.quantiles[index, :, -1]
+
+    def split_x(self, sizes):
+        """Split the result into consecutive blocks of X rows with the given sizes."""
+        results = []
+        start = 0
+        for size in sizes:
+            block = slice(start, start + size)
+            x_labels = self.x_labels[block] if self.x_labels is not None else None
+            results.append(ProbResult(self.values[:, block], self.quantiles[:, block, :], self.quantile_levels,
+                                      self.y_variables, self.x_variables, self.y_labels, x_labels))
+            start += size
+        return results
+
+    def take(self, y_index, x_index):
+        """Return the result for the given Y rows and X rows, in that order."""
+        y_index = np.asarray(y_index, dtype=np.intp)
+        x_index = np.asarray(x_index, dtype=np.intp)
+        y_labels = [self.y_labels[i] for i in y_index] if self.y_labels is not None else None
+        x_labels = [self.x_labels[i] for i in x_index] if self.x_labels is not None else None
+        return ProbResult(self.values[np.ix_(y_index, x_index)], self.quantiles[np.ix_(y_index, x_index)], self.quantile_levels,
+                          self.y_variables, self.x_variables, y_labels, x_labels)
+
+    def to_arrays(self):
+        """Return the result as a dict of arrays, for example to store it in the result cache."""
+        arrays = {
+            'values': self.values,
+            'quantiles': self.quantiles,
+            'quantile_levels': np.asarray(self.quantile_levels, dtype=np.float64),
+            'y_variables': np.asarray(self.y_variables, dtype=str),
+            'x_variables': np.asarray(self.x_variables, dtype=str)
+        }
+        if self.y_labels is not None:
+            arrays['y_labels'] = np.asarray(self.y_labels, dtype=str)
+        if self.x_labels is not None:
+            arrays['x_labels'] = np.asarray(self.x_labels, dtype=str)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Rebuild a result from the dict produced by to_arrays."""
+        return cls(
+            arrays['values'],
+            arrays['quantiles'],
+            arrays['quantile_levels'].tolist(),
+            arrays['y_variables'].tolist(),
+            arrays['x_variables'].tolist(),
+            arrays['y_labels'].tolist() if 'y_labels' in arrays else None,
+            arrays['x_labels'].tolist() if 'x_labels' in arrays else None
+        )
+
+
+def mutualinfo_to_arrays(result):
+    """Return a mutualinfo result as a dict of arrays for the result cache, or None if it holds nested values."""
+    arrays = {}
+    for name, value in result.items():
+        if isinstance(value, dict):
+            return None
+        if isinstance(value, (str, list)) and all(isinstance(item, str) for item in np.atleast_1d(value)):
+            arrays[name] = np.asarray(value, dtype=str)
+        else:
+            arrays[name] = np.asarray(value, dtype=np.float64)
+    return arrays
+
+
+def mutualinfo_from_arrays(arrays):
+    """Rebuild a mutualinfo result from the dict produced by mutualinfo_to_arrays."""
+    result = {}
+    for name, array in arrays.items():
+        if array.ndim == 0:
+            result[name] = array.item()
+        elif array.dtype.kind == 'U':
+            result[name] = array.tolist()
+        else:
+            result[name] = array
+    return result
@@ -0,0 +1,62 @@
+import os
+import json
+import threading
+import numpy as np
+
+
+# Layout: MAGIC, header length (uint64, little-endian), JSON header, then every column starting on an ALIGNMENT
+# boundary as a C-ordered little-endian array; column offsets in the header are relative to the first column.
+MAGIC = b'INFCOLS1'
+ALIGNMENT = 4096  # page size, so a column can be mapped without touching its neighbours
+
+
+def _aligned(position):
+    return -(-position // ALIGNMENT) * ALIGNMENT
+
+
+def write_columns(path, columns, metadata=None):
+    """Write a dict of arrays and a JSON-serialisable metadata dict as a columnar file, atomically."""
+    layout = {}
+    offset = 0
+    arrays = {}
+    for name, array in columns.items():
+        array = np.ascontiguousarray(array, dtype=np.asarray(array).dtype.newbyteorder('<'))
+        arrays[name] = array
+        layout[name] = {'offset': offset, 'shape': list(array.shape), 'dtype': array.dtype.str}
+        offset = _aligned(offset + array.nbytes)
+    header = json.dumps({'metadata': metadata or {}, 'columns': layout}).encode()
+    data_start = _aligned(len(MAGIC) + 8 + len(header))
+
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"  # unique across processes writing the same file
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(8, 'little'))
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(data_start + layout[name]['offset'])
+            f.write(array.tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+
+
+def open_columns(path):
+    """Map a columnar file read-only and return its metadata and a dict of arrays backed by the mapping.
+
+    Nothing is read until an array is accessed, and then only the pages touched; processes mapping the same
+    file share those pages through the OS cache.
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a columnar file.")
+        header_length = int.from_bytes(f.read(8), 'little')
+        header = json.loads(f.read(header_length))
+    data_start = _aligned(len(MAGIC) + 8 + header_length)
+
+    mapping = np.memmap(path, dtype=np.uint8, mode='r')
+    columns = {}
+    for name, column in header['columns'].items():
+        dtype = np.dtype(column['dtype'])
+        start = data_start + column['offset']
+        size = int(np.prod(column['shape'], dtype=np.int64)) * dtype.itemsize
+        columns[name] = mapping[start:start + size].view(dtype).reshape(column['shape'])
+    return header['metadata'], columns
@@ -0,0 +1,306 @@
+import os
+import json
+import time
+import queue
+import argparse
+import threading
+from collections import deque
+from concurrent.futures import Future
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import numpy as np
+import pandas as pd
+from appdirs import user_data_dir
+from r_integration.backend import load_backend
+
+
+APP_DIR = user_data_dir("Inferno App", "inferno")
+LEARNT_FOLDER = os.path.join(APP_DIR, 'learnt')
+
+DEFAULT_PORT = 8765
+DEFAULT_WINDOW_MS = 20
+MAX_BATCH_REQUESTS = 256
+REQUEST_TIMEOUT = 600  # seconds a client waits for its batch
+LATENCY_WINDOW = 1000  # number of recent requests the latency percentiles are computed over
+
+
+def merge_rows(frames):
+    """Stack frames with the same columns into one frame of unique rows.
+
+    Returns the unique rows and, for every input frame, the positions of its rows in the merged frame.
+    """
+    combined = pd.concat(frames, ignore_index=True)
+    hashes = pd.util.hash_pandas_object(combined, index=False).to_numpy()
+    _, first, inverse = np.unique(hashes, return_index=True, return_inverse=True)
+    # Keep the unique rows in order of first appearance
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    unique = combined.iloc[first[order]].reset_index(drop=True)
+    positions = rank[inverse]
+
+    indices = []
+    start = 0
+    for frame in frames:
+        indices.append(positions[start:start + len(frame)])
+        start += len(frame)
+    return unique, indices
+
+
+class PendingRequest:
+    """A query waiting to be merged into a batch."""
+
+    def __init__(self, func_name, learnt_dir, Y, X, quantiles, nsamples, options):
+        self.func_name = func_name
+        self.learnt_dir = learnt_dir
+        self.Y = Y
+        self.X = X if X is not None and not X.empty else None
+        self.quantiles = list(quantiles)
+        self.nsamples = nsamples
+        self.options = options
+        self.future = Future()
+        self.enqueued = time.monotonic()
+
+    @property
+    def batch_key(self):
+        """Requests with the same key can be answered by one backend call."""
+        x_columns = tuple(self.X.columns) if self.X is not None else None
+        return (self.func_name, self.learnt_dir, tuple(self.Y.columns), x_columns, tuple(self.quantiles),
+                self.nsamples, tuple(sorted(self.options.items())))
+
+
+class ServerMetrics:
+    """Request, batch and latency counters of the inference server."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.failed = 0
+        self.batches = 0
+        self.backend_seconds = 0.0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def enqueued(self):
+        with self._lock:
+            self.queue_depth += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+
+    def batch_done(self, requests, seconds, failed=False):
+        now = time.monotonic()
+        with self._lock:
+            self.batches += 1
+            self.requests += len(requests)
+            self.queue_depth -= len(requests)
+            self.backend_seconds += seconds
+            if failed:
+                self.failed += len(requests)
+            self._latencies.extend(now - request.enqueued for request in requests)
+
+    def snapshot(self):
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000
+            percentiles = np.percentile(latencies, [50, 95, 99]).tolist() if latencies.size else [None] * 3
+            return {
+                'requests': self.requests,
+                'failed': self.failed,
+                'batches': self.batches,
+                'mean_batch_size': self.requests / self.batches if self.batches else None,
+                'queue_depth': self.queue_depth,
+                'max_queue_depth': self.max_queue_depth,
+                'backend_seconds': self.backend_seconds,
+                'latency_ms': dict(zip(['p50', 'p95', 'p99'], percentiles))
+            }
+
+
+class MicroBatcher:
+    """Merge Pr/tailPr requests that arrive within a short window into one backend call per learnt folder.
+
+    The backend, see r_integration.backend, is created by backend_factory on the batcher's own thread, which
+    is the only thread that calls it.
+    """
+
+    def __init__(self, backend_factory=load_backend, window=DEFAULT_WINDOW_MS / 1000, max_batch_requests=MAX_BATCH_REQUESTS):
+        self.backend_factory = backend_factory
+        self.window = window
+        self.max_batch_requests = max_batch_requests
+        self.metrics = ServerMetrics()
+        self._backend = None
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._worker, name="MicroBatcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, func_name, learnt_dir, Y, X=None, quantiles=(0.055, 0.945), nsamples=100, **options):
+        """Queue a query and return a Future for its ProbResult."""
+        request = PendingRequest(func_name, learnt_dir, Y, X, quantiles, nsamples, options)
+        self.metrics.enqueued()
+        self._queue.put(request)
+        return request.future
+
+    def shutdown(self, wait=False):
+        self._queue.put(None)
+        if wait:
+            self._thread.join()
+
+    def _worker(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                break
+
+            # Collect what queued up during the previous batch and everything that arrives within the window
+            batch = [first]
+            stopping = False
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch_requests:
+                remaining = deadline - time.monotonic()
+                try:
+                    request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    stopping = True
+                    break
+                batch.append(request)
+
+            groups = {}
+            for request in batch:
+                groups.setdefault(request.batch_key, []).append(request)
+            for group in groups.values():
+                self._run_group(group)
+            if stopping:
+                break
+
+    def _run_group(self, group):
+        """Answer a group of compatible requests with one backend call and route each caller its rows."""
+        first = group[0]
+        start = time.monotonic()
+        try:
+            if self._backend is None:
+                self._backend = self.backend_factory()
+            Y, y_indices = merge_rows([request.Y for request in group])
+            if first.X is not None:
+                X, x_indices = merge_rows([request.X for request in group])
+            else:
+                X, x_indices = None, [np.array([0])] * len(group)
+
+            if first.func_name == 'run_Pr':
+                result = self._backend.run_Pr(Y, first.learnt_dir, X, quantiles=first.quantiles, nsamples=first.nsamples)
+            else:
+                result = self._backend.run_tailPr(Y, first.learnt_dir, first.options['eq'], first.options['lower_tail'], X,
+                                                  quantiles=first.quantiles, nsamples=first.nsamples)
+            if result is None:
+                raise RuntimeError("The backend returned no result.")
+        except Exception as e:
+            self.metrics.batch_done(group, time.monotonic() - start, failed=True)
+            for request in group:
+                request.future.set_exception(e)
+            return
+
+        self.metrics.batch_done(group, time.monotonic() - start)
+        for request, y_index, x_index in zip(group, y_indices, x_indices):
+            request.future.set_result(result.take(y_index, x_index))
+
+
+def result_to_json(result):
+    return {name: value.tolist() for name, value in result.to_arrays().items()}
+
+
+class InferenceRequestHandler(BaseHTTPRequestHandler):
+    """JSON API: POST /pr and /tailpr with a query, GET /metrics and /health."""
+
+    def do_GET(self):
+        if self.path == '/metrics':
+            self.send_json(200, self.server.batcher.metrics.snapshot())
+        elif self.path == '/health':
+            self.send_json(200, {'status': 'ok'})
+        else:
+            self.send_json(404, {'error': f"Unknown path '{self.path}'."})
+
+    def do_POST(self):
+        if self.path not in ('/pr', '/tailpr'):
+            self.send_json(404, {'error': f"Unknown path '{self.path}'."})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            query = json.loads(self.rfile.read(length))
+            future = self.submit(query)
+        except (ValueError, KeyError, TypeError) as e:
+            self.send_json(400, {'error': str(e)})
+            return
+
+        try:
+            result = future.result(timeout=REQUEST_TIMEOUT)
+        except Exception as e:
+            self.send_json(500, {'error': str(e)})
+            return
+        self.send_json(200, result_to_json(result))
+
+    def submit(self, query):
+        """Validate a query and hand it to the batcher."""
+        learnt_dir = self.server.resolve_learnt(query['learnt'])
+        Y = pd.DataFrame(query['Y'])
+        X = pd.DataFrame(query['X']) if query.get('X') else None
+        if Y.empty:
+            raise ValueError("The query has no Y values.")
+        quantiles = query.get('quantiles', [0.055, 0.945])
+        nsamples = int(query.get('nsamples', 100))
+        if self.path == '/pr':
+            return self.server.batcher.submit('run_Pr', learnt_dir, Y, X, quantiles, nsamples)
+        return self.server.batcher.submit('run_tailPr', learnt_dir, Y, X, quantiles, nsamples,
+                                          eq=bool(query.get('eq', True)), lower_tail=bool(query.get('lower_tail', True)))
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class InferenceServer(ThreadingHTTPServer):
+    """Local HTTP server answering Pr/tailPr queries for the folders in the learnt folder."""
+    daemon_threads = True
+
+    def __init__(self, address, batcher, learnt_root=LEARNT_FOLDER):
+        super().__init__(address, InferenceRequestHandler)
+        self.batcher = batcher
+        self.learnt_root = learnt_root
+
+    def resolve_learnt(self, name):
+        """Return the path of a learnt folder given by name; other paths are not served."""
+        if not name or os.path.basename(name) != name or name in ('.', '..'):
+            raise ValueError(f"Invalid learnt folder name '{name}'.")
+        learnt_dir = os.path.join(self.learnt_root, name)
+        if not os.path.isdir(learnt_dir):
+            raise ValueError(f"The learnt folder '{name}' does not exist.")
+        return learnt_dir
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve Pr and tailPr queries for the learnt folders over local HTTP.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--window-ms', type=float, default=DEFAULT_WINDOW_MS, help="how long to wait for requests to batch together")
+    args = parser.parse_args(argv)
+
+    from r_integration.resources import configure_thread_env
+    configure_thread_env()
+
+    server = InferenceServer((args.host, args.port), MicroBatcher(window=args.window_ms / 1000))
+    print(f"Serving on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.batcher.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
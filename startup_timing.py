@@ -0,0 +1,30 @@
+import os
+import sys
+import time
+
+
+# Set INFERNO_STARTUP_REPORT=1 to print the report once the R runtime has finished loading
+REPORT_ENV_VAR = 'INFERNO_STARTUP_REPORT'
+
+_start = time.perf_counter()
+_marks = []
+
+
+def mark(label):
+    """Record that a startup phase has finished."""
+    _marks.append((label, time.perf_counter()))
+
+
+def report():
+    """Return a table with the duration of each startup phase and the time since launch in milliseconds."""
+    lines = [f"{'phase':<32}{'took (ms)':>12}{'at (ms)':>12}"]
+    previous = _start
+    for label, timestamp in _marks:
+        lines.append(f"{label:<32}{(timestamp - previous) * 1000:>12.1f}{(timestamp - _start) * 1000:>12.1f}")
+        previous = timestamp
+    return "\n".join(lines)
+
+
+def print_report_if_requested():
+    if os.environ.get(REPORT_ENV_VAR):
+        print(report(), file=sys.stderr, flush=True)